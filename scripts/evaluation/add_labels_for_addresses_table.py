@@ -1,7 +1,14 @@
 from scripts.utils import str_processing as sp
+from scripts.utils import label_dictionary as ld
 
-def add_label_columns_for_table(pm, schema_name, table_name, id_col, number_col, street_name_col, simp_label_col, norm_label_col, exceptions=None):
-    create_simplified_label_for_streetnumbers(pm, schema_name, table_name, id_col, simp_label_col, number_col, street_name_col, exceptions)
+def add_label_columns_for_table(pm, schema_name, table_name, id_col, number_col, street_name_col, simp_label_col, norm_label_col, exceptions=None,
+                                label_dictionary_file=None):
+    """
+    Adds simplified and normalised labels to the table. If `label_dictionary_file` is given, street names are searched
+    in this persistent label dictionary (shared with the fact graph construction) before being normalised.
+    """
+    with ld.using_label_dictionary(label_dictionary_file):
+        create_simplified_label_for_streetnumbers(pm, schema_name, table_name, id_col, simp_label_col, number_col, street_name_col, exceptions)
     create_normalised_label_for_streetnumbers(pm, schema_name, table_name, norm_label_col, number_col, street_name_col)
 
 def create_normalised_label_for_streetnumbers(
@@ -30,6 +37,10 @@ def create_simplified_label_for_streetnumbers(
     results = pm.fetch_all(f"""SELECT {id_col}, {number_col}, {street_name_col} FROM {schema_name}.{table_name}""")
     all_queries = []
 
+    # Street names are normalised at once (and searched at once in the label dictionary if one is set)
+    street_names = {(str(row[2]), "thoroughfare", "fr") for row in results if row[2] is not None}
+    sp.get_name_normaliser().normalize_and_simplify_list(list(street_names))
+
     for row in results:
         id_val, sn_val, th_val = row[0], row[1], row[2]
 
@@ -59,7 +70,7 @@ def get_address_label_from_street_and_number(number:str, street_label:str, excep
         return None
     
     sn_label = sp.simplify_nolang_name_version(number, "number")
-    _, th_label = sp.normalize_and_simplify_name_version(street_label, "thoroughfare", "fr")
+    _, th_label = sp.get_name_normaliser().normalize_and_simplify(street_label, "thoroughfare", "fr")
 
     # If th_label is in exceptions, it must be remplaced by the related exception
     exc_th_label = exceptions.get(th_label)
@@ -1,6 +1,11 @@
 from scripts.utils import str_processing as sp
+from scripts.utils import label_dictionary as ld
+import io
 import csv
+import time
 import itertools
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
 def get_postgis_table_geom_settings(conn, schema_name, table_name):
@@ -64,36 +69,57 @@ def create_normalised_label_for_streetnumbers(conn, schema_name, table_name, nor
 
 def create_simplified_label_for_streetnumbers(conn, schema_name, table,
                                               id_col, simp_label_col, th_attr_col, sn_attr_col, add_sn_attr_col=None, exceptions=None):
+    """
+    Fill `simp_label_col` with the simplified label of each street number. Labels are computed in Python once for each distinct
+    (street, number) pair, loaded with COPY in a temporary table and applied with a single `UPDATE ... FROM` join.
+    `id_col` is not used anymore (rows are matched by their street and number), it is kept for compatibility.
+    """
     cur = conn.cursor()
 
     cur.execute(f"ALTER TABLE {schema_name}.{table} ADD COLUMN IF NOT EXISTS {simp_label_col} TEXT;")
     conn.commit()
 
-    columns = [id_col, th_attr_col, sn_attr_col]
+    # Same concatenation as `create_update_query_to_add_simplified_name`: the additional number is ignored if it is NULL
+    th_expr = f"CAST(t.\"{th_attr_col}\" AS TEXT)"
+    sn_expr = f"CAST(t.\"{sn_attr_col}\" AS TEXT)"
     if add_sn_attr_col is not None:
-        columns.append(add_sn_attr_col)
-    columns = [f"\"{x}\"" for x in columns]
-    query_cols = ", ".join(columns)
+        sn_expr += f" || COALESCE(CAST(t.\"{add_sn_attr_col}\" AS TEXT), '')"
 
     cur.execute(f"""
-    SELECT {query_cols}
-    FROM {schema_name}.{table}
+    SELECT DISTINCT {th_expr}, {sn_expr}
+    FROM {schema_name}.{table} AS t
+    WHERE t.\"{th_attr_col}\" IS NOT NULL AND t.\"{sn_attr_col}\" IS NOT NULL
     """)
 
-    all_queries = []
+    rows = cur.fetchall()
+
+    # Street names are normalised at once (and searched at once in the label dictionary if one is set)
+    sp.get_name_normaliser().normalize_and_simplify_list(list({(th_label, "thoroughfare", "fr") for th_label, _ in rows}))
+
+    # Every value is quoted, so that empty labels are not loaded as NULL
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for th_label, sn_label in rows:
+        writer.writerow([th_label, sn_label, get_address_label_from_street_and_number(sn_label, th_label, exceptions or {})])
+    buffer.seek(0)
 
-    for row in cur.fetchall():
-        id_val, th_val, sn_val = row[0], row[1], row[2]
-        try:
-            add_sn_val = row[3]
-        except:
-            add_sn_val = None
+    cur.execute("CREATE TEMP TABLE tmp_simplified_labels (th_label TEXT, sn_label TEXT, simp_label TEXT) ON COMMIT DROP")
+    cur.copy_expert("COPY tmp_simplified_labels (th_label, sn_label, simp_label) FROM STDIN WITH (FORMAT csv)", buffer)
+    cur.execute("ANALYZE tmp_simplified_labels")
 
-        update_query = create_update_query_to_add_simplified_name(schema_name, table, id_val, th_val, sn_val, add_sn_val, id_col, simp_label_col, exceptions)
-        all_queries.append(update_query)
+    cur.execute(f"""
+    UPDATE {schema_name}.{table} AS t
+    SET \"{simp_label_col}\" = l.simp_label
+    FROM tmp_simplified_labels AS l
+    WHERE {th_expr} = l.th_label AND {sn_expr} = l.sn_label
+    """)
 
-    full_query = ";".join(all_queries)
-    cur.execute(full_query)
+    # Rows without street or number have no label
+    cur.execute(f"""
+    UPDATE {schema_name}.{table} AS t
+    SET \"{simp_label_col}\" = NULL
+    WHERE (t.\"{th_attr_col}\" IS NULL OR t.\"{sn_attr_col}\" IS NULL) AND t.\"{simp_label_col}\" IS NOT NULL
+    """)
 
     cur.close()
     conn.commit()
@@ -123,14 +149,19 @@ def get_exceptions(exceptions):
         
     return exceptions_dict
 
-def add_name_columns_for_multiple_tables(conn, tables_settings, schema_name, simp_label_col, norm_label_col, exceptions):
+def add_name_columns_for_multiple_tables(conn, tables_settings, schema_name, simp_label_col, norm_label_col, exceptions, label_dictionary_file=None):
+    """
+    Adds simplified and normalised labels to the tables. If `label_dictionary_file` is given, street names are searched
+    in this persistent label dictionary (shared with the fact graph construction) before being normalised.
+    """
     exceptions_dict = get_exceptions(exceptions)
 
     # Create simplified labels for tables
-    for table_set in tables_settings:
-        add_name_columns_for_table(table_set, conn, schema_name, simp_label_col, norm_label_col, exceptions_dict)
-        table_name = table_set["name"]
-        print(f"{table_name} processed")
+    with ld.using_label_dictionary(label_dictionary_file):
+        for table_set in tables_settings:
+            add_name_columns_for_table(table_set, conn, schema_name, simp_label_col, norm_label_col, exceptions_dict)
+            table_name = table_set["name"]
+            print(f"{table_name} processed")
 
 def add_name_columns_for_table(table_settings: dict, conn, schema_name, simp_label_col, norm_label_col, exceptions=None):
     table_name = table_settings.get("name")
@@ -147,7 +178,7 @@ def get_address_label_from_street_and_number(number:str, street_label:str, excep
         return None
     
     sn_label = sp.simplify_nolang_name_version(number, "number")
-    _, th_label = sp.normalize_and_simplify_name_version(street_label, "thoroughfare", "fr")
+    _, th_label = sp.get_name_normaliser().normalize_and_simplify(street_label, "thoroughfare", "fr")
 
     # If th_label is in exceptions, it must be remplaced by the related exception
     exc_th_label = exceptions.get(th_label)
@@ -192,62 +223,95 @@ def create_links_table(conn, schema_name, links_table_name,
 def create_links_table_from_multiple_tables(conn, tables_settings, schema_name, links_table_name,
                                             id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
                                             geom_col, validated_col, to_keep_col, similar_geom_col, method_col, creation_date_col, 
-                                            simp_label_col, norm_label_col, default_epsg_code, max_distance):
-    # # Create links between tables
-    table_pairs = list(itertools.combinations(tables_settings, 2))
-    for pair in table_pairs:
+                                            simp_label_col, norm_label_col, default_epsg_code, max_distance, workers=1, pm=None):
+    """
+    Create links (and views) between the addresses of each pair of tables.
+    If `workers` is greater than 1 and a `PostgresManager` with a connection pool is given (`pm`), pairs are processed concurrently,
+    each one with its own connection (workers wait for a free connection if the pool is smaller).
+    Pairs are reported (with their time) in the same order whatever the number of workers. Identifiers of links then depend
+    on the order in which pairs are completed: exports are sorted on the identifiers of addresses.
+    """
+
+    # Indexes are created before pairs are processed, so that two pairs do not create the same index at the same time
+    for table_settings in tables_settings:
+        create_indexes_for_address_linking(conn, schema_name, table_settings["name"], simp_label_col)
+
+    def link_table_pair(pair):
         table_settings_from, table_settings_to = pair[0], pair[1]
         table_name_from, table_name_to = table_settings_from["name"], table_settings_to["name"]
-        create_links_between_similar_addresses(table_settings_from, table_settings_to, conn, schema_name, links_table_name,
-                                                id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
-                                                geom_col, validated_col, to_keep_col, similar_geom_col, method_col, creation_date_col,
-                                                default_epsg_code, simp_label_col,
-                                                max_distance=max_distance)
-        create_views_for_table_pair(conn, schema_name, links_table_name, table_name_from, table_name_to,
-                                    id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
-                                    geom_col, validated_col, norm_label_col)
-        print(f"Links between {table_name_from} and {table_name_to} created")
+        start = time.perf_counter()
+        with (pm.connection() if pm is not None else contextlib.nullcontext(conn)) as pair_conn:
+            create_links_between_similar_addresses(table_settings_from, table_settings_to, pair_conn, schema_name, links_table_name,
+                                                    id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
+                                                    geom_col, validated_col, to_keep_col, similar_geom_col, method_col, creation_date_col,
+                                                    default_epsg_code, simp_label_col,
+                                                    max_distance=max_distance, create_indexes=False)
+            create_views_for_table_pair(pair_conn, schema_name, links_table_name, table_name_from, table_name_to,
+                                        id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
+                                        geom_col, validated_col, norm_label_col)
+        return time.perf_counter() - start
+
+    # Without a pool, all pairs share `conn` and are processed one after the other
+    pair_workers = max(1, workers) if pm is not None else 1
+
+    table_pairs = list(itertools.combinations(tables_settings, 2))
+    with ThreadPoolExecutor(max_workers=pair_workers) as executor:
+        for pair, pair_time in zip(table_pairs, executor.map(link_table_pair, table_pairs)):
+            print(f"Links between {pair[0]['name']} and {pair[1]['name']} created ({pair_time:.2f} s)")
 
 
 def create_links_between_similar_addresses(table_settings_from, table_settings_to, conn, schema_name, links_table_name,
                                           id_col_from, id_col_to, table_name_from_col, table_name_to_col,
                                           geom_col, validated_col, to_keep_col, similar_geom_col, method_col, creation_date_col,
-                                          epsg_code, simp_label_col, max_distance=5):
+                                          epsg_code, simp_label_col, max_distance=5, create_indexes=True):
     table_name_from = table_settings_from.get("name")
     table_name_to = table_settings_to.get("name")
 
     id_col_1, geom_col_1 = get_postgis_table_geom_settings(conn, schema_name, table_name_from)
     id_col_2, geom_col_2 = get_postgis_table_geom_settings(conn, schema_name, table_name_to)
 
-    query1 = f""" 
+    if create_indexes:
+        create_indexes_for_address_linking(conn, schema_name, table_name_from, simp_label_col)
+        create_indexes_for_address_linking(conn, schema_name, table_name_to, simp_label_col)
+
+    # The similarity of geometries is computed while links are inserted, only for the links of this pair of tables
+    from_point = f"ST_Transform(ST_Centroid(t1.{geom_col_1}), {epsg_code})"
+    to_point = f"ST_Transform(ST_Centroid(t2.{geom_col_2}), {epsg_code})"
+
+    query = f""" 
     INSERT INTO {schema_name}.{links_table_name}
-    (\"{id_col_from}\", \"{id_col_to}\", \"{table_name_from_col}\", \"{table_name_to_col}\", \"{geom_col}\", \"{validated_col}\", \"{to_keep_col}\", \"{method_col}\")
+    (\"{id_col_from}\", \"{id_col_to}\", \"{table_name_from_col}\", \"{table_name_to_col}\", \"{geom_col}\", \"{validated_col}\", \"{to_keep_col}\", \"{method_col}\", \"{similar_geom_col}\")
     SELECT
         t1.{id_col_1},
         t2.{id_col_2},
         '{table_name_from}',
         '{table_name_to}',
-        ST_SetSRID(
-            ST_MakeLine(
-                ST_Transform(ST_Centroid(t1.{geom_col_1}), {epsg_code}),
-                ST_Transform(ST_Centroid(t2.{geom_col_2}), {epsg_code})
-            ), {epsg_code}
-        ),
+        ST_SetSRID(ST_MakeLine({from_point}, {to_point}), {epsg_code}),
         0,
         FALSE,
-        'automatic'
-    FROM {schema_name}.{table_name_from} AS t1, {schema_name}.{table_name_to} AS t2
-    WHERE t1.{simp_label_col} = t2.{simp_label_col};
+        'automatic',
+        ST_Distance({from_point}, {to_point}) < {max_distance}
+    FROM {schema_name}.{table_name_from} AS t1
+    JOIN {schema_name}.{table_name_to} AS t2 ON t1.{simp_label_col} = t2.{simp_label_col}
+    ORDER BY t1.{id_col_1}, t2.{id_col_2};
     """
+    
+    cur = conn.cursor()
+    cur.execute(query)
+    conn.commit()
 
-    query2 = f"""
-    UPDATE {schema_name}.{links_table_name}
-    SET {similar_geom_col} = (ST_Length(ST_Transform("{geom_col}", {epsg_code})) < {max_distance});
+
+def create_indexes_for_address_linking(conn, schema_name, table_name, simp_label_col):
     """
-    
+    Creates a btree index on simplified labels (to join addresses of two tables), if it does not exist.
+    """
+
     cur = conn.cursor()
-    cur.execute(query1)
-    cur.execute(query2)
+    cur.execute(f"""
+    CREATE INDEX IF NOT EXISTS {table_name}_{simp_label_col}_idx ON {schema_name}.{table_name} ({simp_label_col});
+    ANALYZE {schema_name}.{table_name};
+    """)
+    cur.close()
     conn.commit()
 
 
@@ -501,10 +565,7 @@ def extract_manual_links(conn, schema_name, links_table_name,
 def extract_to_keep_links(conn, tables_settings, schema_name, links_table_name,
                       id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
                       geom_col, to_keep_col, similar_geom_col, simp_label_col, output_csv_path):
-    cur = conn.cursor()
-
-    # Mets les données dans un DataFrame
-    df = pd.DataFrame()
+    queries = []
 
     # Create links between tables
     table_pairs = list(itertools.combinations(tables_settings, 2))
@@ -519,7 +580,7 @@ def extract_to_keep_links(conn, tables_settings, schema_name, links_table_name,
                 lt.{table_name_from_col} AS {table_name_from_col},
                 lt.{id_table_to_col} AS {id_table_to_col},
                 lt.{table_name_to_col} AS {table_name_to_col},
-                lt.{similar_geom_col} AS {similar_geom_col},
+                INITCAP(lt.{similar_geom_col}::text) AS {similar_geom_col},
                 t1.normalised_label AS label_from,
                 t2.normalised_label AS label_to,
                 ST_AsText(ST_Transform(lt.{geom_col}, 2154)) AS {geom_col},
@@ -536,33 +597,19 @@ def extract_to_keep_links(conn, tables_settings, schema_name, links_table_name,
                 lt.{table_name_to_col} = '{t2_name}' AND
                 lt.{id_table_from_col} = t1.id AND
                 lt.{id_table_to_col} = t2.id
+                ORDER BY lt.{id_table_from_col}, lt.{id_table_to_col}
         """
-
-        cur.execute(query)
-
-        # Récupère les résultats et les noms des colonnes
-        rows = cur.fetchall()
-        columns = [desc[0] for desc in cur.description]
-
-        # Mets les données dans un DataFrame
-        dfBis = pd.DataFrame(rows, columns=columns)
-        df = pd.concat([df, dfBis], ignore_index=True)
-
-    # Ferme le curseur proprement
-    cur.close()
+        queries.append(query)
 
     # Exporte en CSV
-    df.to_csv(output_csv_path, index=False)
+    copy_queries_to_csv(conn, queries, output_csv_path)
 
     print(f"Exported to {output_csv_path}")
 
 def extract_ground_truth_links(conn, tables_settings, schema_name, links_table_name,
                       id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
                       geom_col, to_keep_col, similar_geom_col, simp_label_col, output_csv_path):
-    cur = conn.cursor()
-
-    # Mets les données dans un DataFrame
-    df = pd.DataFrame()
+    queries = []
 
     # Create links between tables
     table_pairs = list(itertools.combinations(tables_settings, 2))
@@ -574,7 +621,7 @@ def extract_ground_truth_links(conn, tables_settings, schema_name, links_table_n
             SELECT DISTINCT
                 lt.{table_name_from_col} AS {table_name_from_col},
                 lt.{table_name_to_col} AS {table_name_to_col},
-                lt.{similar_geom_col} AS {similar_geom_col},
+                INITCAP(lt.{similar_geom_col}::text) AS {similar_geom_col},
                 t1.{simp_label_col} AS simp_label
                 FROM
                 {schema_name}.{links_table_name} AS lt,
@@ -586,23 +633,12 @@ def extract_ground_truth_links(conn, tables_settings, schema_name, links_table_n
                 lt.{table_name_to_col} = '{t2_name}' AND
                 lt.{id_table_from_col} = t1.id AND
                 lt.{id_table_to_col} = t2.id
+                ORDER BY simp_label, {similar_geom_col}
         """
-
-        cur.execute(query)
-
-        # Récupère les résultats et les noms des colonnes
-        rows = cur.fetchall()
-        columns = [desc[0] for desc in cur.description]
-
-        # Mets les données dans un DataFrame
-        dfBis = pd.DataFrame(rows, columns=columns)
-        df = pd.concat([df, dfBis], ignore_index=True)
-
-    # Ferme le curseur proprement
-    cur.close()
+        queries.append(query)
 
     # Exporte en CSV
-    df.to_csv(output_csv_path, index=False)
+    copy_queries_to_csv(conn, queries, output_csv_path)
 
     print(f"Exported to {output_csv_path}")
 
@@ -610,10 +646,7 @@ def extract_ground_truth_links(conn, tables_settings, schema_name, links_table_n
 def extract_streetnumbers_without_link(conn, tables_settings, schema_name, links_table_name,
                       id_table_from_col, id_table_to_col, table_name_from_col, table_name_to_col,
                       geom_col, to_keep_col, similar_geom_col, simp_label_col, output_csv_path):
-    cur = conn.cursor()
-
-    # Mets les données dans un DataFrame
-    df = pd.DataFrame()
+    queries = []
 
     for table_set in tables_settings:
         table_name = table_set["name"]
@@ -625,23 +658,26 @@ def extract_streetnumbers_without_link(conn, tables_settings, schema_name, links
                 SELECT {id_table_from_col} FROM {schema_name}.{links_table_name} WHERE {table_name_from_col} = '{table_name}'
                 UNION
                 SELECT {id_table_to_col} FROM {schema_name}.{links_table_name} WHERE {table_name_to_col} = '{table_name}'
-            ) AND {simp_label_col} IS NOT NULL ;
+            ) AND {simp_label_col} IS NOT NULL
+            ORDER BY simp_label
         """
+        queries.append(query)
 
-        cur.execute(query)
-
-        # Récupère les résultats et les noms des colonnes
-        rows = cur.fetchall()
-        columns = [desc[0] for desc in cur.description]
+    # Exporte en CSV
+    copy_queries_to_csv(conn, queries, output_csv_path)
 
-        # Mets les données dans un DataFrame
-        dfBis = pd.DataFrame(rows, columns=columns)
-        df = pd.concat([df, dfBis], ignore_index=True)
+    print(f"Exported to {output_csv_path}")
 
-    # Ferme le curseur proprement
-    cur.close()
 
-    # Exporte en CSV
-    df.to_csv(output_csv_path, index=False)
+def copy_queries_to_csv(conn, queries, output_csv_path):
+    """
+    Exports the results of several SELECT queries (with the same columns) in a single CSV file with `COPY (...) TO STDOUT`:
+    rows are streamed by PostgreSQL to the file, query after query, without being held in memory.
+    The header is written by the first query. Booleans are written t/f by PostgreSQL: they should be selected
+    as `INITCAP(col::text)` to be written True/False (as pandas does).
+    """
 
-    print(f"Exported to {output_csv_path}")
+    with conn.cursor() as cur, open(output_csv_path, "w", encoding="utf-8", newline="") as f:
+        for i, query in enumerate(queries):
+            header = ", HEADER" if i == 0 else ""
+            cur.copy_expert(f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv{header})", f)
@@ -13,7 +13,8 @@ def create_links(
     ban_settings: dict,
     osm_settings: dict,
     source_names: list,
-    links_folder: str
+    links_folder: str,
+    label_dictionary_file: str = None
 ):
     """
     Orchestrates the full pipeline for creating and linking historical addresses 
@@ -46,6 +47,9 @@ def create_links(
         List of source names to include when creating links between similar addresses.
     links_folder : str
         Path to the folder where link ground truth files will be saved.
+    label_dictionary_file : str, optional
+        SQLite file of the persistent label dictionary (shared with the fact graph construction) in which street names
+        are searched before being normalised.
 
     Returns:
     --------
@@ -69,7 +73,7 @@ def create_links(
     create_addresses_table(pm, addr_table_settings)
 
     # Insert addresses from all sources (historical, BAN, OSM)
-    insert_address_sources(pm, addr_table_settings, sources_settings, ban_settings, osm_settings)
+    insert_address_sources(pm, addr_table_settings, sources_settings, ban_settings, osm_settings, label_dictionary_file)
 
     # Create links between similar addresses based on label similarity and spatial proximity
     create_and_fill_links(pm, addr_table_settings, links_table_settings, source_names, max_distance, links_folder)
@@ -111,7 +115,7 @@ def create_addresses_table(pm, addr_table_settings):
 
     print(f"Created table `{addr_table_settings['schema_name']}.{addr_table_settings['table_name']}`.")
 
-def insert_address_sources(pm, addr_table_settings, sources_settings, ban_settings, osm_settings):
+def insert_address_sources(pm, addr_table_settings, sources_settings, ban_settings, osm_settings, label_dictionary_file=None):
 
     table_name = f"{addr_table_settings['schema_name']}.{addr_table_settings['table_name']}"
 
@@ -150,7 +154,7 @@ def insert_address_sources(pm, addr_table_settings, sources_settings, ban_settin
         addr_table_settings['id_col'],
         addr_table_settings['number_col'], addr_table_settings['street_name_col'],
         addr_table_settings['simplified_label_col'], addr_table_settings['normalized_label_col'],
-        exceptions=None
+        exceptions=None, label_dictionary_file=label_dictionary_file
     )
 
     print(f"Inserted features and added label columns in table `{table_name}`.")
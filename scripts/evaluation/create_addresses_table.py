@@ -61,25 +61,11 @@ def insert_geojson_features_in_streetnumber_table(
     with open(geojson_file) as f:
         data = json.load(f)
 
-    for feature in data['features']:
-        props = feature['properties']
-        geom = shape(feature['geometry'])
-        wkt_geom = geom.centroid.wkt
-
-        number = props[number_prop] if pd.notna(props[number_prop]) else ""
-        number = str(number).replace("'", "''")
-        street_name = props[street_name_prop] if pd.notna(props[street_name_prop]) else ""
-        street_name = str(street_name).replace("'", "''")
-
-        source_name_val = f"'{source_name}'" if source_name else "NULL"
-        number_val = f"'{number}'" if number else "NULL"
-        street_name_val = f"'{street_name}'" if street_name else "NULL"
-
-        query = f"""
-        INSERT INTO {table_name} ({source_name_col}, {number_col}, {street_name_col}, {geom_col})
-        VALUES ({source_name_val}, {number_val}, {street_name_val}, ST_Transform(ST_GeomFromText('{wkt_geom}', {from_epsg}), {to_epsg}));
-        """
-        pm.execute_query(query)
+    rows = (
+        get_streetnumber_row(source_name, feature['properties'][number_prop], feature['properties'][street_name_prop], shape(feature['geometry']).centroid.wkt)
+        for feature in data['features']
+    )
+    pm.copy_rows_with_geometry(table_name, [source_name_col, number_col, street_name_col], geom_col, rows, from_epsg=from_epsg, to_epsg=to_epsg)
 
 
 def insert_ban_features_in_streetnumber_table(
@@ -103,50 +89,30 @@ def insert_ban_features_in_streetnumber_table(
     """
     df = pd.read_csv(ban_file, sep=ban_file_sep)
 
-    for _, row in df.iterrows():
-        insert_ban_feature_in_streetnumber_table(
-            pm, row, table_name, source_name,
-            source_name_col, number_col, street_name_col, geom_col,
-            number_prop, repetition_prop, street_name_prop, lat_prop, lon_prop,
-            from_epsg=from_epsg, to_epsg=to_epsg
-        )
+    rows = (
+        get_ban_streetnumber_row(ban_row, source_name, number_prop, repetition_prop, street_name_prop, lat_prop, lon_prop)
+        for ban_row in df.to_dict("records")
+    )
+    pm.copy_rows_with_geometry(table_name, [source_name_col, number_col, street_name_col], geom_col, rows, from_epsg=from_epsg, to_epsg=to_epsg)
 
 
-def insert_ban_feature_in_streetnumber_table(
-        pm, ban_row, table_name, source_name,
-        source_name_col, number_col, street_name_col, geom_col,
-        number_prop, repetition_prop, street_name_prop, lat_prop, lon_prop,
-        from_epsg=4326, to_epsg=4326):
+def get_streetnumber_row(source_name, number, street_name, wkt_geom):
     """
-    Inserts a single address feature (BAN format) into the house number table.
-
-    Args:
-        pm (PostgresManager): SQL executor instance.
-        ban_row (pd.Series): One row from the BAN CSV.
-        table_name (str): Name of the destination table.
-        source_name (str): Source label.
-        ... (str): Various column/property names for BAN structure.
-        from_epsg (int): EPSG code of input coordinates.
-        to_epsg (int): EPSG code for output coordinates.
+    Returns the values of a row of the house number table (source name, number, street name, geometry) to be bulk loaded
+    with `PostgresManager.copy_rows_with_geometry` (missing values are set to None).
     """
-    wkt_geom = f"POINT({ban_row[lon_prop]} {ban_row[lat_prop]})"
-    source_name_val = f"'{source_name}'" if source_name else "NULL"
-
-    repetition = ban_row[repetition_prop] if pd.notna(ban_row[repetition_prop]) else ""
-    repetition = str(repetition).replace("'", "''")
-    number = ban_row[number_prop] if pd.notna(ban_row[number_prop]) else ""
-    number = str(number).replace("'", "''")
-    street_name = ban_row[street_name_prop] if pd.notna(ban_row[street_name_prop]) else ""
-    street_name = str(street_name).replace("'", "''")
+    number = str(number) if pd.notna(number) and str(number) != "" else None
+    street_name = str(street_name) if pd.notna(street_name) and str(street_name) != "" else None
+    return (source_name or None, number, street_name, wkt_geom)
 
-    number_val = f"'{number}{repetition}'" if number else "NULL"
-    street_name_val = f"'{street_name}'" if street_name else "NULL"
 
-    query = f"""
-    INSERT INTO {table_name} ({source_name_col}, {number_col}, {street_name_col}, {geom_col})
-    VALUES ({source_name_val}, {number_val}, {street_name_val}, ST_Transform(ST_GeomFromText('{wkt_geom}', {from_epsg}), {to_epsg}));
-    """
-    pm.execute_query(query)
+def get_ban_streetnumber_row(ban_row, source_name, number_prop, repetition_prop, street_name_prop, lat_prop, lon_prop):
+    wkt_geom = f"POINT({ban_row[lon_prop]} {ban_row[lat_prop]})"
+    repetition = ban_row[repetition_prop] if pd.notna(ban_row[repetition_prop]) else ""
+    number = ban_row[number_prop]
+    if pd.notna(number) and str(number) != "":
+        number = f"{number}{repetition}"
+    return get_streetnumber_row(source_name, number, ban_row[street_name_prop], wkt_geom)
 
 
 def insert_osm_features_in_streetnumber_table(
@@ -169,43 +135,8 @@ def insert_osm_features_in_streetnumber_table(
     osm_hn = pd.read_csv(osm_hn_file, sep=osm_file_sep)
     osm_merged = pd.merge(osm, osm_hn, on=join_prop)
 
-    for _, row in osm_merged.iterrows():
-        insert_osm_feature_in_streetnumber_table(
-            pm, row, table_name, source_name,
-            source_name_col, number_col, street_name_col, geom_col,
-            number_prop, street_name_prop, geom_prop,
-            from_epsg=from_epsg, to_epsg=to_epsg
-        )
-
-
-def insert_osm_feature_in_streetnumber_table(
-        pm, osm_row, table_name, source_name,
-        source_name_col, number_col, street_name_col, geom_col,
-        number_prop, street_name_prop, geom_prop,
-        from_epsg=4326, to_epsg=4326):
-    """
-    Inserts a single row of OSM address data into the house number table.
-
-    Args:
-        pm (PostgresManager): SQL executor instance.
-        osm_row (pd.Series): One row from the merged OSM dataset.
-        table_name (str): Destination table.
-        source_name (str): Name of data source.
-        ... (str): Column and property names for insertion.
-    """
-    wkt_geom = osm_row[geom_prop]
-    source_name_val = f"'{source_name}'" if source_name else "NULL"
-
-    number = osm_row[number_prop] if pd.notna(osm_row[number_prop]) else ""
-    number = str(number).replace("'", "''")
-    street_name = osm_row[street_name_prop] if pd.notna(osm_row[street_name_prop]) else ""
-    street_name = str(street_name).replace("'", "''")
-
-    number_val = f"'{number}'" if number else "NULL"
-    street_name_val = f"'{street_name}'" if street_name else "NULL"
-
-    query = f"""
-    INSERT INTO {table_name} ({source_name_col}, {number_col}, {street_name_col}, {geom_col})
-    VALUES ({source_name_val}, {number_val}, {street_name_val}, ST_Transform(ST_GeomFromText('{wkt_geom}', {from_epsg}), {to_epsg}));
-    """
-    pm.execute_query(query)
+    rows = (
+        get_streetnumber_row(source_name, osm_row[number_prop], osm_row[street_name_prop], osm_row[geom_prop])
+        for osm_row in osm_merged.to_dict("records")
+    )
+    pm.copy_rows_with_geometry(table_name, [source_name_col, number_col, street_name_col], geom_col, rows, from_epsg=from_epsg, to_epsg=to_epsg)
@@ -1,4 +1,6 @@
+import time
 import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 def create_links_table(
     pm, schema_name, table_name,
@@ -52,13 +54,19 @@ def create_links_between_similar_addresses(
     links_similar_geom_col, links_succesive_geom_col,
     addr_id_col, addr_source_col, addr_geom_col, addr_simp_label_col,
     source_names,
-    links_epsg_code=4326, addr_epsg_code=4326, max_distance=5):
-
-    pairs = list(itertools.combinations(source_names, 2))
-    for pair in pairs:
-        source_from_name, source_to_name = pair[0], pair[1]
+    links_epsg_code=4326, addr_epsg_code=4326, max_distance=5, workers=1):
+    """
+    Creates links between addresses of each pair of sources. If `workers` is greater than 1, pairs are linked concurrently
+    on the connections of the pool of `pm` (workers wait for a free connection if the pool is smaller, and queries run one
+    at a time if `pm` has no pool). The time of each pair is printed in the order of pairs, whatever the order in which they are completed.
+    Identifiers of links then depend on the order in which pairs are completed: exports are sorted on the identifiers of addresses.
+    """
 
+    create_indexes_for_address_linking(pm, addr_schema_name, addr_table_name, addr_source_col, addr_simp_label_col)
 
+    def link_source_pair(pair):
+        source_from_name, source_to_name = pair[0], pair[1]
+        start = time.perf_counter()
         create_links_between_similar_addresses_from_source_pair(
             pm,
             links_schema_name, links_table_name,
@@ -71,6 +79,12 @@ def create_links_between_similar_addresses(
             source_from_name, source_to_name,
             links_epsg_code=links_epsg_code, addr_epsg_code=addr_epsg_code, max_distance=max_distance
         )
+        return time.perf_counter() - start
+
+    pairs = list(itertools.combinations(source_names, 2))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for pair, pair_time in zip(pairs, executor.map(link_source_pair, pairs)):
+            print(f"Links between {pair[0]} and {pair[1]} created ({pair_time:.2f} s)")
 
 
 def create_links_between_similar_addresses_from_source_pair(
@@ -86,34 +100,44 @@ def create_links_between_similar_addresses_from_source_pair(
         links_epsg_code=4326, addr_epsg_code=4326, max_distance=5):
 
 
-    query1 = f""" 
+    # The similarity of geometries is computed while links are inserted, only for the links of this pair of sources
+    from_point = f"ST_Transform(ST_Centroid(t1.{addr_geom_col}), {addr_epsg_code})"
+    to_point = f"ST_Transform(ST_Centroid(t2.{addr_geom_col}), {addr_epsg_code})"
+
+    query = f""" 
     INSERT INTO {links_schema_name}.{links_table_name}
-    (\"{links_id_col_from}\", \"{links_id_col_to}\", \"{links_source_from_col}\", \"{links_source_to_col}\", \"{links_geom_col}\")
+    (\"{links_id_col_from}\", \"{links_id_col_to}\", \"{links_source_from_col}\", \"{links_source_to_col}\", \"{links_geom_col}\", \"{links_similar_geom_col}\")
     SELECT
         t1.{addr_id_col},
         t2.{addr_id_col},
         t1.{addr_source_col},
         t2.{addr_source_col},
-        ST_SetSRID(
-            ST_MakeLine(
-                ST_Transform(ST_Centroid(t1.{addr_geom_col}), {addr_epsg_code}),
-                ST_Transform(ST_Centroid(t2.{addr_geom_col}), {addr_epsg_code})
-            ), {links_epsg_code}
-        )
-    FROM {addr_schema_name}.{addr_table_name} AS t1, {addr_schema_name}.{addr_table_name} AS t2
+        ST_SetSRID(ST_MakeLine({from_point}, {to_point}), {links_epsg_code}),
+        ST_Distance({from_point}, {to_point}) < {max_distance}
+    FROM {addr_schema_name}.{addr_table_name} AS t1
+    JOIN {addr_schema_name}.{addr_table_name} AS t2 ON t1.{addr_simp_label_col} = t2.{addr_simp_label_col}
     WHERE
-    t1.{addr_simp_label_col} = t2.{addr_simp_label_col} AND
     t1.{addr_source_col} = '{source_from_name}' AND
-    t2.{addr_source_col} = '{source_to_name}'  ;
+    t2.{addr_source_col} = '{source_to_name}'
+    ORDER BY t1.{addr_id_col}, t2.{addr_id_col} ;
     """
+    
+    pm.execute_query(query)
+
 
-    query2 = f"""
-    UPDATE {links_schema_name}.{links_table_name}
-    SET {links_similar_geom_col} = (ST_Length(ST_Transform("{links_geom_col}", {links_epsg_code})) < {max_distance});
+def create_indexes_for_address_linking(pm, addr_schema_name, addr_table_name, addr_source_col, addr_simp_label_col):
     """
-    
-    pm.execute_query(query1)
-    pm.execute_query(query2)
+    Creates the index used to link addresses (if it does not exist): a btree index on (source, simplified label)
+    for the join of the addresses of two sources.
+    """
+
+    query = f"""
+    CREATE INDEX IF NOT EXISTS {addr_table_name}_{addr_source_col}_{addr_simp_label_col}_idx
+    ON {addr_schema_name}.{addr_table_name} ({addr_source_col}, {addr_simp_label_col});
+    ANALYZE {addr_schema_name}.{addr_table_name};
+    """
+
+    pm.execute_query(query)
 
 
 def get_successive_geom_links(
@@ -125,6 +149,7 @@ def get_successive_geom_links(
 
     pairs = list(itertools.combinations(source_names, 2))
 
+    # Pairs are processed one after the other: links of a pair depend on the links marked for the previous pairs
     for pair in pairs:
         source_from_name, source_to_name = pair[0], pair[1]
         get_successive_geom_links_from_table_pair(pm, schema_name, table_name, source_from_name, source_to_name, id_from_col, source_from_col, source_to_col, succesive_geom_col)
@@ -1,5 +1,3 @@
-import pandas as pd
-
 def extract_ground_truth_links(
         pm, 
         links_schema_name, links_table_name,
@@ -13,7 +11,7 @@ def extract_ground_truth_links(
         SELECT DISTINCT
             l.{links_source_from_col} AS {links_source_from_col},
             l.{links_source_to_col} AS {links_source_to_col},
-            l.{links_similar_geom_col} AS {links_similar_geom_col},
+            INITCAP(l.{links_similar_geom_col}::text) AS {links_similar_geom_col},
             a.{addr_simp_label_col} AS {addr_simp_label_col}
             FROM
             {links_schema_name}.{links_table_name} AS l,
@@ -21,16 +19,11 @@ def extract_ground_truth_links(
             WHERE
             l.{links_succesive_geom_col} AND
             l.{links_id_from_col} = a.{addr_id_col}
+            ORDER BY {links_source_from_col}, {links_source_to_col}, {addr_simp_label_col}, {links_similar_geom_col}
     """
 
-    rows = pm.fetch_all(query)
-    columns = [links_source_from_col, links_source_to_col, links_similar_geom_col, addr_simp_label_col]
-
-    # Mets les données dans un DataFrame
-    df = pd.DataFrame(rows, columns=columns)
-
-    # Exporte en CSV
-    df.to_csv(output_csv_path, index=False)
+    # Les lignes sont exportées en CSV par PostgreSQL (booléens écrits True/False, comme avec pandas)
+    pm.copy_to_csv(query, output_csv_path)
 
 def extract_streetnumbers_without_link(
         pm, 
@@ -47,14 +40,9 @@ def extract_streetnumbers_without_link(
         SELECT 1
         FROM {links_schema_name}.{links_table_name} l
         WHERE l.{links_id_from_col} = a.{addr_id_col} OR l.{links_id_to_col} = a.{addr_id_col}
-        );
+        )
+    ORDER BY {addr_source_col}, {addr_simp_label_col}
     """
 
-    rows = pm.fetch_all(query)
-    columns = [addr_source_col, addr_simp_label_col]
-
-    # Mets les données dans un DataFrame
-    df = pd.DataFrame(rows, columns=columns)
-
-    # Exporte en CSV
-    df.to_csv(output_csv_path, index=False)
\ No newline at end of file
+    # Les lignes sont exportées en CSV par PostgreSQL
+    pm.copy_to_csv(query, output_csv_path)
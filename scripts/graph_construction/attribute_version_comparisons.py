@@ -1,30 +1,41 @@
+import itertools
 from rdflib import URIRef, Graph, Literal
+from concurrent.futures import ProcessPoolExecutor
 from scripts.graph_construction.namespaces import NameSpaces
 from scripts.utils import geom_processing as gp
 from scripts.utils import str_processing as sp
+from scripts.utils.processed_values_cache import ProcessedValuesCache
 from scripts.graph_construction import graphdb as gd
 from scripts.graph_construction import graphrdf as gr
+from scripts.graph_construction import triple_sinks as ts
 
 np = NameSpaces()
 
-def compare_attribute_versions(graphdb_url:URIRef, repository_name:str, comp_named_graph_uri:URIRef, comp_tmp_file:str, comparison_settings:dict={}):
-    # Get versions which have to be compared
-    results = get_attribute_versions_to_compare(graphdb_url, repository_name)
-    bindings = results.get("results").get("bindings")
+def compare_attribute_versions(graphdb_url:URIRef, repository_name:str, comp_named_graph_uri:URIRef, comp_tmp_file:str, comparison_settings:dict={},
+                               source_named_graph_uris:list[URIRef]=None):
+    # Get versions which have to be compared (bindings are streamed, they are processed while being received)
+    bindings = get_attribute_versions_to_compare(graphdb_url, repository_name, source_named_graph_uris)
 
-    # Creation of a RDFLib graph (it will be exported as a TTL file at the end of the process)
-    g = get_processed_attribute_version_values(bindings, comparison_settings)
-    gr.add_namespaces_to_graph(g, np.namespaces_with_prefixes)
-    g.serialize(destination=comp_tmp_file)
+    # Comparisons of each chunk of bindings are written in the file (as N-Triples, which are valid Turtle) while bindings are received
+    with ts.NTriplesFileSink(comp_tmp_file) as sink:
+        get_processed_attribute_version_values(bindings, comparison_settings, sink)
     
-    # Import the TTL file in GraphDB
+    # Import the file in GraphDB
     gd.import_ttl_file_in_graphdb(graphdb_url, repository_name, comp_tmp_file, named_graph_uri=comp_named_graph_uri)
 
-def get_attribute_versions_to_compare(graphdb_url:URIRef, repository_name:str):
+def get_attribute_versions_to_compare(graphdb_url:URIRef, repository_name:str, source_named_graph_uris:list[URIRef]=None):
     """
     Get the attribute versions which have to be compared.
+    If `source_named_graph_uris` is given, only pairs including a version from one of these graphs are selected
+    (used to compare only versions of new sources during an incremental construction).
+    Returns an iterator over the bindings of the query result.
     """
 
+    source_filter = ""
+    if source_named_graph_uris is not None:
+        source_values = " ".join([uri.n3() for uri in source_named_graph_uris])
+        source_filter = f"VALUES ?g {{ {source_values} }} GRAPH ?g {{ ?lm1 a addr:Landmark . }}"
+
     query = np.query_prefixes  + f"""
         SELECT DISTINCT ?ltype ?attrType ?attrVers1 ?attrVers2 ?versVal1 ?versVal2 WHERE {{
             ?rootLm a addr:Landmark ; addr:hasTrace ?lm1, ?lm2.
@@ -33,6 +44,7 @@ def get_attribute_versions_to_compare(graphdb_url:URIRef, repository_name:str):
             ?attrVers1 addr:versionValue ?versVal1 .
             ?attrVers2 addr:versionValue ?versVal2 .
             FILTER(!sameTerm(?lm1, ?lm2))
+            {source_filter}
             MINUS {{
                 ?attrVers1 ?p ?attrVers2 .
                 FILTER(?p IN (addr:sameVersionValueAs, addr:differentVersionValueFrom))
@@ -40,42 +52,263 @@ def get_attribute_versions_to_compare(graphdb_url:URIRef, repository_name:str):
         }}
     """
 
-    results = gd.select_query_to_json(query, graphdb_url, repository_name)
+    bindings = gd.select_query_to_bindings(query, graphdb_url, repository_name)
 
-    return results
+    return bindings
 
-def get_processed_attribute_version_values(bindings:dict,  comparison_settings:dict={}):
+def get_processed_attribute_version_values(bindings,  comparison_settings:dict={}, g=None):
     """
-    Get the processed attribute version values (geometry or name) according the type of attribute version.
+    Compare the attribute versions of each binding and add comparison results (`sameVersionValueAs` or `differentVersionValueFrom`)
+    to `g` (a rdflib graph, created if None, or a triple sink of `triple_sinks`), which is returned.
+
+    Bindings are read by chunks of `comparison_chunk_size` pairs (times `comparison_workers`), whose results are added to `g`
+    before the next chunk is read, so that memory does not grow with the number of pairs. In each chunk, comparisons are batched:
+    * version values are deduplicated, each value is processed once whatever the number of pairs of the chunk it belongs to ;
+      values of recent chunks are kept in memory (at most `recent_values_size` values) and values of previous runs are read from
+      the on-disk cache if `processed_values_cache_file` is set ;
+    * geometries are processed all at once with vectorized functions (parsing, reprojection, buffer) ;
+    * pairs of geometries which can't be similar are set as different by a cheap prefilter (disjoint envelopes or distant points) ;
+    * other pairs of geometries are evaluated by chunks (`comparison_chunk_size`), across a process pool if `comparison_workers` is greater than 1.
     """
 
-    g = Graph()
+    if g is None:
+        g = Graph()
     
     # Dictionary which defines properties to used according comparison outputs.
     val_comp_dict = {True:np.ADDR["sameVersionValueAs"], False:np.ADDR["differentVersionValueFrom"], None:None}
 
-    # processed_values = {"http://rdf.geohistoricaldata.org/id/address/factoids/AV_ff60c9d04eb342499f45387e34f9d992": "rueausterlitz"}
-    processed_values = {}
-
     # Dictionary which defines properties to used according comparison outputs.
     crs_uri = comparison_settings.get("geom_crs_uri")
     epsg_code = gp.get_epsg_code_from_opengis_epsg_uri(crs_uri, True)
     geom_transformers = gp.get_useful_transformers_for_to_crs(epsg_code, ["EPSG:4326", "EPSG:3857", "EPSG:2154"])
     comparison_settings["geom_transformers"] = geom_transformers
 
-    for binding in bindings:
-        is_same_value, attr_vers_1, attr_vers_2, processed_vers_val_1, processed_vers_val_2 = are_two_attribute_versions_similar(binding, processed_values, comparison_settings)
-        processed_values[attr_vers_1] = processed_vers_val_1
-        processed_values[attr_vers_2] = processed_vers_val_2
-
-        # Get the property to be used to compare versions according the result of comparison
-        # Add the triple in the graph
-        comp_pred = val_comp_dict.get(is_same_value)
-        if comp_pred is not None:
-            g.add((attr_vers_1, comp_pred, attr_vers_2))
+    workers = int(comparison_settings.get("comparison_workers", 1))
+    chunk_size = int(comparison_settings.get("comparison_chunk_size", 10000)) * max(1, workers)
+    recent_values, cache_stats = {}, {}
+
+    # The cache and the process pool are shared by all chunks
+    cache_file = comparison_settings.get("processed_values_cache_file")
+    cache = ProcessedValuesCache(cache_file, crs_uri, comparison_settings.get("geom_buffer_radius")) if cache_file is not None else None
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        bindings = iter(bindings)
+        chunk = list(itertools.islice(bindings, chunk_size))
+        while len(chunk) > 0:
+            pairs, values = get_attribute_version_pairs_and_values(chunk)
+            processed_values = get_processed_attribute_version_value_list(values, comparison_settings, cache, recent_values, cache_stats)
+            similarities = get_attribute_version_pair_similarities(pairs, processed_values, comparison_settings, executor)
+
+            for (attr_vers_1, attr_vers_2, _, _, _, _), is_same_value in zip(pairs, similarities):
+                # Get the property to be used to compare versions according the result of comparison
+                # Add the triple in the graph
+                comp_pred = val_comp_dict.get(is_same_value)
+                if comp_pred is not None:
+                    g.add((attr_vers_1, comp_pred, attr_vers_2))
+
+            chunk = list(itertools.islice(bindings, chunk_size))
+    finally:
+        if cache is not None:
+            print(f"{cache_stats.get('found', 0)} processed values out of {cache_stats.get('searched', 0)} found in cache")
+            cache.close()
+        if executor is not None:
+            executor.shutdown()
     
     return g
 
+def get_attribute_version_pairs_and_values(bindings):
+    """
+    Get pairs of attribute versions to compare and the list of distinct values to process.
+    A value is described by (version value, attribute type, value kind) where value kind is the name type or the geometry type
+    (it depends on the landmark type). Each pair is (attr_vers_1, attr_vers_2, attr_type, value_kind, value_index_1, value_index_2).
+    """
+
+    pairs = []
+    value_indexes = {}
+
+    for binding in bindings:
+        lm_type = gr.convert_result_elem_to_rdflib_elem(binding.get('ltype'))
+        attr_type = gr.convert_result_elem_to_rdflib_elem(binding.get('attrType'))
+        attr_vers_1 = gr.convert_result_elem_to_rdflib_elem(binding.get('attrVers1'))
+        attr_vers_2 = gr.convert_result_elem_to_rdflib_elem(binding.get('attrVers2'))
+        vers_val_1 = gr.convert_result_elem_to_rdflib_elem(binding.get('versVal1'))
+        vers_val_2 = gr.convert_result_elem_to_rdflib_elem(binding.get('versVal2'))
+
+        value_kind = get_value_kind_according_attribute_type(attr_type, lm_type)
+        value_index_1 = value_indexes.setdefault((vers_val_1, attr_type, value_kind), len(value_indexes))
+        value_index_2 = value_indexes.setdefault((vers_val_2, attr_type, value_kind), len(value_indexes))
+        pairs.append((attr_vers_1, attr_vers_2, attr_type, value_kind, value_index_1, value_index_2))
+
+    values = list(value_indexes.keys())
+
+    return pairs, values
+
+def get_processed_attribute_version_value_list(values:list, comparison_settings:dict={}, cache:ProcessedValuesCache=None,
+                                               recent_values:dict=None, cache_stats:dict=None):
+    """
+    Process each value of `values` (see `get_attribute_version_pairs_and_values`).
+    Values found in `recent_values` (a dictionary {value: processed value} filled with the values of previous chunks, cleared when
+    it reaches `recent_values_size` values) are not processed again. If `cache` (an open `ProcessedValuesCache`) is given,
+    other values which have already been processed (in a previous run) are read from this on-disk cache and only the remaining
+    ones are processed (and then stored). `cache_stats` receives the number of values searched in and found in the cache.
+    """
+
+    processed_values, value_keys = [None] * len(values), {}
+    if recent_values is not None:
+        processed_values = [recent_values.get(value) for value in values]
+    missing_indexes = [i for i, processed_value in enumerate(processed_values) if processed_value is None]
+
+    if cache is not None and len(missing_indexes) > 0:
+        value_keys = [cache.get_value_key(vers_val, attr_type, value_kind, attr_type == np.ATYPE["Geometry"]) for vers_val, attr_type, value_kind in [values[i] for i in missing_indexes]]
+        cached_values = cache.get_processed_values(value_keys)
+        for i, value_key in zip(missing_indexes, value_keys):
+            processed_values[i] = cached_values.get(value_key)
+        if cache_stats is not None:
+            cache_stats["searched"] = cache_stats.get("searched", 0) + len(value_keys)
+            cache_stats["found"] = cache_stats.get("found", 0) + len(cached_values)
+
+        value_keys = dict(zip(missing_indexes, value_keys))
+        missing_indexes = [i for i in missing_indexes if processed_values[i] is None]
+
+    new_values = process_attribute_version_values([values[i] for i in missing_indexes], comparison_settings)
+    for i, processed_value in zip(missing_indexes, new_values):
+        processed_values[i] = processed_value
+
+    if cache is not None:
+        cache.set_processed_values([value_keys[i] for i in missing_indexes], new_values)
+
+    if recent_values is not None:
+        if len(recent_values) + len(values) > int(comparison_settings.get("recent_values_size", 100000)):
+            recent_values.clear()
+        recent_values.update(zip(values, processed_values))
+
+    return processed_values
+
+def process_attribute_version_values(values:list, comparison_settings:dict={}):
+    """
+    Process each value of `values` (see `get_attribute_version_pairs_and_values`).
+    Names and INSEE codes are processed one by one, geometries are processed together.
+    """
+
+    crs_uri = comparison_settings.get("geom_crs_uri")
+    buffer_radius = comparison_settings.get("geom_buffer_radius")
+    transformers = comparison_settings.get("geom_transformers")
+
+    processed_values = [None] * len(values)
+    geom_indexes, geom_wkts, geom_types, geom_srid_uris = [], [], [], []
+
+    for i, (vers_val, attr_type, value_kind) in enumerate(values):
+        if attr_type == np.ATYPE["Name"]:
+            _, processed_values[i] = sp.get_name_normaliser().normalize_and_simplify(vers_val.strip(), value_kind, vers_val.language)
+        elif attr_type == np.ATYPE["Geometry"]:
+            geom_wkt, geom_srid_uri = gp.get_wkt_geom_from_geosparql_wktliteral(vers_val.strip())
+            geom_indexes.append(i)
+            geom_wkts.append(geom_wkt)
+            geom_types.append(value_kind)
+            geom_srid_uris.append(geom_srid_uri)
+        elif attr_type == np.ATYPE["InseeCode"]:
+            processed_values[i] = vers_val.strip()
+
+    if len(geom_indexes) > 0:
+        geoms = gp.get_processed_geometries(geom_wkts, geom_types, geom_srid_uris, crs_uri, buffer_radius, transformers)
+        for i, geom in zip(geom_indexes, geoms):
+            processed_values[i] = geom
+
+    return processed_values
+
+def get_attribute_version_pair_similarities(pairs:list, processed_values:list, comparison_settings:dict={}, executor:ProcessPoolExecutor=None):
+    """
+    Returns a list which gives, for each pair, True if values are similar, False if they are not and None if they can't be compared.
+    Chunks of geometry pairs are evaluated across the process pool `executor` if it is given.
+    """
+
+    similarity_coef = comparison_settings.get("geom_similarity_coef")
+    max_distance_for_points = comparison_settings.get("geom_buffer_radius")
+    chunk_size = int(comparison_settings.get("comparison_chunk_size", 10000))
+
+    similarities = [None] * len(pairs)
+    geom_pair_indexes = {}
+
+    for i, (_, _, attr_type, value_kind, value_index_1, value_index_2) in enumerate(pairs):
+        if attr_type in [np.ATYPE["Name"], np.ATYPE["InseeCode"]]:
+            similarities[i] = are_similar_name_versions(processed_values[value_index_1], processed_values[value_index_2])
+        elif attr_type == np.ATYPE["Geometry"]:
+            geom_pair_indexes.setdefault(value_kind, []).append(i)
+
+    # Geometry pairs which can't be similar are pruned by a cheap prefilter, others are split in chunks (of same geometry type)
+    chunks = []
+    geom_pairs_number, pruned_pairs_number = 0, 0
+    for geom_type, pair_indexes in geom_pair_indexes.items():
+        geoms = get_geometries_to_compare(pair_indexes, pairs, processed_values, geom_type)
+        geom_pairs_number += len(pair_indexes)
+        pair_indexes, pruned_pair_indexes = prune_geometry_pairs(pair_indexes, pairs, geoms, geom_type, similarity_coef, max_distance_for_points)
+        pruned_pairs_number += len(pruned_pair_indexes)
+        for i in pruned_pair_indexes:
+            similarities[i] = False
+
+        for start in range(0, len(pair_indexes), chunk_size):
+            chunk_pair_indexes = pair_indexes[start:start+chunk_size]
+            geoms_1 = [geoms[pairs[i][4]] for i in chunk_pair_indexes]
+            geoms_2 = [geoms[pairs[i][5]] for i in chunk_pair_indexes]
+            chunks.append((chunk_pair_indexes, geoms_1, geoms_2, geom_type))
+
+    if geom_pairs_number > 0:
+        print(f"{pruned_pairs_number} pairs of geometries out of {geom_pairs_number} pruned by prefilter")
+
+    chunk_results = get_geometry_chunk_similarities(chunks, similarity_coef, max_distance_for_points, executor)
+    for (chunk_pair_indexes, _, _, _), chunk_similarities in zip(chunks, chunk_results):
+        for i, is_same_value in zip(chunk_pair_indexes, chunk_similarities):
+            similarities[i] = is_same_value
+
+    return similarities
+
+def get_geometries_to_compare(pair_indexes:list, pairs:list, processed_values:list, geom_type:str):
+    """
+    Returns a dictionary {value index: geometry} of geometries involved in pairs of `pair_indexes`.
+    Polygons are compared by their envelopes, so envelopes are computed once for each value (instead of once for each pair).
+    """
+
+    value_indexes = list({value_index for i in pair_indexes for value_index in pairs[i][4:6]})
+    geoms = [processed_values[value_index] for value_index in value_indexes]
+    if geom_type == "polygon":
+        geoms = gp.get_envelopes(geoms)
+
+    return dict(zip(value_indexes, geoms))
+
+def prune_geometry_pairs(pair_indexes:list, pairs:list, geoms:dict, geom_type:str, similarity_coef:float, max_distance_for_points:float):
+    """
+    Split `pair_indexes` in two lists: pairs which have to be compared and pairs which can't be similar (see `gp.get_possibly_similar_geometry_pairs`).
+    `geoms` is the dictionary returned by `get_geometries_to_compare`.
+    """
+
+    value_indexes = list(geoms.keys())
+    positions = {value_index:position for position, value_index in enumerate(value_indexes)}
+    index_pairs = [(positions[pairs[i][4]], positions[pairs[i][5]]) for i in pair_indexes]
+    are_candidates = gp.get_possibly_similar_geometry_pairs(list(geoms.values()), index_pairs, geom_type, similarity_coef, max_distance_for_points)
+
+    kept_pair_indexes = [i for i, is_candidate in zip(pair_indexes, are_candidates) if is_candidate]
+    pruned_pair_indexes = [i for i, is_candidate in zip(pair_indexes, are_candidates) if not is_candidate]
+
+    return kept_pair_indexes, pruned_pair_indexes
+
+def get_geometry_chunk_similarities(chunks:list, similarity_coef:float, max_distance_for_points:float, executor:ProcessPoolExecutor=None):
+    """
+    Evaluate chunks of geometry pairs. If `executor` is given, chunks are evaluated across this process pool.
+    Results are returned in the same order as `chunks`.
+    """
+
+    geoms_1_list = [chunk[1] for chunk in chunks]
+    geoms_2_list = [chunk[2] for chunk in chunks]
+    geom_types = [chunk[3] for chunk in chunks]
+    coefs = [similarity_coef] * len(chunks)
+    max_dists = [max_distance_for_points] * len(chunks)
+
+    if executor is not None and len(chunks) > 1:
+        return list(executor.map(gp.are_similar_geometry_arrays, geoms_1_list, geoms_2_list, geom_types, coefs, max_dists))
+
+    return list(map(gp.are_similar_geometry_arrays, geoms_1_list, geoms_2_list, geom_types, coefs, max_dists))
+
 def are_two_attribute_versions_similar(binding:dict, processed_values:dict, comparison_settings:dict={}):
     # Get URIs (attribute and attribute versions)
     lm_type = gr.convert_result_elem_to_rdflib_elem(binding.get('ltype'))
@@ -132,7 +365,7 @@ def get_processed_attribute_version_value(vers_val:Literal, attr_type:URIRef, lm
     
     if attr_type == np.ATYPE["Name"]:
         name_type = get_name_type_according_landmark_type(lm_type)
-        _, processed_value = sp.normalize_and_simplify_name_version(vers_val.strip(), name_type, name_lang=vers_val.language)
+        _, processed_value = sp.get_name_normaliser().normalize_and_simplify(vers_val.strip(), name_type, vers_val.language)
 
     elif attr_type == np.ATYPE["Geometry"]:
         # Get the suitable shape type of geometries (point, linestring, polygon) to compare them according landmark type
@@ -149,6 +382,17 @@ def get_processed_attribute_version_value(vers_val:Literal, attr_type:URIRef, lm
     return processed_value
 
 
+def get_value_kind_according_attribute_type(attr_type:URIRef, lm_type:URIRef):
+    """
+    According attribute type, return the name type (for names) or the geometry type (for geometries) used to process values.
+    """
+    if attr_type == np.ATYPE["Name"]:
+        return get_name_type_according_landmark_type(lm_type)
+    elif attr_type == np.ATYPE["Geometry"]:
+        return get_geom_type_according_landmark_type(lm_type)
+    else:
+        return None
+
 def get_name_type_according_landmark_type(rel_lm_type:URIRef):
     """
     According landmark type, return a value (housenumber, thoroughfare, area)
@@ -17,6 +17,35 @@ def create_state_description_for_ban(ban_file:str, valid_time:dict, source:dict,
     landmarks_desc = []
     relations_desc = []
     addresses_desc = []
+
+    content = fm.read_csv_file_as_dict(ban_file, id_col="id", delimiter=";", encoding='utf-8-sig')
+    for line_description in get_state_descriptions_from_ban_lines(content.values(), lang, ban_ns):
+        landmarks_desc += line_description["landmarks"]
+        relations_desc += line_description["relations"]
+        addresses_desc += line_description["addresses"]
+
+    description = {"landmarks":landmarks_desc, "relations":relations_desc, "addresses":addresses_desc}
+    if isinstance(valid_time, dict):
+        description["time"] = valid_time
+    if isinstance(source, dict):
+        description["source"] = source
+
+    return description
+
+def iter_state_descriptions_for_ban(ban_file:str, lang:str, ban_ns:Namespace):
+    """
+    Streaming version of `create_state_description_for_ban`: the BAN file is read lazily and a description
+    (landmarks, relations and addresses) is yielded for each line, so that the national BAN never has to be held in memory.
+    Unlike `create_state_description_for_ban`, lines are not deduplicated by their identifier.
+    """
+    lines = fm.iter_csv_file_rows_as_dict(ban_file, delimiter=";", encoding='utf-8-sig')
+    yield from get_state_descriptions_from_ban_lines(lines, lang, ban_ns)
+
+def get_state_descriptions_from_ban_lines(lines, lang:str, ban_ns:Namespace):
+    """
+    Yield a description {"landmarks":[...], "relations":[...], "addresses":[...]} for each line of `lines` (BAN lines as dictionaries).
+    Only thoroughfares, arrondissements and postal code areas are kept in memory, to describe each of them once.
+    """
     thoroughfares = {} # {"Rue Gérard":"12345678-1234-5678-1234-567812345678"}
     arrdts = {} # {"Paris 1er Arrondissement":"12345678-1234-5678-1234-567812345678"}
     cps = {} # {"75001":"12345678-1234-5678-1234-567812345678"}
@@ -27,8 +56,8 @@ def create_state_description_for_ban(ban_file:str, valid_time:dict, source:dict,
     cp_number_col = "code_postal"
     arrdt_name_col, arrdt_insee_col = "nom_commune", "code_insee"
 
-    content = fm.read_csv_file_as_dict(ban_file, id_col=sn_id_col, delimiter=";", encoding='utf-8-sig')
-    for value in content.values():
+    for value in lines:
+        landmarks_desc = []
         hn, th, arrdt, cp = create_landmarks_descriptions_from_ban_line(value, lang, ban_ns,
                                                                        sn_id_col, sn_number_col, sn_rep_col, sn_lon_col, sn_lat_col,
                                                                        th_name_col, th_fantoir_col, cp_number_col,
@@ -57,21 +86,13 @@ def create_state_description_for_ban(ban_file:str, valid_time:dict, source:dict,
 
         # Create landmark relation descriptions
         lr_descs, lr_uuids = create_landmark_relations_descriptions_from_ban_line(hn[1], th[1], arrdt[1], cp[1], provenance_uri)
-        relations_desc += lr_descs  
 
         # Create address description
         addr_label = f"{sn_label} {th_label}, {cp_label} {arrdt_label}"
         addr_prov_desc = {"uri":provenance_uri}
         addr_desc = create_address_description_from_ban_line(addr_label, lang, hn[1], lr_uuids, addr_prov_desc)
-        addresses_desc.append(addr_desc)      
 
-    description = {"landmarks":landmarks_desc, "relations":relations_desc, "addresses":addresses_desc}
-    if isinstance(valid_time, dict):
-        description["time"] = valid_time
-    if isinstance(source, dict):
-        description["source"] = source
-
-    return description
+        yield {"landmarks":landmarks_desc, "relations":lr_descs, "addresses":[addr_desc]}
 
 def create_address_description_from_ban_line(label:str, lang:str, target_uuid:str, segment_uuids:list[URIRef], lm_provenance:dict):
     addr_uuid = gr.generate_uuid()
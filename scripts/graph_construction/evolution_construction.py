@@ -127,8 +127,7 @@ def initialize_missing_changes_and_events_for_landmarks(graphdb_url, repository_
     """
 
     queries = [query1, query2, query3a, query3b]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 
     gd.remove_named_graph_from_uri(tmp_named_graph_uri)
@@ -136,14 +135,110 @@ def initialize_missing_changes_and_events_for_landmarks(graphdb_url, repository_
 
 #####################################################################################################################
 
+# Scope of an incremental construction: landmarks touched by new sources
+
+def get_scope_pattern(scope_named_graph_uri:URIRef, variable:str, elem_class:URIRef):
+    """
+    Returns a graph pattern which restricts `variable` to elements of the scope named graph (or an empty string if there is no scope).
+    """
+    if scope_named_graph_uri is None:
+        return ""
+    return f"GRAPH {scope_named_graph_uri.n3()} {{ {variable} a {elem_class.n3()} . }}"
+
+def set_scope_of_landmarks_touched_by_named_graphs(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef,
+                                                   source_named_graph_uris:list[URIRef], scope_named_graph_uri:URIRef):
+    """
+    Fill the scope named graph with root landmarks (and their root attributes) which have at least one trace in `source_named_graph_uris`.
+    """
+
+    source_values = " ".join([uri.n3() for uri in source_named_graph_uris])
+
+    query = np.query_prefixes + f"""
+    INSERT {{
+        GRAPH ?gs {{
+            ?rootLm a addr:Landmark .
+            ?rootAttr a addr:Attribute .
+        }}
+    }}
+    WHERE {{
+        BIND({facts_named_graph_uri.n3()} AS ?gf)
+        BIND({scope_named_graph_uri.n3()} AS ?gs)
+        VALUES ?g {{ {source_values} }}
+        GRAPH ?g {{ ?lm a addr:Landmark . }}
+        ?rootLm addr:hasTrace ?lm .
+        GRAPH ?gf {{ ?rootLm a addr:Landmark . }}
+        OPTIONAL {{
+            GRAPH ?gf {{ ?rootLm addr:hasAttribute ?rootAttr . }}
+        }}
+    }}
+    """
+
+    gd.update_query(query, graphdb_url, repository_name)
+
+def remove_evolution_of_scoped_landmarks(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef,
+                                         tmp_named_graph_uri:URIRef, scope_named_graph_uri:URIRef):
+    """
+    Before rebuilding the evolution of landmarks of the scope, remove the one built during previous constructions:
+    * times of appearance and disappearance events of scoped landmarks (they are computed again from all their traces) ;
+    * versions and changes of scoped attributes (and events of these changes).
+    """
+
+    query1 = np.query_prefixes + f"""
+    DELETE {{
+        GRAPH ?gf {{ ?event ?propTime ?time . }}
+    }}
+    WHERE {{
+        BIND({facts_named_graph_uri.n3()} AS ?gf)
+        GRAPH {scope_named_graph_uri.n3()} {{ ?lm a addr:Landmark . }}
+        GRAPH ?gf {{
+            ?change addr:appliedTo ?lm ; addr:dependsOn ?event .
+            ?event ?propTime ?time .
+        }}
+        FILTER(?propTime IN (addr:hasTime, addr:hasTimeBefore, addr:hasTimeAfter))
+    }}
+    """
+
+    query2 = np.query_prefixes + f"""
+    INSERT {{
+        GRAPH ?gt {{
+            ?elem addr:toRemove "true"^^xsd:boolean .
+        }}
+    }}
+    WHERE {{
+        BIND({facts_named_graph_uri.n3()} AS ?gf)
+        BIND({tmp_named_graph_uri.n3()} AS ?gt)
+        GRAPH {scope_named_graph_uri.n3()} {{ ?attr a addr:Attribute . }}
+        {{
+            GRAPH ?gf {{ ?attr addr:hasAttributeVersion ?elem . }}
+        }} UNION {{
+            GRAPH ?gf {{ ?elem addr:appliedTo ?attr . }}
+        }} UNION {{
+            GRAPH ?gf {{ ?change addr:appliedTo ?attr ; addr:dependsOn ?elem . }}
+        }}
+    }}
+    """
+
+    queries = [query1, query2]
+    gd.update_queries(queries, graphdb_url, repository_name)
+
+    msp.remove_all_triples_for_resources_to_remove(graphdb_url, repository_name)
+
+#####################################################################################################################
+
 # Construction of the evolution from states (versions) and events (changes)
 
-def create_changes_for_versions_with_valid_time(graphdb_url:URIRef, repository_name:str, tmp_named_graph_uri:URIRef):
+def create_changes_for_versions_with_valid_time(graphdb_url:URIRef, repository_name:str, tmp_named_graph_uri:URIRef, scope_named_graph_uri:URIRef=None):
     """
     We create two changes for attribute versions which have a valid time (start and end time) :
     AttributeVersion(v) ^ Landmark(lm) ^ hasTime(lm, t) ^ hasAttribute(lm, attr) ^ hasAttributeVersion(attr, v) => AttributeChange(cgME) ^ AttributeChange(cgO) ^ makesEffective(cgME, v) ^ outdates(cgO, v)
+    If `scope_named_graph_uri` is given, only attributes whose root is in this graph are processed.
     """
 
+    root_attr_scope = get_scope_pattern(scope_named_graph_uri, "?rootAttr", np.ADDR["Attribute"])
+    attr_scope = ""
+    if scope_named_graph_uri is not None:
+        attr_scope = "?rootAttr addr:hasTrace ?attr . " + root_attr_scope
+
     # Create triples for real attribute changes (changes according factoids) : < ?change addr:isRealChange "true"^^xsd:boolean>
     query1 = np.query_prefixes + f"""
     INSERT {{
@@ -154,6 +249,7 @@ def create_changes_for_versions_with_valid_time(graphdb_url:URIRef, repository_n
     WHERE {{
         BIND({tmp_named_graph_uri.n3()} AS ?gt)
         ?rootAttr a addr:Attribute ; addr:hasTrace ?attr .
+        {root_attr_scope}
         ?change addr:appliedTo ?attr .
     }}
     """
@@ -174,6 +270,7 @@ def create_changes_for_versions_with_valid_time(graphdb_url:URIRef, repository_n
                 VALUES (?changeProp ?propTime) {{ (addr:makesEffective addr:hasBeginning) (addr:outdates addr:hasEnd) }}
                 ?lm a addr:Landmark ; addr:hasTime [?propTime ?time] ; addr:hasAttribute ?attr .
                 ?attr addr:hasAttributeVersion ?vers .
+                {attr_scope}
                 FILTER NOT EXISTS {{ ?change ?changeProp ?vers }}
             }}
         }}
@@ -183,12 +280,12 @@ def create_changes_for_versions_with_valid_time(graphdb_url:URIRef, repository_n
     """
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 
-def get_elementary_changes(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, tmp_named_graph_uri:URIRef):
+def get_elementary_changes(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, tmp_named_graph_uri:URIRef, scope_named_graph_uri:URIRef=None):
     gregorian_calendar_uri = URIRef("http://www.wikidata.org/entity/Q1985727")
+    root_attr_scope = get_scope_pattern(scope_named_graph_uri, "?rootAttr", np.ADDR["Attribute"])
 
     # Four step to get elementary changes : 
     # 1. For each attribute, create as many TimeDescription object as there are temporal values related to it
@@ -208,6 +305,7 @@ def get_elementary_changes(graphdb_url:URIRef, repository_name:str, facts_named_
         BIND({facts_named_graph_uri.n3()} AS ?gf)
         BIND({gregorian_calendar_uri.n3()} AS ?timeCal)
         GRAPH ?gf {{ ?rootAttr a addr:Attribute . }}
+        {root_attr_scope}
         ?rootAttr addr:hasTrace ?attr .
         ?change a addr:AttributeChange ; addr:appliedTo ?attr ; addr:dependsOn [addr:hasTime ?time] .
         ?rootTime addr:hasTrace ?time ; addr:timeStamp ?timeStamp ; addr:timeCalendar ?timeCal .
@@ -290,8 +388,7 @@ def get_elementary_changes(graphdb_url:URIRef, repository_name:str, facts_named_
     """
 
     queries = [query1, query2, query3, query4]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
     
 def get_elementary_versions(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, tmp_named_graph_uri:URIRef):
     # Create versions between two successive changes (one makes effective the version while the other outdates it)
@@ -351,8 +448,7 @@ def get_elementary_versions(graphdb_url:URIRef, repository_name:str, facts_named
     """
 
     queries = [query1, query2, query3]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 def get_elementary_change_traces(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, tmp_named_graph_uri:URIRef):
     # Link existing attribute changes with created one when the are related
@@ -468,12 +564,12 @@ def get_elementary_version_traces(graphdb_url:URIRef, repository_name:str, facts
     """
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
-def get_elementary_versions_and_changes(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, tmp_named_graph_uri:URIRef):
-    create_changes_for_versions_with_valid_time(graphdb_url, repository_name, tmp_named_graph_uri)
-    get_elementary_changes(graphdb_url, repository_name, facts_named_graph_uri, tmp_named_graph_uri)
+def get_elementary_versions_and_changes(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, tmp_named_graph_uri:URIRef, scope_named_graph_uri:URIRef=None):
+    # Elements created in the temporary named graph only concern scoped attributes (if a scope is given), so next steps are scoped too
+    create_changes_for_versions_with_valid_time(graphdb_url, repository_name, tmp_named_graph_uri, scope_named_graph_uri)
+    get_elementary_changes(graphdb_url, repository_name, facts_named_graph_uri, tmp_named_graph_uri, scope_named_graph_uri)
     get_elementary_versions(graphdb_url, repository_name, facts_named_graph_uri, tmp_named_graph_uri)
     get_elementary_change_traces(graphdb_url, repository_name, facts_named_graph_uri, tmp_named_graph_uri)
     get_elementary_version_traces(graphdb_url, repository_name, facts_named_graph_uri, tmp_named_graph_uri)
@@ -568,8 +664,7 @@ def remove_empty_attribute_versions(graphdb_url:URIRef, repository_name:str, tmp
     """
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
     # Remove all triples where resources r for which it exists a triple <r addr:toRemove "true"^^xsd:boolean> is in these triples
     # In this case, remove selected versions and their related changes which are not traced
@@ -693,8 +788,7 @@ def to_be_merged_with(graphdb_url:URIRef, repository_name:str, facts_named_graph
 
     # # #############################################################################
 
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 
 def merge_attribute_versions_to_be_merged(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef, tmp_named_graph_uri:URIRef):
@@ -786,8 +880,7 @@ def merge_attribute_versions_to_be_merged(graphdb_url:URIRef, repository_name:st
         """
 
     queries = [query1, query2, query3]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 
 def merge_similar_successive_attribute_versions(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef, tmp_named_graph_uri:URIRef):
@@ -890,8 +983,7 @@ def create_events_and_times_from_attribute_changes(graphdb_url:URIRef, repositor
     """
 
     queries = [query1, query2, query3]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 def get_attribute_version_evolution_from_elementary_elements(graphdb_url:URIRef, repository_name:str,
                                                              facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef, tmp_named_graph_uri:URIRef):
@@ -4,6 +4,8 @@ from scripts.graph_construction import attribute_version_comparisons as avc
 from scripts.graph_construction import multi_sources_processing as msp
 from scripts.graph_construction import resource_rooting as rr
 from scripts.graph_construction import evolution_construction as ec
+from scripts.utils import query_profiler as qp
+from scripts.utils import label_dictionary as ld
 
 
 def build_fact_graph_from_sources(
@@ -19,7 +21,14 @@ def build_fact_graph_from_sources(
     comp_named_graph_name: str,
     comp_tmp_file: str,
     comparison_settings: dict,
-    lang: str = None
+    lang: str = None,
+    incremental: bool = False,
+    profiling_settings: dict = None,
+    rooting_engine: str = "sparql",
+    bulk_mode: bool = False,
+    label_dictionary_settings: dict = None,
+    transaction_stages: list = None,
+    label_workers: int = 1
 ):
     """
     Build a consolidated fact graph and reconstruct the temporal evolution of 
@@ -38,6 +47,11 @@ def build_fact_graph_from_sources(
     The resulting RDF graphs describe a consolidated fact graph and 
     temporally structured evolutions of entities inferred from multi-source data.
 
+    Integrated source graphs are marked with `addr:isIntegratedGraph` in the meta named graph.
+    In incremental mode, only active source graphs which have not been integrated yet are processed:
+    they are the only ones to be rooted and compared, and the evolution is rebuilt only for
+    landmarks which have traces in these new sources.
+
     Parameters
     ----------
     graphdb_url : URIRef
@@ -67,8 +81,37 @@ def build_fact_graph_from_sources(
         - "geom_similarity_coef": float, coefficient threshold for geometric similarity.
         - "geom_buffer_radius": float, buffer radius for geometric comparison.
         - "geom_crs_uri": URIRef, CRS URI for geometric operations.
+        - "comparison_workers": int, optional, number of processes used to compare geometries (default is 1).
+        - "comparison_chunk_size": int, optional, number of pairs of geometries compared at once (default is 10000), pairs being read
+          by chunks of `comparison_chunk_size * comparison_workers` bindings.
+        - "recent_values_size": int, optional, number of processed values of previous chunks kept in memory (default is 100000).
+        - "processed_values_cache_file": str, optional, SQLite file used to keep processed values between runs (no cache if not given).
     lang : str, optional
         Language code for labels (default is "fr" for French).
+    incremental : bool, optional
+        If True, only integrate new source graphs in an existing facts graph (default is False).
+    profiling_settings : dict, optional
+        If given, every query sent to GraphDB is profiled and a report is written at the end:
+        - "report_prefix": str, prefix of report files (`.json`, `.csv` and `.folded` for flame graphs).
+        - "count_statements": bool, optional, whether the delta of the number of statements is measured for each update (default is False).
+    rooting_engine : str, optional
+        How landmarks are rooted: "sparql" (INSERT queries run by GraphDB, default) or "python" (grouping made in Python
+        from a single SELECT query, created triples being imported at once).
+    bulk_mode : bool, optional
+        If True, inference is suspended during the stages which do not need intermediate inferences
+        (labels and comparisons) and the whole repository is reinferred at the end of each of them (default is False).
+        As two full reinferences can cost more than they save, it is ignored in incremental mode.
+        Stage times are written in the profiling report, which allows to compare runs with and without it.
+    label_dictionary_settings : dict, optional
+        If given, normalised and simplified labels are searched in a persistent label dictionary before being computed
+        (and computed ones are stored in it), and its hit rate is printed at the end:
+        - "dictionary_file": str, SQLite file of the label dictionary.
+        - "named_graph_name": str, optional, name of a named graph in which the dictionary is loaded at the end.
+    transaction_stages : list, optional
+        Names of the stages ("missing events", "elementary versions", "evolution"...) whose update queries are sent
+        in a single transaction (committed at the end, rolled back if a query fails). Other stages send one request per query.
+    label_workers : int, optional
+        Number of processes used to normalise labels when they are numerous (default is 1).
 
     Returns
     -------
@@ -76,6 +119,41 @@ def build_fact_graph_from_sources(
         The function creates and modifies RDF named graphs in the GraphDB repository.
     """
 
+    if profiling_settings is not None:
+        with qp.profiling(count_statements=profiling_settings.get("count_statements", False)) as profiler:
+            build_fact_graph_from_sources(
+                graphdb_url, repository_name, facts_named_graph_name, facts_named_graph_name_label,
+                meta_named_graph_name, inter_sources_named_graph_name, labels_named_graph_name, pref_hidden_labels_ttl_file,
+                tmp_named_graph_name, comp_named_graph_name, comp_tmp_file, comparison_settings,
+                lang=lang, incremental=incremental, rooting_engine=rooting_engine, bulk_mode=bulk_mode,
+                label_dictionary_settings=label_dictionary_settings, transaction_stages=transaction_stages,
+                label_workers=label_workers
+            )
+        qp.write_reports(profiler, profiling_settings.get("report_prefix", "query_profile"))
+        return None
+
+    if label_dictionary_settings is not None:
+        with ld.using_label_dictionary(label_dictionary_settings["dictionary_file"]) as label_dictionary:
+            build_fact_graph_from_sources(
+                graphdb_url, repository_name, facts_named_graph_name, facts_named_graph_name_label,
+                meta_named_graph_name, inter_sources_named_graph_name, labels_named_graph_name, pref_hidden_labels_ttl_file,
+                tmp_named_graph_name, comp_named_graph_name, comp_tmp_file, comparison_settings,
+                lang=lang, incremental=incremental, rooting_engine=rooting_engine, bulk_mode=bulk_mode,
+                transaction_stages=transaction_stages, label_workers=label_workers
+            )
+
+            dictionary_named_graph_name = label_dictionary_settings.get("named_graph_name")
+            if dictionary_named_graph_name is not None:
+                dictionary_named_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, dictionary_named_graph_name)
+                msp.import_label_dictionary_in_graphdb(graphdb_url, repository_name, label_dictionary, dictionary_named_graph_uri)
+        return None
+
+    # Full reinferences of bulk mode would defeat incremental runs
+    inference_suspended = bulk_mode and not incremental
+
+    # Update mode of each stage (None keeps the default mode of `gd.update_queries`)
+    get_update_mode = lambda stage: "transaction" if stage in (transaction_stages or []) else None
+
     # ------------------------------------------------------------------
     # Construct URIs for all named graphs
     # ------------------------------------------------------------------
@@ -85,6 +163,16 @@ def build_fact_graph_from_sources(
     labels_named_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, labels_named_graph_name)
     tmp_named_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, tmp_named_graph_name)
     comp_named_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, comp_named_graph_name)
+    scope_named_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, f"{tmp_named_graph_name}_scope") if incremental else None
+
+    # ------------------------------------------------------------------
+    # Sources to integrate (all active sources, or only new ones in incremental mode)
+    # ------------------------------------------------------------------
+    new_source_uris = msp.get_source_named_graphs(graphdb_url, repository_name, meta_named_graph_name, active=True, integrated=False if incremental else None)
+    integrated_source_uris = msp.get_source_named_graphs(graphdb_url, repository_name, meta_named_graph_name, active=True, integrated=True) if incremental else []
+    if incremental and len(new_source_uris) == 0:
+        print("No new source graph to integrate")
+        return None
 
     # ------------------------------------------------------------------
     # Add the facts named graph to the repository and associate meta info
@@ -101,74 +189,104 @@ def build_fact_graph_from_sources(
     # ------------------------------------------------------------------
     # 1. Enrich factoids with preferred and hidden labels
     # ------------------------------------------------------------------
-    msp.add_pref_and_hidden_labels_for_elements(
-        graphdb_url,
-        repository_name,
-        labels_named_graph_uri,
-        pref_hidden_labels_ttl_file
-    )
+    with qp.profile_stage("labels", inference_suspended=inference_suspended), \
+            gd.inference_suspended(graphdb_url, repository_name, active=inference_suspended), \
+            gd.using_update_queries_mode(get_update_mode("labels")):
+        msp.add_pref_and_hidden_labels_for_elements(
+            graphdb_url,
+            repository_name,
+            labels_named_graph_uri,
+            pref_hidden_labels_ttl_file,
+            workers=label_workers
+        )
 
     # ------------------------------------------------------------------
     # 2. Link factoids with facts across source graphs
     # ------------------------------------------------------------------
-    rr.link_factoids_with_facts(
-        graphdb_url,
-        repository_name,
-        facts_named_graph_uri,
-        inter_sources_named_graph_uri
-    )
+    # Rooting only concerns active sources: integrated sources are deactivated while new ones are rooted
+    with qp.profile_stage("rooting", rooting_engine=rooting_engine), gd.using_update_queries_mode(get_update_mode("rooting")):
+        msp.set_named_graph_uris_active(graphdb_url, repository_name, integrated_source_uris, meta_named_graph_name, active=False)
+        try:
+            rr.link_factoids_with_facts(
+                graphdb_url,
+                repository_name,
+                facts_named_graph_uri,
+                inter_sources_named_graph_uri,
+                rooting_engine=rooting_engine
+            )
+        finally:
+            msp.set_named_graph_uris_active(graphdb_url, repository_name, integrated_source_uris, meta_named_graph_name, active=True)
 
     # ------------------------------------------------------------------
     # 3. Compare attribute versions from different sources
     # ------------------------------------------------------------------
-    avc.compare_attribute_versions(
-        graphdb_url,
-        repository_name,
-        comp_named_graph_uri,
-        comp_tmp_file,
-        comparison_settings
-    )
+    with qp.profile_stage("comparisons", inference_suspended=inference_suspended), \
+            gd.inference_suspended(graphdb_url, repository_name, active=inference_suspended), \
+            gd.using_update_queries_mode(get_update_mode("comparisons")):
+        avc.compare_attribute_versions(
+            graphdb_url,
+            repository_name,
+            comp_named_graph_uri,
+            comp_tmp_file,
+            comparison_settings,
+            source_named_graph_uris=new_source_uris if incremental else None
+        )
+
+    # In incremental mode, the evolution of landmarks touched by new sources is removed to be rebuilt
+    if incremental:
+        with qp.profile_stage("scope removal"), gd.using_update_queries_mode(get_update_mode("scope removal")):
+            gd.remove_named_graph_from_uri(scope_named_graph_uri)
+            ec.set_scope_of_landmarks_touched_by_named_graphs(graphdb_url, repository_name, facts_named_graph_uri, new_source_uris, scope_named_graph_uri)
+            ec.remove_evolution_of_scoped_landmarks(graphdb_url, repository_name, facts_named_graph_uri, tmp_named_graph_uri, scope_named_graph_uri)
 
     # ------------------------------------------------------------------
     # 4. Initialize missing appearance and disappearance events for landmarks
     # ------------------------------------------------------------------
     # Appearance is assumed to occur before the earliest reference date.
     # Disappearance is assumed to occur after the latest reference date.
-    ec.initialize_missing_changes_and_events_for_landmarks(
-        graphdb_url,
-        repository_name,
-        facts_named_graph_uri,
-        inter_sources_named_graph_uri,
-        tmp_named_graph_uri
-    )
+    with qp.profile_stage("missing events"), gd.using_update_queries_mode(get_update_mode("missing events")):
+        ec.initialize_missing_changes_and_events_for_landmarks(
+            graphdb_url,
+            repository_name,
+            facts_named_graph_uri,
+            inter_sources_named_graph_uri,
+            tmp_named_graph_uri
+        )
 
     # ------------------------------------------------------------------
     # 5. Split overlapping versions into elementary versions and changes
     # ------------------------------------------------------------------
-    gd.remove_named_graph_from_uri(tmp_named_graph_uri)  # Clean temp graph before use
+    with qp.profile_stage("elementary versions"), gd.using_update_queries_mode(get_update_mode("elementary versions")):
+        gd.remove_named_graph_from_uri(tmp_named_graph_uri)  # Clean temp graph before use
 
-    ec.get_elementary_versions_and_changes(
-        graphdb_url,
-        repository_name,
-        facts_named_graph_uri,
-        tmp_named_graph_uri
-    )
+        ec.get_elementary_versions_and_changes(
+            graphdb_url,
+            repository_name,
+            facts_named_graph_uri,
+            tmp_named_graph_uri,
+            scope_named_graph_uri
+        )
 
     # ------------------------------------------------------------------
     # 6. Reconstruct coherent attribute version evolutions
     # ------------------------------------------------------------------
-    ec.get_attribute_version_evolution_from_elementary_elements(
-        graphdb_url,
-        repository_name,
-        facts_named_graph_uri,
-        inter_sources_named_graph_uri,
-        tmp_named_graph_uri
-    )
+    with qp.profile_stage("evolution"), gd.using_update_queries_mode(get_update_mode("evolution")):
+        ec.get_attribute_version_evolution_from_elementary_elements(
+            graphdb_url,
+            repository_name,
+            facts_named_graph_uri,
+            inter_sources_named_graph_uri,
+            tmp_named_graph_uri
+        )
 
     # ------------------------------------------------------------------
-    # 7. Cleanup temporary named graph
+    # 7. Cleanup temporary named graph and mark sources as integrated
     # ------------------------------------------------------------------
     gd.remove_named_graph_from_uri(tmp_named_graph_uri)
+    if incremental:
+        gd.remove_named_graph_from_uri(scope_named_graph_uri)
+
+    msp.set_named_graph_uris_integrated(graphdb_url, repository_name, new_source_uris, meta_named_graph_name, integrated=True)
 
 
 def build_fact_graph_excluding_named_graph_sources(
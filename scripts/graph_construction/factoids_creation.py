@@ -1,3 +1,6 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from rdflib import Graph, Literal, URIRef, Namespace
 from scripts.graph_construction.namespaces import NameSpaces
 from scripts.utils import file_management as fm
@@ -7,6 +10,7 @@ from scripts.graph_construction import graphdb as gd
 from scripts.graph_construction import resource_transfert as rt
 from scripts.resource_management import states_events_json as sej
 from scripts.graph_construction import create_factoids_descriptions as cfd
+from scripts.graph_construction import triple_sinks as ts
 
 
 np = NameSpaces()
@@ -196,6 +200,30 @@ def create_graph_from_paris_ban(ban_file:str, valid_time:dict, source:dict, lang
 
     return g
 
+def create_ntriples_file_from_paris_ban(ban_file:str, nt_file:str, valid_time:dict, source:dict, lang:str, batch_size:int=10000):
+    """
+    Creation of a N-Triples file from the BAN file, without holding the file nor the graph in memory (for large BAN files such as the national one).
+    Returns the number of written triples.
+    """
+
+    ban_ns = Namespace("https://adresse.data.gouv.fr/base-adresse-nationale/")
+
+    ban_descriptions = cfd.iter_state_descriptions_for_ban(ban_file, lang, ban_ns)
+    return sej.create_ntriples_file_from_state_descriptions(ban_descriptions, nt_file, valid_time, source, batch_size=batch_size)
+
+def import_paris_ban_in_graphdb(graphdb_url:URIRef, repository_name:str, factoids_named_graph_name:str, ban_file:str, valid_time:dict, source:dict, lang:str, batch_size:int=100000):
+    """
+    Import factoids of the BAN file in a named graph of the repository, triples being sent by batches while the file is read
+    (neither a rdflib graph nor a Turtle file are created). A batch rejected by the repository raises an `HTTPError`.
+    """
+
+    ban_ns = Namespace("https://adresse.data.gouv.fr/base-adresse-nationale/")
+    factoids_named_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, factoids_named_graph_name)
+
+    ban_descriptions = cfd.iter_state_descriptions_for_ban(ban_file, lang, ban_ns)
+    with ts.GraphDBSink(graphdb_url, repository_name, factoids_named_graph_uri, buffer_size=batch_size) as sink:
+        sej.add_state_descriptions_to_sink(ban_descriptions, sink, valid_time, source)
+
 ##################################################### OSM ##########################################################
 
 def create_graph_from_osm(osm_file:str, osm_hn_file:str, valid_time:dict, source:dict, lang:str):
@@ -260,3 +288,134 @@ def create_graph_from_geojson_states_of_streetnumbers(geojson_file:str, lang, va
     np.bind_namespaces(g)
 
     return g
+
+##################################################### Multiple sources ##########################################################
+
+def get_graph_creation_functions():
+    """
+    Returns the functions which create the graph of factoids of each type of source (key `type` of a source configuration)
+    """
+    return {
+        "ban": create_graph_from_paris_ban,
+        "osm": create_graph_from_osm,
+        "ville_paris": create_graph_from_ville_paris,
+        "wikidata": create_graph_from_wikidata,
+        "events": create_graph_from_events,
+        "states": create_graph_from_states,
+        "geojson_thoroughfares": create_graph_from_geojson_states_of_thoroughfares,
+        "geojson_streetnumbers": create_graph_from_geojson_states_of_streetnumbers,
+        "geojson_streetnumbers_from_addresses": create_graph_from_geojson_states_of_streetnumbers_from_addresses,
+    }
+
+def get_ntriples_file_creation_functions():
+    """
+    Returns the functions which directly write the factoids of a type of source in a N-Triples file (argument `nt_file`)
+    and return the number of triples, without creating a rdflib graph. They are used instead of `get_graph_creation_functions`.
+    """
+    return {
+        "ban": create_ntriples_file_from_paris_ban,
+    }
+
+def create_factoids_file_for_source(source_config:dict, out_folder:str):
+    """
+    Create the factoids of a source and write them in a N-Triples file (`{out_folder}/{name}.nt`).
+    Sources which can be streamed (see `get_ntriples_file_creation_functions`) are written while they are read,
+    the graph of the other ones is written through a triple sink.
+    Returns a report {"name", "file", "triples", "build_time"}.
+    """
+
+    source_type = source_config.get("type")
+    settings = source_config.get("settings", {})
+    create_ntriples_file = get_ntriples_file_creation_functions().get(source_type)
+    create_graph = get_graph_creation_functions().get(source_type)
+    if create_graph is None and create_ntriples_file is None:
+        raise ValueError(f"Unknown source type: {source_type} (expected one of {list(get_graph_creation_functions().keys())})")
+
+    start = time.perf_counter()
+    nt_file = os.path.join(out_folder, f"{source_config['name']}.nt")
+    if create_ntriples_file is not None:
+        triple_count = create_ntriples_file(nt_file=nt_file, **settings)
+    else:
+        g = create_graph(**settings)
+        with ts.NTriplesFileSink(nt_file) as sink:
+            for triple in g:
+                sink.add(triple)
+        triple_count = len(sink)
+
+    return {"name": source_config["name"], "file": nt_file, "triples": triple_count, "build_time": time.perf_counter() - start}
+
+def import_factoids_file_for_source(graphdb_url:URIRef, repository_name:str, source_report:dict, named_graph_name:str, meta_named_graph_name:str=None):
+    """
+    Import the file of a source (see `create_factoids_file_for_source`) in its named graph, which is registered in the meta named graph
+    only if all batches have been imported (so that a partly imported source is not considered as integrated by an incremental construction).
+    """
+    start = time.perf_counter()
+    failed_responses = gd.import_ntriples_file_in_graphdb_by_batches(graphdb_url, repository_name, source_report["file"], named_graph_name=named_graph_name, show_progress=False)
+    if len(failed_responses) > 0:
+        source_report["error"] = "import, named graph not registered"
+    elif meta_named_graph_name is not None:
+        msp.add_source_named_graph_to_repository(graphdb_url, repository_name, meta_named_graph_name, named_graph_name)
+
+    source_report["import_time"] = time.perf_counter() - start
+    source_report["failed_batches"] = len(failed_responses)
+    return source_report
+
+def create_factoids_for_sources(graphdb_url:URIRef, repository_name:str, source_configs:list[dict], out_folder:str,
+                                meta_named_graph_name:str=None, build_workers:int=None, import_workers:int=2):
+    """
+    Create factoids of independent sources in a process pool and import them in their named graphs.
+    Each source is imported as soon as its file is written, while other sources are still being built.
+    A source whose creation or import fails does not stop the other ones: its error is written in its report (key `error`).
+
+    Example of `source_configs`:
+    ```
+    source_configs = [
+        {
+            "name": "ban",
+            "type": "ban", # see `get_graph_creation_functions`
+            "named_graph_name": "ban", # optional, `name` by default
+            "settings": {"ban_file": "ban.csv", "valid_time": {...}, "source": {...}, "lang": "fr"} # arguments of the function
+        },
+        ...
+    ]
+    ```
+
+    Returns the list of reports of sources (build and import times, number of triples, error), which are also printed.
+    """
+
+    named_graph_names = {config["name"]: config.get("named_graph_name", config["name"]) for config in source_configs}
+    source_reports = []
+
+    with ProcessPoolExecutor(max_workers=build_workers) as build_executor, ThreadPoolExecutor(max_workers=import_workers) as import_executor:
+        build_futures = {build_executor.submit(create_factoids_file_for_source, config, out_folder): config["name"] for config in source_configs}
+        import_futures = {}
+        for future in as_completed(build_futures):
+            try:
+                source_report = future.result()
+            except Exception as e:
+                print(f"Factoids of {build_futures[future]} not created: {e}")
+                source_reports.append({"name": build_futures[future], "error": f"build: {e}"})
+                continue
+            print(f"Factoids of {source_report['name']} created ({source_report['triples']} triples, {source_report['build_time']:.2f} s)")
+            named_graph_name = named_graph_names[source_report["name"]]
+            import_future = import_executor.submit(import_factoids_file_for_source, graphdb_url, repository_name, source_report, named_graph_name, meta_named_graph_name)
+            import_futures[import_future] = source_report
+
+        for future in as_completed(import_futures):
+            try:
+                source_reports.append(future.result())
+            except Exception as e:
+                source_report = import_futures[future]
+                print(f"Factoids of {source_report['name']} not imported: {e}")
+                source_report["error"] = f"import: {e}"
+                source_reports.append(source_report)
+
+    print_source_reports(source_reports)
+    return source_reports
+
+def print_source_reports(source_reports:list[dict]):
+    print(f"{'source':<30}{'triples':>12}{'build (s)':>12}{'import (s)':>12}")
+    for report in sorted(source_reports, key=lambda x: x["name"]):
+        failed = f"  ({report['failed_batches']} failed batches)" if report.get("failed_batches") else ""
+        error = f"  (error during {report['error']})" if report.get("error") else ""
+        print(f"{report['name']:<30}{report.get('triples', 0):>12}{report.get('build_time', 0.0):>12.2f}{report.get('import_time', 0.0):>12.2f}{failed}{error}")
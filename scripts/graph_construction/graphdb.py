@@ -1,7 +1,117 @@
 from scripts.utils import file_management as fm
+from scripts.utils import query_profiler as qp
 from rdflib import Graph, Namespace, Literal, BNode, URIRef
 from rdflib.namespace import RDF
+import re
+import gzip
+import time
 import requests
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+## HTTP client shared by all calls to GraphDB
+
+class GraphDBClient:
+    def __init__(self, pool_connections:int=10, pool_maxsize:int=10, max_retries:int=3, backoff_factor:float=0.5,
+                 status_forcelist:tuple=(500, 502, 503, 504), connect_timeout:float=10, read_timeout:float=None):
+        """
+        Client which owns a pooled `requests.Session` so that successive calls to GraphDB reuse open (keep-alive) connections.
+
+        Args:
+            pool_connections (int, optional): Number of connection pools to cache (one pool per host).
+            pool_maxsize (int, optional): Maximum number of connections kept alive in a pool (useful when calls are made from several threads).
+            max_retries (int, optional): Number of retries for a call which fails because of a connection error (refused, timeout...),
+                or, for idempotent methods only (GET, PUT, DELETE...), because of a read error or a status code in `status_forcelist`.
+            backoff_factor (float, optional): Factor used to compute the sleep time between two retries (`backoff_factor * 2 ** (retry_number - 1)` seconds).
+            status_forcelist (tuple, optional): HTTP status codes for which a call is retried.
+            connect_timeout (float, optional): Default maximum time (in seconds) to establish a connection.
+            read_timeout (float, optional): Default maximum time (in seconds) to wait for the server response. None means no limit as some updates can last for a long time.
+        """
+
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Connection errors happen before the request is sent, so they are retried for every method.
+        # Read errors and statuses are only retried for idempotent methods (default `allowed_methods` of urllib3, without POST):
+        # a SPARQL update sent with POST may have been applied by the server (INSERT, STRUUID()...) and must not be sent twice.
+        retry = Retry(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                      backoff_factor=backoff_factor, status_forcelist=status_forcelist,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # A body sent from a generator can't be sent again once consumed: only calls which fail before sending it are retried
+        stream_retry = Retry(total=max_retries, connect=max_retries, read=0, status=0, other=0,
+                             backoff_factor=backoff_factor, allowed_methods=None, raise_on_status=False)
+        stream_adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=stream_retry)
+
+        self.stream_session = requests.Session()
+        self.stream_session.mount("http://", stream_adapter)
+        self.stream_session.mount("https://", stream_adapter)
+
+    def request(self, method:str, url:str, timeout=None, **kwargs):
+        """
+        Send an HTTP request through the pooled session.
+        `timeout` overrides the default timeout of the client for this call only.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return self.session.request(method, url, timeout=timeout, **kwargs)
+
+    def get(self, url:str, timeout=None, **kwargs):
+        return self.request("GET", url, timeout=timeout, **kwargs)
+
+    def post(self, url:str, timeout=None, **kwargs):
+        return self.request("POST", url, timeout=timeout, **kwargs)
+
+    def put(self, url:str, timeout=None, **kwargs):
+        return self.request("PUT", url, timeout=timeout, **kwargs)
+
+    def delete(self, url:str, timeout=None, **kwargs):
+        return self.request("DELETE", url, timeout=timeout, **kwargs)
+
+    def post_stream(self, url:str, data, timeout=None, **kwargs):
+        """
+        Send a POST request whose body is a generator of bytes (it is sent with chunked transfer encoding).
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return self.stream_session.post(url, data=data, timeout=timeout, **kwargs)
+
+    def close(self):
+        """Close all the connections of the sessions."""
+        self.session.close()
+        self.stream_session.close()
+
+_graphdb_client = None
+
+def get_graphdb_client() -> GraphDBClient:
+    """
+    Get the client used by all functions of this module (it is created with default settings at first call).
+    """
+    global _graphdb_client
+    if _graphdb_client is None:
+        _graphdb_client = GraphDBClient()
+    return _graphdb_client
+
+def set_graphdb_client(client:GraphDBClient):
+    """
+    Replace the client used by all functions of this module (to change pool size, retries or timeouts).
+    The previous client is closed.
+
+    Example usage:
+    ```python
+    set_graphdb_client(GraphDBClient(pool_maxsize=20, max_retries=5, read_timeout=3600))
+    ```
+    """
+    global _graphdb_client
+    if _graphdb_client is not None and _graphdb_client is not client:
+        _graphdb_client.close()
+    _graphdb_client = client
 
 
 ## Build uris from `graphdb_url` and `repository_name`
@@ -118,8 +228,9 @@ def create_repository(graphdb_url:URIRef, repository_name:str, repository_config
 
 def create_repository_from_config_file(graphdb_url:URIRef, local_config_file:str):
     url = get_rest_respositories_uri(graphdb_url)
-    files = {"config":open(local_config_file,'rb')}
-    r = requests.post(url, files=files)
+    with open(local_config_file, 'rb') as f:
+        files = {"config":f}
+        r = get_graphdb_client().post(url, files=files)
     return r
 
 def create_config_local_repository_file(config_repository_file:str, repository_name:str, ruleset_name:str="rdfsplus-optimized", disable_same_as:bool=True, check_for_inconsistencies:bool=False):
@@ -208,7 +319,7 @@ def clear_repository(graphdb_url:URIRef, repository_name:str):
     """
 
     url = get_repository_uri_statements_from_name(graphdb_url, repository_name)
-    r = requests.delete(url)
+    r = get_graphdb_client().delete(url)
     return r
 
 def remove_repository(graphdb_url:URIRef, repository_name:str):
@@ -224,7 +335,7 @@ def remove_repository(graphdb_url:URIRef, repository_name:str):
     """
 
     url = get_repository_uri_from_name(graphdb_url, repository_name)
-    r = requests.delete(url)
+    r = get_graphdb_client().delete(url)
     return r
 
 def reinitialize_repository(graphdb_url:URIRef, repository_name:str, repository_config_file:str,
@@ -272,7 +383,7 @@ def remove_named_graph(graphdb_url:URIRef, repository_name:str, named_graph_name
       status code and any relevant message.
     """
     url = get_named_graph_uri_from_name(graphdb_url, repository_name, named_graph_name).strip()
-    r = requests.delete(url)
+    r = get_graphdb_client().delete(url)
     return r
 
 def remove_named_graph_from_uri(named_graph_uri:URIRef):
@@ -286,7 +397,7 @@ def remove_named_graph_from_uri(named_graph_uri:URIRef):
     - Response object: The response returned by the HTTP DELETE request, which can contain 
       status code and any relevant message.
     """
-    r = requests.delete(named_graph_uri)
+    r = get_graphdb_client().delete(named_graph_uri)
     return r
 
 def remove_named_graphs(graphdb_url:URIRef, repository_name:str, named_graph_name_list:list[str]):
@@ -376,27 +487,33 @@ def remove_named_graphs_from_query(graphdb_url:URIRef, repository_name:str, name
 
 ## Select or extract data within graph
 
-def export_data_from_repository(graphdb_url:URIRef, repository_name:str, out_ttl_file:str, named_graph_name:str=None, named_graph_uri:URIRef=None):
+def export_data_from_repository(graphdb_url:URIRef, repository_name:str, out_ttl_file:str, named_graph_name:str=None, named_graph_uri:URIRef=None,
+                                rdf_format:str="turtle", compress:bool=False, chunk_size:int=1024*1024):
     """
-    Export data from a repository to a Turtle file.
+    Export data from a repository to a file (Turtle by default).
 
     Parameters:
     - graphdb_url (URIRef): The base URL of the GraphDB instance.
     - repository_name (str): The name of the repository from which to export the data.
-    - out_ttl_file (str): The path to the output Turtle file where the data will be saved.
+    - out_ttl_file (str): The path to the output file where the data will be saved.
     - named_graph_name (str, optional): The name of the named graph to export data from. Defaults to None.
     - named_graph_uri (URIRef, optional): The URI of the named graph to export data from. Defaults to None.
+    - rdf_format (str, optional): Format of the exported data, one of the keys of `get_rdf_format_mime_types()`
+      (`turtle`, `ntriples`, `nquads`, `trig`, `binary`). Defaults to "turtle".
+    - compress (bool, optional): Whether the output file is compressed with gzip. Defaults to False.
+    - chunk_size (int, optional): Size (in bytes) of the chunks written in the file.
 
     Returns:
-    - None: The function exports the data from the repository (or specified named graph) to the given Turtle file.
+    - None: The function exports the data from the repository (or specified named graph) to the given file.
     
     Notes:
     - Either `named_graph_name` or `named_graph_uri` should be provided to specify the named graph.
     - If neither is provided, data from the entire repository is exported.
+    - The response is streamed: chunks are written in the file as soon as they are received, so memory usage does not depend on the size of the export.
     """
 
     url = get_repository_uri_statements_from_name(graphdb_url, repository_name).strip()
-    headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded", accept="text/turtle")
+    headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded", accept=get_rdf_format_mime_type(rdf_format))
     params = {}
 
     if named_graph_uri is not None:
@@ -405,10 +522,10 @@ def export_data_from_repository(graphdb_url:URIRef, repository_name:str, out_ttl
         named_graph_uri = get_named_graph_uri_from_name(graphdb_url, repository_name, named_graph_name)
         params["context"] = named_graph_uri.n3()
 
-    r = requests.get(url, params=params, headers=headers)
-    fm.write_file(r.text, out_ttl_file)
+    with get_graphdb_client().get(url, params=params, headers=headers, stream=True) as r:
+        fm.write_file_from_chunks(r.iter_content(chunk_size=chunk_size), out_ttl_file, compress=compress)
 
-def select_query_to_txt_file(query:str, graphdb_url:URIRef, repository_name:str, res_query_file:str):
+def select_query_to_txt_file(query:str, graphdb_url:URIRef, repository_name:str, res_query_file:str, accept:str=None, chunk_size:int=1024*1024):
     """
     Execute a SELECT query on a repository and export the result to a text file.
 
@@ -417,16 +534,21 @@ def select_query_to_txt_file(query:str, graphdb_url:URIRef, repository_name:str,
     - graphdb_url (URIRef): The base URL of the GraphDB instance.
     - repository_name (str): The name of the repository to execute the query on.
     - res_query_file (str): The path to the text file where the query result will be saved.
+    - accept (str, optional): MIME type of the result (`text/csv`, `text/tab-separated-values`...). Defaults to None (format chosen by GraphDB).
+    - chunk_size (int, optional): Size (in bytes) of the chunks written in the file.
 
     Returns:
     - None: The function executes the query and exports the result to the specified text file.
+
+    Notes:
+    - The response is streamed to the file, it is never fully held in memory.
     """
 
     url = get_repository_uri_from_name(graphdb_url, repository_name).strip()
-    headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded")
+    headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded", accept=accept)
     data = {"query":query}
-    r = requests.post(url, data=data, headers=headers)
-    fm.write_file(r.text, res_query_file)
+    with get_graphdb_client().post(url, data=data, headers=headers, stream=True) as r:
+        fm.write_file_from_chunks(r.iter_content(chunk_size=chunk_size), res_query_file)
 
 def select_query_to_json(query:str, graphdb_url:URIRef, repository_name:str):
     """
@@ -447,7 +569,9 @@ def select_query_to_json(query:str, graphdb_url:URIRef, repository_name:str):
     url = get_repository_uri_from_name(graphdb_url, repository_name).strip()
     headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded", accept="application/json")
     data = {"query":query}
-    r = requests.post(url, data=data, headers=headers)
+    with qp.profile_query("select", query) as measure:
+        r = get_graphdb_client().post(url, data=data, headers=headers)
+        measure["response_size"] = len(r.content)
     
     if r.status_code == 400:
         print(r.content)
@@ -455,6 +579,65 @@ def select_query_to_json(query:str, graphdb_url:URIRef, repository_name:str):
     else:
         return r.json()
 
+def select_query_to_bindings(query:str, graphdb_url:URIRef, repository_name:str, timeout=None):
+    """
+    Execute a SELECT query on a repository and yield its bindings one at a time.
+
+    Parameters:
+    - query (str): The SPARQL SELECT query to execute.
+    - graphdb_url (URIRef): The base URL of the GraphDB instance.
+    - repository_name (str): The name of the repository to execute the query on.
+    - timeout (float or tuple, optional): Timeout of the call, the default one of the client is used if None.
+
+    Returns:
+    - generator: Bindings of the result, each of them being a dictionary with the same structure as the ones
+      of `select_query_to_json` (`{"var": {"type": "uri", "value": "http://..."}}`).
+
+    Notes:
+    - Results are requested as SPARQL TSV (`text/tab-separated-values`) and the response is read line by line,
+      so neither the raw body nor the whole parsed result is held in memory.
+    - Unbound variables are missing from the binding dictionary, as in JSON results.
+    - If the query fails, an error message will be printed and nothing is yielded.
+    - When queries are profiled, the time during which the generator is suspended (while the consumer processes bindings)
+      is not counted: only the time spent sending the query, reading and parsing the response is recorded.
+    """
+
+    url = get_repository_uri_from_name(graphdb_url, repository_name).strip()
+    headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded", accept="text/tab-separated-values")
+    data = {"query":query}
+
+    with qp.profile_query("select", query) as measure, get_graphdb_client().post(url, data=data, headers=headers, stream=True, timeout=timeout) as r:
+        if not r.ok:
+            print(r.content)
+            return
+
+        # TSV results are always encoded in UTF-8 and only "\n" separates lines ("\n" in values is escaped)
+        r.encoding = "utf-8"
+        lines = r.iter_lines(decode_unicode=True, delimiter="\n")
+        header = next(lines, None)
+        if header is None:
+            return
+        variables = [var.lstrip("?$") for var in header.rstrip("\r").split("\t")]
+
+        response_size = 0
+        measure["suspended_time"] = 0.0
+        for line in lines:
+            response_size += len(line) + 1
+            measure["response_size"] = response_size
+            line = line.rstrip("\r")
+            if line == "":
+                continue
+            binding = {}
+            for var, term in zip(variables, line.split("\t")):
+                result_elem = get_result_elem_from_tsv_term(term)
+                if result_elem is not None:
+                    binding[var] = result_elem
+            suspension_start = time.perf_counter()
+            try:
+                yield binding
+            finally:
+                measure["suspended_time"] += time.perf_counter() - suspension_start
+
 ## Update graph with query or ttl file
 
 def update_query(query:str, graphdb_url:URIRef, repository_name:str):
@@ -476,10 +659,100 @@ def update_query(query:str, graphdb_url:URIRef, repository_name:str):
     url = get_repository_uri_statements_from_name(graphdb_url, repository_name).strip()
     headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded")
     data = {"update":query}
-    r = requests.post(url, data=data, headers=headers)
+    get_statement_count = lambda: get_repository_size(graphdb_url, repository_name)
+    with qp.profile_query("update", query, get_statement_count) as measure:
+        r = get_graphdb_client().post(url, data=data, headers=headers)
+        measure["response_size"] = len(r.content)
     return r
 
-def import_ttl_file_in_graphdb(graphdb_url:URIRef, repository_name:str, ttl_file:str, named_graph_name:str=None, named_graph_uri:URIRef=None):
+def update_queries(queries:list[str], graphdb_url:URIRef, repository_name:str, mode:str=None):
+    """
+    Send several update queries (the ones of a pipeline stage) to a repository.
+
+    Parameters:
+    - queries (list[str]): The SPARQL update queries, executed in the given order.
+    - mode (str, optional): How queries are sent (the default mode of the module is used if None, see `set_update_queries_mode`):
+        * `separate` (default): one request (and one commit) per query, a failing query does not prevent the next ones from being run ;
+        * `joined`: queries are joined with `;` and sent in a single request ;
+        * `transaction`: queries are sent in a single transaction, committed once all of them succeeded (rolled back else).
+
+    Notes:
+    - In `joined` and `transaction` modes, an error is raised (`requests.HTTPError`) if a query fails, and no query of the stage is applied.
+    """
+
+    if mode is None:
+        mode = get_update_queries_mode()
+
+    if mode == "separate":
+        for query in queries:
+            update_query(query, graphdb_url, repository_name)
+    elif mode == "joined":
+        # Each query keeps its prologue (prefixes), which is allowed before each operation of a request
+        r = update_query(" ;\n".join(queries), graphdb_url, repository_name)
+        if not r.ok:
+            print(r.content)
+            r.raise_for_status()
+    elif mode == "transaction":
+        with transaction(graphdb_url, repository_name) as transaction_uri:
+            for query in queries:
+                transaction_update_query(query, transaction_uri)
+    else:
+        raise ValueError(f"Unknown update mode: {mode} (expected one of {UPDATE_QUERIES_MODES})")
+
+UPDATE_QUERIES_MODES = ["separate", "joined", "transaction"]
+_update_queries_mode = "separate"
+
+def get_update_queries_mode():
+    """
+    Get the default mode of `update_queries`.
+    """
+    return _update_queries_mode
+
+def set_update_queries_mode(mode:str):
+    """
+    Set the default mode of `update_queries` (`separate`, `joined` or `transaction`).
+    """
+    global _update_queries_mode
+    if mode not in UPDATE_QUERIES_MODES:
+        raise ValueError(f"Unknown update mode: {mode} (expected one of {UPDATE_QUERIES_MODES})")
+    _update_queries_mode = mode
+
+@contextmanager
+def using_update_queries_mode(mode:str=None):
+    """
+    Context manager which sets the default mode of `update_queries` inside the `with` block (to opt in a stage),
+    the previous mode being restored at the end. If `mode` is None, nothing is changed.
+
+    Example usage:
+    ```python
+    with using_update_queries_mode("transaction"):
+        ec.get_elementary_versions_and_changes(graphdb_url, repository_name, facts_named_graph_uri, tmp_named_graph_uri)
+    ```
+    """
+    if mode is None:
+        yield
+        return
+
+    previous_mode = get_update_queries_mode()
+    set_update_queries_mode(mode)
+    try:
+        yield
+    finally:
+        set_update_queries_mode(previous_mode)
+
+def get_repository_size(graphdb_url:URIRef, repository_name:str):
+    """
+    Returns the number of statements of a repository (None if the request fails).
+    """
+
+    url = get_repository_uri_from_name(graphdb_url, repository_name).strip() + "/size"
+    r = get_graphdb_client().get(url)
+    if not r.ok:
+        return None
+    return int(r.text)
+
+def import_ttl_file_in_graphdb(graphdb_url:URIRef, repository_name:str, ttl_file:str, named_graph_name:str=None, named_graph_uri:URIRef=None,
+                               compress:bool=False, chunk_size:int=1024*1024):
     """
     Import data from a Turtle file into a repository.
 
@@ -489,31 +762,194 @@ def import_ttl_file_in_graphdb(graphdb_url:URIRef, repository_name:str, ttl_file
     - ttl_file (str): The path to the Turtle file to be imported.
     - named_graph_name (str, optional): The name of the named graph to import data into. Defaults to None, which imports data into the default graph.
     - named_graph_uri (URIRef, optional): The URI of the named graph to import data into. Defaults to None.
+    - compress (bool, optional): Whether the body is compressed with gzip while it is sent (`Content-Encoding: gzip`). Defaults to False.
+    - chunk_size (int, optional): Size (in bytes) of the chunks read from the file when `compress` is True.
 
     Returns:
     - Response object: The response object returned by the requests.post call, which contains the status code and content of the request.
 
     Notes:
     - If neither `named_graph_name` nor `named_graph_uri` is provided, the data will be imported into the default named graph.
-    - The function reads the Turtle file and sends the data to the specified repository.
+    - The file is never read as a whole: the open file is given to the HTTP client which sends it by blocks.
+      With `compress`, compressed chunks are generated on the fly and sent with chunked transfer encoding.
     """
 
-    if named_graph_uri is not None:
-        urlref = named_graph_uri
-    elif named_graph_name is not None:
-        urlref = get_named_graph_uri_from_name(graphdb_url, repository_name, named_graph_name)
-    else:
-        urlref = get_repository_uri_statements_from_name(graphdb_url, repository_name)
-    
-    url = urlref.strip()
-    headers = get_http_headers_dictionary(content_type="application/x-turtle")
-        
-    with open(ttl_file, 'rb') as f:
-        data = f.read()
-    
-    r = requests.post(url, data=data, headers=headers)
+    url = get_import_uri(graphdb_url, repository_name, named_graph_name, named_graph_uri)
+    return import_rdf_file_in_graphdb(url, ttl_file, "application/x-turtle", compress, chunk_size)
+
+def import_rdf_data_in_graphdb(graphdb_url:URIRef, repository_name:str, data, rdf_format:str="turtle", named_graph_name:str=None, named_graph_uri:URIRef=None):
+    """
+    Import a RDF payload held in memory (str or bytes) into a repository.
+
+    Parameters:
+    - data (str or bytes): The serialized RDF data.
+    - rdf_format (str, optional): Format of the data (`turtle`, `ntriples`, `nquads`, `trig`...). Defaults to "turtle".
+      Quads formats (`nquads`, `trig`) keep their named graphs if neither `named_graph_name` nor `named_graph_uri` is given.
+    - Other parameters are the same as the ones of `import_ttl_file_in_graphdb`.
+
+    Returns:
+    - Response object: The response object returned by the requests.post call.
+    """
+
+    url = get_import_uri(graphdb_url, repository_name, named_graph_name, named_graph_uri)
+    headers = get_http_headers_dictionary(content_type=get_rdf_format_mime_type(rdf_format))
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    r = get_graphdb_client().post(url, data=data, headers=headers)
+    if not r.ok:
+        print(r.content)
+    return r
+
+def import_rdf_file_in_graphdb(url:str, rdf_file:str, content_type:str, compress:bool=False, chunk_size:int=1024*1024):
+    """
+    Send a RDF file to `url` (statements or named graph URI) without loading it in memory.
+    See `import_ttl_file_in_graphdb` for the parameters.
+    """
+
+    headers = get_http_headers_dictionary(content_type=content_type)
+
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        chunks = fm.get_gzip_compressed_chunks(fm.read_binary_file_by_chunks(rdf_file, chunk_size))
+        return get_graphdb_client().post_stream(url, data=chunks, headers=headers)
+
+    with open(rdf_file, 'rb') as f:
+        r = get_graphdb_client().post(url, data=f, headers=headers)
     return r
 
+def import_ntriples_file_in_graphdb_by_batches(graphdb_url:URIRef, repository_name:str, nt_file:str, named_graph_name:str=None, named_graph_uri:URIRef=None,
+                                               batch_size:int=100000, max_workers:int=4, compress:bool=False, show_progress:bool=True):
+    """
+    Import data from a N-Triples file into a repository by sending batches of `batch_size` statements.
+
+    Parameters:
+    - graphdb_url (URIRef): The base URL of the GraphDB instance.
+    - repository_name (str): The name of the repository to import data into.
+    - nt_file (str): The path to the N-Triples file to be imported (one statement per line).
+    - named_graph_name (str, optional): The name of the named graph to import data into. Defaults to None.
+    - named_graph_uri (URIRef, optional): The URI of the named graph to import data into. Defaults to None.
+    - batch_size (int, optional): Number of statements sent in each request. Defaults to 100000.
+    - max_workers (int, optional): Maximum number of batches sent at the same time. Defaults to 4.
+    - compress (bool, optional): Whether each batch is compressed with gzip (`Content-Encoding: gzip`). Defaults to False.
+    - show_progress (bool, optional): Whether the number of imported statements is printed after each batch. Defaults to True.
+
+    Returns:
+    - list: The response objects of the batches which failed (empty list if all batches were imported).
+
+    Notes:
+    - Only line-based formats can be split without being parsed, so the file must be in N-Triples and not in Turtle.
+    - At most `2 * max_workers` batches are held in memory at the same time.
+    - Each batch is imported in its own transaction: if a batch fails, the other ones are still imported.
+    - Blank nodes are scoped to a request, so a blank node whose statements are split over two batches becomes two blank nodes.
+    """
+
+    url = get_import_uri(graphdb_url, repository_name, named_graph_name, named_graph_uri)
+    headers = get_http_headers_dictionary(content_type="application/n-triples")
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    def send_batch(lines:list[str]):
+        data = "".join(lines).encode("utf-8")
+        if compress:
+            data = gzip.compress(data)
+        r = get_graphdb_client().post(url, data=data, headers=headers)
+        return r, len(lines)
+
+    failed_responses = []
+    imported_statements, imported_batches = 0, 0
+
+    def collect_result(future):
+        nonlocal imported_statements, imported_batches
+        r, statement_number = future.result()
+        if not r.ok:
+            print(r.content)
+            failed_responses.append(r)
+            return
+        imported_statements += statement_number
+        imported_batches += 1
+        if show_progress:
+            print(f"{imported_statements} statements imported ({imported_batches} batches)")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for lines in fm.read_file_by_line_batches(nt_file, batch_size):
+            # Wait for a batch to be sent before reading the next ones to keep memory bounded
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect_result(future)
+            pending.add(executor.submit(send_batch, lines))
+
+        for future in as_completed(pending):
+            collect_result(future)
+
+    return failed_responses
+
+## Transactions (RDF4J transactions endpoint)
+
+def begin_transaction(graphdb_url:URIRef, repository_name:str):
+    """
+    Start a transaction on a repository and return its URI (to be given to the other transaction functions).
+    """
+
+    url = get_repository_uri_from_name(graphdb_url, repository_name).strip() + "/transactions"
+    r = get_graphdb_client().post(url)
+    if not r.ok:
+        print(r.content)
+        r.raise_for_status()
+    return r.headers["Location"]
+
+def transaction_update_query(query:str, transaction_uri:str):
+    """
+    Execute an update query in a transaction. An error is raised (`requests.HTTPError`) if it fails.
+    """
+
+    headers = get_http_headers_dictionary(content_type="application/sparql-update")
+    with qp.profile_query("update", query) as measure:
+        r = get_graphdb_client().put(transaction_uri, params={"action":"UPDATE"}, data=query.encode("utf-8"), headers=headers)
+        measure["response_size"] = len(r.content)
+    if not r.ok:
+        print(r.content)
+        r.raise_for_status()
+    return r
+
+def commit_transaction(transaction_uri:str):
+    r = get_graphdb_client().put(transaction_uri, params={"action":"COMMIT"})
+    if not r.ok:
+        print(r.content)
+        r.raise_for_status()
+    return r
+
+def rollback_transaction(transaction_uri:str):
+    r = get_graphdb_client().delete(transaction_uri)
+    if not r.ok:
+        print(r.content)
+    return r
+
+@contextmanager
+def transaction(graphdb_url:URIRef, repository_name:str):
+    """
+    Context manager which yields the URI of a new transaction, committed at the end of the `with` block
+    or rolled back if an error occurs inside it.
+
+    Example usage:
+    ```python
+    with transaction(graphdb_url, repository_name) as transaction_uri:
+        transaction_update_query(query1, transaction_uri)
+        transaction_update_query(query2, transaction_uri)
+    ```
+    """
+
+    transaction_uri = begin_transaction(graphdb_url, repository_name)
+    try:
+        yield transaction_uri
+        commit_transaction(transaction_uri)
+    except BaseException:
+        rollback_transaction(transaction_uri)
+        raise
+
+
 ## Manage namespaces
 
 def get_repository_namespaces(graphdb_url:URIRef, repository_name:str):
@@ -533,7 +969,7 @@ def get_repository_namespaces(graphdb_url:URIRef, repository_name:str):
 
     url = get_repository_namespaces_uri_from_name(graphdb_url, repository_name).strip()
     headers = get_http_headers_dictionary(content_type="application/x-www-form-urlencoded", accept="application/json")
-    r = requests.get(url, headers=headers)
+    r = get_graphdb_client().get(url, headers=headers)
 
     namespaces = {}
     for elem in r.json().get("results").get("bindings"):
@@ -563,7 +999,7 @@ def add_prefix_to_repository(graphdb_url:URIRef, repository_name:str, namespace:
     url = get_repository_namespaces_uri_from_name(graphdb_url, repository_name).strip() + "/" + prefix
     headers = get_http_headers_dictionary(content_type="text/plain")
     data = namespace.strip()
-    r = requests.put(url, headers=headers, data=data)
+    r = get_graphdb_client().put(url, headers=headers, data=data)
     return r
 
 def add_named_graph_prefix_to_repository(graphdb_url:URIRef, repository_name:str, prefix:str):
@@ -662,6 +1098,39 @@ def turn_inference_on(graphdb_url:URIRef, repository_name:str):
 
     update_query(query, graphdb_url, repository_name)
 
+_inference_suspension_depth = 0
+
+@contextmanager
+def inference_suspended(graphdb_url:URIRef, repository_name:str, active:bool=True):
+    """
+    Context manager for a "bulk mode": inference is turned off while the updates of the `with` block are made,
+    then it is turned on again and the repository is reinferred once (even if an error occurs, so that it stays consistent).
+    It must only wrap steps which do not query statements inferred from their own updates.
+    Nested blocks are part of the outermost one. If `active` is False, nothing is done.
+
+    Example usage:
+    ```python
+    with inference_suspended(graphdb_url, repository_name):
+        import_ttl_file_in_graphdb(graphdb_url, repository_name, ttl_file, named_graph_name)
+    ```
+    """
+
+    global _inference_suspension_depth
+    if not active:
+        yield
+        return
+
+    if _inference_suspension_depth == 0:
+        turn_inference_off(graphdb_url, repository_name)
+    _inference_suspension_depth += 1
+    try:
+        yield
+    finally:
+        _inference_suspension_depth -= 1
+        if _inference_suspension_depth == 0:
+            turn_inference_on(graphdb_url, repository_name)
+            reinfer_repository(graphdb_url, repository_name)
+
 def add_ruleset_from_file(graphdb_url, repository_name, ruleset_file, ruleset_name):
     query  = f"""
     prefix sys: <http://www.ontotext.com/owlim/system#>
@@ -701,7 +1170,7 @@ def get_repository_existence(graphdb_url:URIRef, repository_name:str):
 
     url = get_rest_repository_uri_from_name(graphdb_url, repository_name)
     headers = get_http_headers_dictionary(content_type="application/x-turtle")
-    r = requests.get(url, headers=headers)
+    r = get_graphdb_client().get(url, headers=headers)
 
     if r.text == "":
         return False
@@ -709,6 +1178,94 @@ def get_repository_existence(graphdb_url:URIRef, repository_name:str):
         return True
     
 
+def get_result_elem_from_tsv_term(term:str):
+    """
+    Convert a term of a SPARQL TSV result (`<http://...>`, `"label"@fr`, `"1"^^<...#integer>`, `_:b0`, `12`...)
+    into a dictionary describing it as in SPARQL JSON results. Returns None for an unbound value.
+    """
+
+    if term == "":
+        return None
+
+    if term.startswith("<") and term.endswith(">"):
+        return {"type":"uri", "value":term[1:-1]}
+    elif term.startswith("_:"):
+        return {"type":"bnode", "value":term[2:]}
+    elif term.startswith('"'):
+        end_quote_index = term.rindex('"')
+        result_elem = {"type":"literal", "value":unescape_tsv_string(term[1:end_quote_index])}
+        suffix = term[end_quote_index+1:]
+        if suffix.startswith("@"):
+            result_elem["xml:lang"] = suffix[1:]
+        elif suffix.startswith("^^<"):
+            result_elem["datatype"] = suffix[3:-1]
+        return result_elem
+
+    # Abbreviated forms of numbers and booleans
+    xsd = "http://www.w3.org/2001/XMLSchema#"
+    if term in ["true", "false"]:
+        datatype = xsd + "boolean"
+    elif "e" in term or "E" in term:
+        datatype = xsd + "double"
+    elif "." in term:
+        datatype = xsd + "decimal"
+    else:
+        datatype = xsd + "integer"
+
+    return {"type":"literal", "value":term, "datatype":datatype}
+
+def unescape_tsv_string(value:str):
+    """
+    Replace escape sequences (`\\t`, `\\n`, `\\"`, `\\uXXXX`...) of a string of a SPARQL TSV result.
+    """
+
+    if "\\" not in value:
+        return value
+
+    escapes = {"t":"\t", "n":"\n", "r":"\r", "b":"\b", "f":"\f", '"':'"', "'":"'", "\\":"\\"}
+
+    def replace_escape(matchobj:re.Match):
+        escape = matchobj.group(0)
+        if escape[1] in ["u", "U"]:
+            return chr(int(escape[2:], 16))
+        return escapes.get(escape[1], escape)
+
+    return re.sub(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)', replace_escape, value)
+
+def get_import_uri(graphdb_url:URIRef, repository_name:str, named_graph_name:str=None, named_graph_uri:URIRef=None):
+    """
+    Get the URI where data has to be sent to be imported in a named graph (or in the repository if no named graph is given).
+    """
+
+    if named_graph_uri is not None:
+        urlref = named_graph_uri
+    elif named_graph_name is not None:
+        urlref = get_named_graph_uri_from_name(graphdb_url, repository_name, named_graph_name)
+    else:
+        urlref = get_repository_uri_statements_from_name(graphdb_url, repository_name)
+
+    return urlref.strip()
+
+def get_rdf_format_mime_types():
+    """
+    Returns a dictionary which gives the MIME type of each RDF format which can be exported from GraphDB
+    """
+    mime_types = {
+        "turtle":"text/turtle",
+        "ntriples":"application/n-triples",
+        "nquads":"application/n-quads",
+        "trig":"application/trig",
+        "binary":"application/x-binary-rdf",
+    }
+
+    return mime_types
+
+def get_rdf_format_mime_type(rdf_format:str):
+    mime_type = get_rdf_format_mime_types().get(rdf_format)
+    if mime_type is None:
+        raise ValueError(f"Unknown RDF format: {rdf_format} (expected one of {list(get_rdf_format_mime_types().keys())})")
+    return mime_type
+
 def get_http_headers_dictionary(content_type:str=None, accept:str=None):
     """
     Returns a dictionary which stores information about HTTP headers
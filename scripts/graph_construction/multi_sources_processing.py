@@ -5,6 +5,7 @@ from scripts.utils import str_processing as sp
 from scripts.graph_construction import graphdb as gd
 from scripts.graph_construction import graphrdf as gr
 from scripts.graph_construction import resource_rooting as rr
+from scripts.graph_construction import triple_sinks as ts
 import time
 import json
 
@@ -21,11 +22,12 @@ def get_elements_with_labels(graphdb_url:URIRef, repository_name:str, has_filter
     - has_filter_hidden_label (str): filter to avoid selecting elements which have already a hidden label
 
     Returns:
-    - list: A list of bindings (elements with labels and their types) from the query result. Each binding contains the element, label, and element type.
+    - generator: The bindings (elements with labels and their types) of the query result. Each binding contains the element, label, and element type.
 
     Description:
     This function executes a SPARQL query to retrieve elements of type `addr:AttributeVersion` or `addr:Landmark` from a specified named graph.
-    For each element, it retrieves its label and type (e.g., `addr:Landmark` type or `addr:AttributeVersion` type). The result is returned as a list of bindings.
+    For each element, it retrieves its label and type (e.g., `addr:Landmark` type or `addr:AttributeVersion` type). The bindings are streamed
+    from GraphDB, so they have to be consumed only once.
 
     Example usage:
     ```python
@@ -58,8 +60,7 @@ def get_elements_with_labels(graphdb_url:URIRef, repository_name:str, has_filter
         }}
         """
         
-    results = gd.select_query_to_json(query, graphdb_url, repository_name)
-    return results.get("results").get("bindings")
+    return gd.select_query_to_bindings(query, graphdb_url, repository_name)
 
 def get_pref_and_hidden_label_triples_for_element(element: URIRef, element_type: URIRef, label: Literal):
     """
@@ -88,8 +89,12 @@ def get_pref_and_hidden_label_triples_for_element(element: URIRef, element_type:
     triples = get_pref_and_hidden_label_triples_for_element(element, element_type, label)
     ```
     """
-    triples = []
+    lm_label_type = get_label_type_from_element_type(element_type)
+    normalized_name, simplified_name = sp.get_name_normaliser().normalize_and_simplify(label.strip(), lm_label_type, label.language)
 
+    return get_pref_and_hidden_label_triples_from_names(element, label, normalized_name, simplified_name)
+
+def get_label_type_from_element_type(element_type: URIRef):
     if element_type == np.LTYPE["Thoroughfare"]:
         lm_label_type = "thoroughfare"
     elif element_type in [np.LTYPE["Municipality"], np.LTYPE["District"]]:
@@ -99,7 +104,10 @@ def get_pref_and_hidden_label_triples_for_element(element: URIRef, element_type:
     else:
         lm_label_type = None
 
-    normalized_name, simplified_name = sp.normalize_and_simplify_name_version(label.strip(), lm_label_type, label.language)
+    return lm_label_type
+
+def get_pref_and_hidden_label_triples_from_names(element: URIRef, label: Literal, normalized_name: str, simplified_name: str):
+    triples = []
 
     if normalized_name is not None:
         normalized_name_lit = Literal(normalized_name, lang=label.language)
@@ -112,18 +120,21 @@ def get_pref_and_hidden_label_triples_for_element(element: URIRef, element_type:
 
     return triples
 
-def get_pref_and_hidden_label_triples_for_elements(elements: list):
+def get_pref_and_hidden_label_triples_for_elements(elements: list, workers: int = 1, batch_size: int = 100000, g=None):
     """
     Generates preferred and hidden label triples for a list of elements.
 
     Parameters:
-    - elements (list): A list of dictionaries, where each dictionary represents an element containing the following keys:
+    - elements (iterable): Dictionaries (a list or a stream of bindings), where each dictionary represents an element containing the following keys:
         - 'elem': The element URI.
         - 'elemType': The type of the element according landmark type it is related to (e.g., Housenumber, Thoroughfare, City...).
         - 'label': The label associated with the element.
+    - workers (int, optional): Number of processes used to normalise labels when they are numerous (default is 1).
+    - batch_size (int, optional): Number of elements normalised at once: a stream of bindings is read by batches, so that it is never held in memory.
+    - g (optional): Graph or triple sink (`scripts.graph_construction.triple_sinks`) to which triples are added (a new graph if None).
 
     Returns:
-    - list: A list of triples representing the preferred and hidden labels for the elements. Each triple is a tuple of (subject, predicate, object),
+    - Graph (or the given sink): The triples representing the preferred and hidden labels for the elements. Each triple is a tuple of (subject, predicate, object),
             where the subject is the element URI, the predicate is either `SKOS.prefLabel` or `SKOS.hiddenLabel`, and the object is the label.
 
     Description:
@@ -143,22 +154,36 @@ def get_pref_and_hidden_label_triples_for_elements(elements: list):
     ```
     """
 
-    g = Graph()
+    if g is None:
+        g = Graph()
 
+    elems, labels, name_versions = [], [], []
     for element in elements:
         # Retrieval of URIs (attribute and attribute version) and geometry
         elem = gr.convert_result_elem_to_rdflib_elem(element.get('elem'))
         elem_type = gr.convert_result_elem_to_rdflib_elem(element.get('elemType'))
         label = gr.convert_result_elem_to_rdflib_elem(element.get('label'))
+        elems.append(elem)
+        labels.append(label)
+        name_versions.append((label.strip(), get_label_type_from_element_type(elem_type), label.language))
+        if len(elems) >= batch_size:
+            add_pref_and_hidden_label_triples_for_names(g, elems, labels, name_versions, workers)
+            elems, labels, name_versions = [], [], []
 
-        triples_to_add = get_pref_and_hidden_label_triples_for_element(elem, elem_type, label)
-        for triple in triples_to_add:
-            g.add(triple)
+    add_pref_and_hidden_label_triples_for_names(g, elems, labels, name_versions, workers)
 
     return g
 
+def add_pref_and_hidden_label_triples_for_names(g, elems: list, labels: list, name_versions: list, workers: int = 1):
+    # Labels of a batch are normalised all at once (each distinct label only once)
+    names = sp.get_name_normaliser().normalize_and_simplify_list(name_versions, workers=workers)
+    for elem, label, (normalized_name, simplified_name) in zip(elems, labels, names):
+        triples_to_add = get_pref_and_hidden_label_triples_from_names(elem, label, normalized_name, simplified_name)
+        for triple in triples_to_add:
+            g.add(triple)
+
 
-def add_pref_and_hidden_labels_for_elements(graphdb_url:URIRef, repository_name:str, labels_named_graph_uri:URIRef, pref_hidden_labels_ttl_file:str):
+def add_pref_and_hidden_labels_for_elements(graphdb_url:URIRef, repository_name:str, labels_named_graph_uri:URIRef, pref_hidden_labels_ttl_file:str, workers:int=1):
     """
     Adds preferred and hidden labels for the elements (name attribute versions and landmark) to a specified repository in GraphDB.
 
@@ -166,6 +191,7 @@ def add_pref_and_hidden_labels_for_elements(graphdb_url:URIRef, repository_name:
     - graphdb_url (URIRef): The URL of the GraphDB instance that holds the repository where the labels will be added.
     - repository_name (str): The name of the repository where the labels will be inserted.
     - labels_named_graph_uri (URIRef): The URI of the named graph containing the factoids from which the labels are generated.
+    - workers (int, optional): Number of processes used to normalise labels when they are numerous (default is 1).
 
     Returns:
     - None: The function does not return any value. It performs an update on the GraphDB repository by adding the triples.
@@ -185,14 +211,24 @@ def add_pref_and_hidden_labels_for_elements(graphdb_url:URIRef, repository_name:
     ```
     """
 
+    # Triples are written as N-Triples (which is valid Turtle) while bindings are streamed, without building a graph
     elements = get_elements_with_labels(graphdb_url, repository_name, has_filter_hidden_label=True)
-    graph_with_triples_to_add = get_pref_and_hidden_label_triples_for_elements(elements)
-    graph_with_triples_to_add.serialize(pref_hidden_labels_ttl_file)
+    with ts.NTriplesFileSink(pref_hidden_labels_ttl_file) as sink:
+        get_pref_and_hidden_label_triples_for_elements(elements, workers=workers, g=sink)
 
     # Import the `kg_file` file into the directory
     gd.import_ttl_file_in_graphdb(graphdb_url, repository_name, pref_hidden_labels_ttl_file, named_graph_uri=labels_named_graph_uri)
     
 
+def import_label_dictionary_in_graphdb(graphdb_url:URIRef, repository_name:str, label_dictionary, named_graph_uri:URIRef):
+    """
+    Imports the entries of a label dictionary (`scripts.utils.label_dictionary.LabelDictionary`) in a named graph,
+    so that normalised and simplified labels can be looked up with SPARQL queries.
+    """
+
+    g = label_dictionary.get_graph()
+    gd.import_rdf_data_in_graphdb(graphdb_url, repository_name, g.serialize(format="turtle"), named_graph_uri=named_graph_uri)
+
 def remove_all_triples_for_resources_to_remove(graphdb_url:URIRef, repository_name:str):
     """
     Removes all triples associated with resources marked for removal from the specified GraphDB repository.
@@ -555,6 +591,115 @@ def set_named_graph_active(
     gd.update_query(query, graphdb_url, repository_name)
 
 
+def set_named_graph_uris_integrated(
+    graphdb_url: URIRef,
+    repository_name: str,
+    named_graph_uris: list[URIRef],
+    meta_named_graph_name: str,
+    integrated: bool=True,
+):
+    """
+    Set whether source graphs have already been integrated in the facts graph (`addr:isIntegratedGraph`).
+    This status is used by the incremental construction of the facts graph to only process new sources.
+    """
+
+    set_named_graph_uris_boolean_property(graphdb_url, repository_name, named_graph_uris, meta_named_graph_name, np.ADDR["isIntegratedGraph"], integrated)
+
+def set_named_graph_uris_active(
+    graphdb_url: URIRef,
+    repository_name: str,
+    named_graph_uris: list[URIRef],
+    meta_named_graph_name: str,
+    active: bool=True,
+):
+    """
+    Same as `set_named_graph_active` for several graphs given by their URIs.
+    """
+
+    set_named_graph_uris_boolean_property(graphdb_url, repository_name, named_graph_uris, meta_named_graph_name, np.ADDR["isActiveGraph"], active)
+
+def set_named_graph_uris_boolean_property(
+    graphdb_url: URIRef,
+    repository_name: str,
+    named_graph_uris: list[URIRef],
+    meta_named_graph_name: str,
+    boolean_property: URIRef,
+    value: bool,
+):
+    """
+    Set the value of a boolean property (`addr:isActiveGraph`, `addr:isIntegratedGraph`...) for graphs described in the meta graph.
+    """
+
+    if len(named_graph_uris) == 0:
+        return None
+
+    meta_name_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, meta_named_graph_name)
+    new_value = gr.get_boolean_literal(value)
+    named_graph_values = " ".join([named_graph_uri.n3() for named_graph_uri in named_graph_uris])
+
+    query = np.query_prefixes + f"""
+    DELETE {{
+        GRAPH ?g {{
+            ?gs {boolean_property.n3()} ?oldValue .
+        }}
+    }}
+    INSERT {{
+        GRAPH ?g {{
+            ?gs {boolean_property.n3()} {new_value.n3()} .
+        }}
+    }}
+    WHERE {{
+        BIND({meta_name_graph_uri.n3()} AS ?g)
+        VALUES ?gs {{ {named_graph_values} }}
+        GRAPH ?g {{
+            ?gs a ?gsClass .
+            OPTIONAL {{ ?gs {boolean_property.n3()} ?oldValue . }}
+        }}
+        ?gsClass rdfs:subClassOf* addr:Graph .
+    }}
+    """
+
+    gd.update_query(query, graphdb_url, repository_name)
+
+def get_source_named_graphs(
+    graphdb_url: URIRef,
+    repository_name: str,
+    meta_named_graph_name: str,
+    active: bool=None,
+    integrated: bool=None,
+):
+    """
+    Get the URIs of source graphs described in the meta graph.
+    `active` and `integrated` filter graphs according their status (no filter if None).
+    A graph without `addr:isIntegratedGraph` is considered as not integrated.
+    """
+
+    meta_name_graph_uri = gd.get_named_graph_uri_from_name(graphdb_url, repository_name, meta_named_graph_name)
+    true_value = gr.get_boolean_literal(True)
+
+    filters = []
+    for boolean_property, value in [(np.ADDR["isActiveGraph"], active), (np.ADDR["isIntegratedGraph"], integrated)]:
+        if value is None:
+            continue
+        pattern = f"GRAPH ?g {{ ?gs {boolean_property.n3()} {true_value.n3()} . }}"
+        filters.append(pattern if value else f"FILTER NOT EXISTS {{ {pattern} }}")
+    filters_str = "\n            ".join(filters)
+
+    query = np.query_prefixes + f"""
+        SELECT DISTINCT ?gs WHERE {{
+            BIND({meta_name_graph_uri.n3()} AS ?g)
+            GRAPH ?g {{ ?gs a ?gsClass . }}
+            ?gsClass rdfs:subClassOf* addr:SourceGraph .
+            {filters_str}
+        }}
+    """
+
+    bindings = gd.select_query_to_bindings(query, graphdb_url, repository_name)
+    named_graph_uris = [gr.convert_result_elem_to_rdflib_elem(binding.get("gs")) for binding in bindings]
+
+    return named_graph_uris
+
+
 def remove_construction_named_graphs(graphdb_url, repository_name):
     """
     Remove all named graphs of type addr:ConstructionGraph from a GraphDB repository.
@@ -618,9 +763,8 @@ def remove_construction_named_graphs(graphdb_url, repository_name):
 
     queries = [query1, query2]
 
-    for query in queries:
-        # Execute the SPARQL UPDATE query on the target repository
-        gd.update_query(query, graphdb_url, repository_name)
+    # Execute the SPARQL UPDATE queries on the target repository
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 
 ######################################################### Test functions ######################################################
@@ -708,7 +852,7 @@ def get_pref_and_hidden_label_for_landmark(type: URIRef, label: Literal):
     if isinstance(label, Literal):
         label_value = label.strip()
         label_lang = label.language
-    normalized_name, simplified_name = sp.normalize_and_simplify_name_version(label_value, lm_label_type, label_lang)
+    normalized_name, simplified_name = sp.get_name_normaliser().normalize_and_simplify(label_value, lm_label_type, label_lang)
 
     return normalized_name, simplified_name
 
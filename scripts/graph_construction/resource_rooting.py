@@ -1,6 +1,7 @@
-from rdflib import URIRef
+from rdflib import URIRef, Dataset
 from scripts.graph_construction.namespaces import NameSpaces
 from scripts.graph_construction import graphdb as gd
+from scripts.graph_construction import graphrdf as gr
 
 
 np = NameSpaces()
@@ -10,18 +11,21 @@ np = NameSpaces()
 # Function to rely all resources from `factoids_named_graph_uri` named graph to similar resources in `facts_named_graph_uri` (if they exists, else create the similar resource)
 # Triple to tell similarity is store in `inter_sources_name_graph_uri`
 
-def link_factoids_with_facts(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
+def link_factoids_with_facts(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef,
+                             rooting_engine:str="sparql"):
     """
     Landmarks are created as follows:
         * creation of links (using `addr:hasRoot`) between landmarks in the facts named graph and those which are in the factoid named graph ;
         * using inference rules, new `addr:hasRoot` links are deduced
         * for each resource defined in the factoids, we check whether it exists in the fact graph (if it is linked with a `addr:hasRoot` to a resource in the fact graph)
         * for unlinked factoid resources, we create its equivalent in the fact graph
+
+    `rooting_engine` is the way landmarks are rooted: with `INSERT` queries (`sparql`) or in Python (`python`).
     """
 
     label_property = np.SKOS.hiddenLabel
 
-    make_rooting_for_landmarks(graphdb_url, repository_name, label_property, facts_named_graph_uri, inter_sources_name_graph_uri)
+    make_rooting_for_landmarks(graphdb_url, repository_name, label_property, facts_named_graph_uri, inter_sources_name_graph_uri, rooting_engine)
     make_rooting_for_landmark_relations(graphdb_url, repository_name, label_property, facts_named_graph_uri, inter_sources_name_graph_uri)
     make_rooting_for_landmark_attributes(graphdb_url, repository_name, facts_named_graph_uri, inter_sources_name_graph_uri)
     make_rooting_for_temporal_entities(graphdb_url, repository_name, facts_named_graph_uri, inter_sources_name_graph_uri)
@@ -47,21 +51,32 @@ Roots apply to Landmark, LandmarkRelation, Attribute, AttributeVersion, Event, C
 # The way the rooting is made depends on the type of landmark
 
 def make_rooting_for_landmarks(graphdb_url:URIRef, repository_name:str, label_property:URIRef,
-                               facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
+                               facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef, rooting_engine:str="sparql"):
     """
     Create `addr:hasRoot` links between similar landmarks.
+    With the `python` engine, each kind of rooting (label, label and relation) is made with a single SELECT query and a single import.
     """
 
     landmark_type_uris = [np.LTYPE["Municipality"], np.LTYPE["District"], np.LTYPE["PostalCodeArea"], np.LTYPE["Thoroughfare"]]
-    for landmark_type_uri in landmark_type_uris:
-        make_rooting_for_landmarks_according_label(graphdb_url, repository_name, landmark_type_uri, label_property,
-                                                   facts_named_graph_uri, inter_sources_name_graph_uri)
-        
     lm_and_lr_type_uris = [
         [np.LTYPE["HouseNumber"], np.LRTYPE["Belongs"]],
         [np.LTYPE["DistrictNumber"], np.LRTYPE["Belongs"]],
         [np.LTYPE["StreetNumber"], np.LRTYPE["Belongs"]],
     ]
+
+    if rooting_engine == "python":
+        make_rooting_for_landmarks_according_label_in_python(graphdb_url, repository_name, landmark_type_uris, label_property,
+                                                             facts_named_graph_uri, inter_sources_name_graph_uri)
+        make_rooting_for_landmarks_according_label_and_relation_in_python(graphdb_url, repository_name, lm_and_lr_type_uris, label_property,
+                                                                          facts_named_graph_uri, inter_sources_name_graph_uri)
+        return None
+    elif rooting_engine != "sparql":
+        raise ValueError(f"Unknown rooting engine: {rooting_engine} (expected 'sparql' or 'python')")
+
+    for landmark_type_uri in landmark_type_uris:
+        make_rooting_for_landmarks_according_label(graphdb_url, repository_name, landmark_type_uri, label_property,
+                                                   facts_named_graph_uri, inter_sources_name_graph_uri)
+        
     for elem in lm_and_lr_type_uris:
         lm_type_uri, lr_type_uri = elem
         make_rooting_for_landmarks_according_label_and_relation(graphdb_url, repository_name, lm_type_uri, lr_type_uri, label_property,
@@ -148,8 +163,7 @@ def make_rooting_for_landmarks_according_label(graphdb_url:URIRef, repository_na
     """
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 
 def make_rooting_for_landmarks_according_label_and_relation(graphdb_url:URIRef, repository_name:str,
@@ -235,8 +249,161 @@ def make_rooting_for_landmarks_according_label_and_relation(graphdb_url:URIRef,
     """
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
+
+
+def make_rooting_for_landmarks_according_label_in_python(graphdb_url:URIRef, repository_name:str, landmark_type_uris:list[URIRef], label_property:URIRef,
+                                                         facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
+    """
+    Same rooting as `make_rooting_for_landmarks_according_label` (for several landmark types at once), computed in Python:
+    landmarks of active sources and root landmarks are got with one SELECT query, they are grouped by (landmark type, label)
+    to find or create roots, and created triples are imported in a single payload.
+    """
+
+    landmark_types = " ".join([landmark_type_uri.n3() for landmark_type_uri in landmark_type_uris])
+    query = np.query_prefixes + f"""
+    SELECT DISTINCT ?landmark ?isRooted ?rootLandmark ?landmarkType ?keyLabel WHERE {{
+        {{
+            VALUES ?landmarkType {{ {landmark_types} }}
+            GRAPH ?g {{ ?landmark a addr:Landmark . }}
+            ?g a addr:SourceGraph ; addr:isActiveGraph "true"^^xsd:boolean.
+            ?landmark addr:isLandmarkType ?landmarkType ; {label_property.n3()} ?keyLabel .
+            BIND(EXISTS {{
+                ?landmark addr:hasRoot ?x .
+                GRAPH {facts_named_graph_uri.n3()} {{ ?x a addr:Landmark . }}
+            }} AS ?isRooted)
+        }} UNION {{
+            VALUES ?landmarkType {{ {landmark_types} }}
+            GRAPH {facts_named_graph_uri.n3()} {{ ?rootLandmark a addr:Landmark . }}
+            ?rootLandmark addr:isLandmarkType ?landmarkType ; {label_property.n3()} ?keyLabel .
+        }}
+    }}
+    """
+
+    # Keys are (landmark type, label)
+    landmarks, root_landmarks, keys_to_root = {}, {}, set()
+    for binding in gd.select_query_to_bindings(query, graphdb_url, repository_name):
+        key = (gr.convert_result_elem_to_rdflib_elem(binding.get("landmarkType")), gr.convert_result_elem_to_rdflib_elem(binding.get("keyLabel")))
+        root_landmark = gr.convert_result_elem_to_rdflib_elem(binding.get("rootLandmark"))
+        if root_landmark is not None:
+            root_landmarks.setdefault(key, set()).add(root_landmark)
+            continue
+
+        landmarks.setdefault(key, set()).add(gr.convert_result_elem_to_rdflib_elem(binding.get("landmark")))
+        if not gr.get_boolean_value(gr.convert_result_elem_to_rdflib_elem(binding.get("isRooted"))):
+            keys_to_root.add(key)
+
+    # Roots are created for keys of landmarks without root and which do not match an existing root
+    ds, g_facts, g_inter = get_rooting_dataset(facts_named_graph_uri, inter_sources_name_graph_uri)
+    for key, key_landmarks in landmarks.items():
+        landmark_type, key_label = key
+        if key not in root_landmarks and key in keys_to_root:
+            root_landmark = gr.generate_uri(np.FACTS, "LM")
+            g_facts.add((root_landmark, np.RDF.type, np.ADDR["Landmark"]))
+            g_facts.add((root_landmark, np.ADDR["isLandmarkType"], landmark_type))
+            g_facts.add((root_landmark, label_property, key_label))
+            root_landmarks[key] = {root_landmark}
+
+        for root_landmark in root_landmarks.get(key, []):
+            for landmark in key_landmarks:
+                add_root_and_trace_triples(g_inter, landmark, root_landmark)
+
+    import_rooting_dataset(graphdb_url, repository_name, ds)
+
+def make_rooting_for_landmarks_according_label_and_relation_in_python(graphdb_url:URIRef, repository_name:str, lm_and_lr_type_uris:list[list[URIRef]], label_property:URIRef,
+                                                                      facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
+    """
+    Same rooting as `make_rooting_for_landmarks_according_label_and_relation` (for several pairs of landmark and landmark relation types at once), computed in Python.
+    Landmarks and relations are grouped by (landmark type, label, landmark relation type, root of the relatum).
+    """
+
+    type_pairs = " ".join([f"({lm_type_uri.n3()} {lr_type_uri.n3()})" for lm_type_uri, lr_type_uri in lm_and_lr_type_uris])
+    query = np.query_prefixes + f"""
+    SELECT DISTINCT ?landmarkRelation ?landmark ?isRooted ?rootLandmarkRelation ?rootLandmark ?landmarkType ?keyLabel ?landmarkRelationType ?rootRelatum WHERE {{
+        {{
+            VALUES (?landmarkType ?landmarkRelationType) {{ {type_pairs} }}
+            GRAPH ?g {{
+                ?landmarkRelation a addr:LandmarkRelation .
+                ?landmark a addr:Landmark .
+            }}
+            ?g a addr:SourceGraph ; addr:isActiveGraph "true"^^xsd:boolean.
+            ?landmarkRelation addr:isLandmarkRelationType ?landmarkRelationType ; addr:locatum ?landmark ; addr:relatum [addr:hasRoot ?rootRelatum] .
+            GRAPH {facts_named_graph_uri.n3()} {{ ?rootRelatum a addr:Landmark . }}
+            ?landmark addr:isLandmarkType ?landmarkType ; {label_property.n3()} ?keyLabel .
+            BIND(EXISTS {{
+                ?landmarkRelation addr:hasRoot ?x .
+                GRAPH {facts_named_graph_uri.n3()} {{ ?x a addr:LandmarkRelation . }}
+            }} AS ?isRooted)
+        }} UNION {{
+            VALUES (?landmarkType ?landmarkRelationType) {{ {type_pairs} }}
+            GRAPH {facts_named_graph_uri.n3()} {{
+                ?rootLandmarkRelation a addr:LandmarkRelation .
+                ?rootLandmark a addr:Landmark .
+            }}
+            ?rootLandmarkRelation addr:isLandmarkRelationType ?landmarkRelationType ; addr:locatum ?rootLandmark ; addr:relatum ?rootRelatum .
+            ?rootLandmark addr:isLandmarkType ?landmarkType ; {label_property.n3()} ?keyLabel .
+        }}
+    }}
+    """
+
+    # Keys are (landmark type, label, landmark relation type, root relatum), roots are (root landmark, root landmark relation)
+    elements, roots, keys_to_root = {}, {}, set()
+    for binding in gd.select_query_to_bindings(query, graphdb_url, repository_name):
+        key = tuple([gr.convert_result_elem_to_rdflib_elem(binding.get(var)) for var in ["landmarkType", "keyLabel", "landmarkRelationType", "rootRelatum"]])
+        root_landmark = gr.convert_result_elem_to_rdflib_elem(binding.get("rootLandmark"))
+        if root_landmark is not None:
+            root_landmark_relation = gr.convert_result_elem_to_rdflib_elem(binding.get("rootLandmarkRelation"))
+            roots.setdefault(key, set()).add((root_landmark, root_landmark_relation))
+            continue
+
+        landmark = gr.convert_result_elem_to_rdflib_elem(binding.get("landmark"))
+        landmark_relation = gr.convert_result_elem_to_rdflib_elem(binding.get("landmarkRelation"))
+        elements.setdefault(key, set()).add((landmark, landmark_relation))
+        if not gr.get_boolean_value(gr.convert_result_elem_to_rdflib_elem(binding.get("isRooted"))):
+            keys_to_root.add(key)
+
+    ds, g_facts, g_inter = get_rooting_dataset(facts_named_graph_uri, inter_sources_name_graph_uri)
+    for key, key_elements in elements.items():
+        landmark_type, key_label, landmark_relation_type, root_relatum = key
+        if key not in roots and key in keys_to_root:
+            root_landmark, root_landmark_relation = gr.generate_uri(np.FACTS, "LM"), gr.generate_uri(np.FACTS, "LR")
+            g_facts.add((root_landmark, np.RDF.type, np.ADDR["Landmark"]))
+            g_facts.add((root_landmark, np.ADDR["isLandmarkType"], landmark_type))
+            g_facts.add((root_landmark, label_property, key_label))
+            g_facts.add((root_landmark_relation, np.RDF.type, np.ADDR["LandmarkRelation"]))
+            g_facts.add((root_landmark_relation, np.ADDR["isLandmarkRelationType"], landmark_relation_type))
+            g_facts.add((root_landmark_relation, np.ADDR["locatum"], root_landmark))
+            g_facts.add((root_landmark_relation, np.ADDR["relatum"], root_relatum))
+            roots[key] = {(root_landmark, root_landmark_relation)}
+
+        for root_landmark, root_landmark_relation in roots.get(key, []):
+            for landmark, landmark_relation in key_elements:
+                add_root_and_trace_triples(g_inter, landmark, root_landmark)
+                add_root_and_trace_triples(g_inter, landmark_relation, root_landmark_relation)
+
+    import_rooting_dataset(graphdb_url, repository_name, ds)
+
+def get_rooting_dataset(facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
+    """
+    Returns a dataset which gathers triples created by a rooting, with its facts and inter sources named graphs.
+    """
+
+    ds = Dataset()
+    np.bind_namespaces(ds)
+    return ds, ds.graph(facts_named_graph_uri), ds.graph(inter_sources_name_graph_uri)
+
+def add_root_and_trace_triples(g, elem:URIRef, root_elem:URIRef):
+    g.add((elem, np.ADDR["hasRoot"], root_elem))
+    g.add((root_elem, np.ADDR["hasTrace"], elem))
+
+def import_rooting_dataset(graphdb_url:URIRef, repository_name:str, ds:Dataset):
+    """
+    Import triples of a rooting dataset as a single TriG payload (nothing is sent if it is empty).
+    """
+
+    if len(ds) == 0:
+        return None
+    gd.import_rdf_data_in_graphdb(graphdb_url, repository_name, ds.serialize(format="trig"), rdf_format="trig")
 
 
 ########## Changes / Events
@@ -330,8 +497,7 @@ def make_rooting_for_changes(graphdb_url:URIRef, repository_name:str, facts_name
     """ 
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 def make_rooting_for_events(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
     # Integration of events in the fact graph
@@ -419,8 +585,7 @@ def make_rooting_for_events(graphdb_url:URIRef, repository_name:str, facts_named
     """
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 
 ########## Landmark relations
@@ -572,8 +737,7 @@ def make_rooting_for_landmark_relations(graphdb_url, repository_name, label_prop
     """
 
     queries = [query1, query2, query3, query4, query5]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 ########## Atttibutes
 
@@ -670,8 +834,7 @@ WHERE {{
     """ 
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 ########## Temporal entities
 
@@ -758,8 +921,7 @@ WHERE {{
     """ 
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 # def make_rooting_for_crisp_time_intervals(graphdb_url:URIRef, repository_name:str,
 #                                           facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
@@ -856,8 +1018,7 @@ WHERE {{
     """ 
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 def make_rooting_for_temporal_entities(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef, inter_sources_name_graph_uri:URIRef):
     make_rooting_for_crisp_time_instants(graphdb_url, repository_name, facts_named_graph_uri, inter_sources_name_graph_uri)
@@ -81,8 +81,7 @@ def transfert_immutable_triples(graphdb_url, repository_name, factoids_named_gra
     """
 
     queries = [query1, query2, query3]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 def transfer_version_values_to_roots(graphdb_url:URIRef, repository_name:str, facts_named_graph_uri:URIRef):
     """
@@ -0,0 +1,130 @@
+"""
+triple_sinks.py
+
+Triple sinks which can be given instead of a rdflib `Graph` to the functions creating resources
+(`resource_initialisation`, `states_events_json`): they only call `g.add((s, p, o))`, which sinks implement
+without keeping triples in an in-memory store.
+
+Sinks:
+- `NTriplesFileSink`: buffered writer of a N-Triples file (N-Quads if a named graph is given)
+- `GraphDBSink`: triples are sent to a GraphDB repository by batches (as N-Triples payloads)
+
+A rdflib `Graph` remains the default sink of these functions.
+
+Usage:
+    with NTriplesFileSink("factoids.nt") as sink:
+        ri.create_landmark(sink, lm_uri, label, lm_type_uri)
+
+Dependencies:
+- rdflib
+"""
+
+from abc import ABC, abstractmethod
+from rdflib import URIRef, Literal
+from scripts.graph_construction import graphdb as gd
+
+def get_nt_term(term):
+    """
+    Returns the N-Triples form of a term: `n3()` for URIs and blank nodes, and for literals a single-line quoted
+    lexical form (`n3()` writes literals with line breaks as long Turtle strings, which are not allowed in N-Triples).
+    """
+    if not isinstance(term, Literal):
+        return term.n3()
+
+    value = str(term).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    if term.language is not None:
+        return f'"{value}"@{term.language}'
+    if term.datatype is not None:
+        return f'"{value}"^^{term.datatype.n3()}'
+    return f'"{value}"'
+
+def get_nt_row(triple: tuple, named_graph_uri: URIRef = None):
+    terms = [get_nt_term(term) for term in triple]
+    if named_graph_uri is not None:
+        terms.append(named_graph_uri.n3())
+    return " ".join(terms) + " .\n"
+
+class TripleSink(ABC):
+    def __init__(self, buffer_size: int = 10000):
+        """
+        Args:
+            buffer_size (int): Number of triples kept before being flushed.
+        """
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.triple_count = 0
+
+    def add(self, triple: tuple):
+        self.buffer.append(self.get_row(triple))
+        self.triple_count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+        return self
+
+    def get_row(self, triple: tuple):
+        return get_nt_row(triple)
+
+    def bind(self, prefix, namespace, *args, **kwargs):
+        # Prefixes are meaningless in N-Triples, `bind` is kept for compatibility with `Graph`
+        pass
+
+    def flush(self):
+        if len(self.buffer) > 0:
+            self.write_rows("".join(self.buffer))
+            self.buffer = []
+
+    @abstractmethod
+    def write_rows(self, rows: str):
+        """
+        Writes N-Triples (or N-Quads) rows joined in a string.
+        """
+
+    def close(self):
+        self.flush()
+
+    def __len__(self):
+        return self.triple_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class NTriplesFileSink(TripleSink):
+    def __init__(self, nt_file: str, named_graph_uri: URIRef = None, buffer_size: int = 10000):
+        """
+        Writes triples in `nt_file`, as N-Quads of `named_graph_uri` if it is given.
+        """
+        super().__init__(buffer_size)
+        self.named_graph_uri = named_graph_uri
+        self.file = open(nt_file, "w", encoding="utf-8")
+
+    def get_row(self, triple: tuple):
+        return get_nt_row(triple, self.named_graph_uri)
+
+    def write_rows(self, rows: str):
+        self.file.write(rows)
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+class GraphDBSink(TripleSink):
+    def __init__(self, graphdb_url: URIRef, repository_name: str, named_graph_uri: URIRef = None, buffer_size: int = 100000):
+        """
+        Sends triples to the repository (in `named_graph_uri` if given) by batches of `buffer_size` triples.
+        A batch rejected by the repository raises an `HTTPError` (triples of the previous batches are kept in the repository).
+        """
+        super().__init__(buffer_size)
+        self.graphdb_url = graphdb_url
+        self.repository_name = repository_name
+        self.named_graph_uri = named_graph_uri
+
+    def write_rows(self, rows: str):
+        r = gd.import_rdf_data_in_graphdb(self.graphdb_url, self.repository_name, rows, rdf_format="ntriples", named_graph_uri=self.named_graph_uri)
+        r.raise_for_status()
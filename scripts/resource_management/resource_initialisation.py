@@ -12,6 +12,8 @@ om = OntologyMapping()
 ############################################## Resource creation ##########################################################
 
 # This section aims at creating some resources such as : Landmark, LandmarkRelation, Attribute, AttributeVersion, Change, Event, TemporalEntity...
+# Resources are added to `g` with `g.add()` only: `g` is a rdflib `Graph` or a triple sink of `scripts.graph_construction.triple_sinks`
+# (which writes triples in a N-Triples file or sends them to GraphDB without keeping them in memory).
 
 ######### Landmark management #########
 # Functions to manage with landmarks 
@@ -2,6 +2,7 @@ from rdflib import Graph, Literal, URIRef
 from scripts.graph_construction.namespaces import NameSpaces, OntologyMapping
 from scripts.utils import time_processing as tp
 from scripts.graph_construction import graphrdf as gr
+from scripts.graph_construction import triple_sinks as ts
 from scripts.resource_management import resource_initialisation as ri
 
 np = NameSpaces()
@@ -477,7 +478,73 @@ def create_graph_from_state_descriptions(states_descriptions:dict):
 
     return g
 
-def create_landmark_version_from_description(g:Graph, lm_state_description:dict, valid_time_uri:URIRef=None, source_uri:URIRef=None):
+def create_ntriples_file_from_state_descriptions(states_descriptions, nt_file:str, time_description:dict=None, source_description:dict=None, batch_size:int=10000):
+    """
+    Streaming version of `create_graph_from_state_descriptions`: `states_descriptions` is an iterable (such as a generator)
+    of descriptions {"landmarks":[...], "relations":[...], "addresses":[...]}, each of them only referring to landmarks
+    described in itself or in a previous one. Triples are written in the N-Triples file `nt_file` by batches of `batch_size` triples,
+    so that neither the descriptions nor the graph are held in memory.
+
+    URIs of landmarks are built from their identifiers (see `get_landmark_uri_from_id`) instead of being kept in a dictionary,
+    identifiers must then be unique and usable in a URI (such as identifiers created with `gr.generate_uuid`).
+
+    Returns the number of written triples.
+    """
+
+    with ts.NTriplesFileSink(nt_file, buffer_size=batch_size) as sink:
+        add_state_descriptions_to_sink(states_descriptions, sink, time_description, source_description)
+
+    return len(sink)
+
+def add_state_descriptions_to_sink(states_descriptions, sink, time_description:dict=None, source_description:dict=None):
+    """
+    Add triples of each description of `states_descriptions` (an iterable) to `sink` (a rdflib `Graph` or a triple sink of `triple_sinks`).
+    """
+
+    valid_time_uri = None
+    if isinstance(time_description, dict) and {"start", "end"}.issubset(time_description.keys()):
+        valid_time_uri = gr.generate_uri(np.FACTOIDS, "TI")
+        create_time_interval(sink, valid_time_uri, time_description)
+
+    source_uri = None
+    if isinstance(source_description, dict):
+        source_uri = create_source_from_description(sink, source_description)
+
+    for description in states_descriptions:
+        create_graph_from_state_description_with_landmark_ids(sink, description, valid_time_uri, source_uri)
+
+def create_graph_from_state_description_with_landmark_ids(g:Graph, states_description:dict, valid_time_uri:URIRef=None, source_uri:URIRef=None):
+    """
+    Add triples of a description to `g`, URIs of landmarks being built from their identifiers.
+    """
+
+    lm_states_descriptions = states_description.get("landmarks") or []
+    lm_relations_states_descriptions = states_description.get("relations") or []
+    addr_states_descriptions = states_description.get("addresses") or []
+
+    for desc in lm_states_descriptions:
+        create_landmark_version_from_description(g, desc, valid_time_uri, source_uri, lm_uri=get_landmark_uri_from_id(desc.get("id")))
+
+    # Landmarks which are referred to by relations and addresses
+    landmark_ids = []
+    for desc in lm_relations_states_descriptions:
+        relatums = desc.get("relatum")
+        landmark_ids += [desc.get("locatum")] + (relatums if isinstance(relatums, list) else [relatums])
+    landmark_ids += [desc.get("target") for desc in addr_states_descriptions]
+    landmarks = {lm_id: get_landmark_uri_from_id(lm_id) for lm_id in landmark_ids if lm_id is not None}
+
+    relations = {}
+    for desc in lm_relations_states_descriptions:
+        lr_id, lr_uri = create_landmark_relation_version_from_description(g, desc, landmarks, valid_time_uri, source_uri)
+        relations[lr_id] = lr_uri
+
+    for desc in addr_states_descriptions:
+        create_address_version_from_description(g, desc, landmarks, relations)
+
+def get_landmark_uri_from_id(lm_id:str):
+    return np.FACTOIDS[f"LM_{lm_id}"]
+
+def create_landmark_version_from_description(g:Graph, lm_state_description:dict, valid_time_uri:URIRef=None, source_uri:URIRef=None, lm_uri:URIRef=None):
     """
     ```
     lm_state_description = {
@@ -514,7 +581,7 @@ def create_landmark_version_from_description(g:Graph, lm_state_description:dict,
     ```
     """
 
-    lm_uri = gr.generate_uri(np.FACTOIDS, "LM") # Generate a unique URI for the landmark
+    lm_uri = lm_uri or gr.generate_uri(np.FACTOIDS, "LM") # Generate a unique URI for the landmark (if not given)
     lm_id = lm_state_description.get("id") # Extract the landmark ID from the version description
     lm_label = lm_state_description.get("label") # Extract the landmark label from the version description
     lm_lang = lm_state_description.get("lang") # Extract the language from the version description
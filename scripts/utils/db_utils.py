@@ -8,18 +8,29 @@ Features:
 - Connect from a .ini config file
 - Create/drop schema or table
 - Execute SELECT and UPDATE/DDL queries
+- Stream large results (server-side cursors) and export them to CSV with `COPY ... TO STDOUT`
+- Bulk load rows with geometries (COPY into a staging table, then a single reprojecting INSERT), unreadable geometries being rejected
+- Optional thread-safe connection pool, to run queries from several threads
 - Install PostGIS extension
 - Structured logging
 
 Dependencies:
 - psycopg2
 - configparser
+- shapely
 """
 
+import io
+import csv
+import uuid
+import threading
 import psycopg2
 import configparser
 import logging
+import shapely
 from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
 import os
 
 # Configure logger
@@ -27,16 +38,24 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class PostgresManager:
-    def __init__(self, config_file: str):
+    def __init__(self, config_file: str, pool_size: int = None):
         """
         Initializes the manager by connecting to PostgreSQL using a config file.
 
         Args:
             config_file (str): Path to a .ini file with [postgresql] section.
+            pool_size (int, optional): If given, queries are run on connections of a thread-safe pool of at most
+                `pool_size` connections, so that several threads can use the manager at the same time (threads wait for
+                a free connection when all of them are used). Otherwise, all queries are run (one at a time) on a single connection.
         """
-        self.conn = self._connect_from_config(config_file)
+        conn_params = self._get_connection_params_from_config(config_file)
+        self.conn = psycopg2.connect(**conn_params)
+        self.pool = ThreadedConnectionPool(1, pool_size, **conn_params) if pool_size else None
+        # `getconn` raises an error instead of waiting when all connections of the pool are used
+        self._pool_slots = threading.BoundedSemaphore(pool_size) if pool_size else None
+        self._lock = threading.RLock()
 
-    def _connect_from_config(self, config_file: str):
+    def _get_connection_params_from_config(self, config_file: str):
         if os.path.exists(config_file) and os.path.isfile(config_file):
             config = configparser.ConfigParser()
             config.read(config_file)
@@ -56,7 +75,25 @@ class PostgresManager:
         if password:
             conn_params['password'] = password
 
-        return psycopg2.connect(**conn_params)
+        return conn_params
+
+    @contextmanager
+    def connection(self):
+        """
+        Yields a connection for the current thread: a connection of the pool (given back at the end) if the manager has one,
+        waiting for one to be free, else the single connection of the manager (used by one thread at a time).
+        """
+        if self.pool is None:
+            with self._lock:
+                yield self.conn
+            return
+
+        with self._pool_slots:
+            conn = self.pool.getconn()
+            try:
+                yield conn
+            finally:
+                self.pool.putconn(conn)
 
     def execute_query(self, query: str, error_message: str = None, success_message: str = None):
         """
@@ -67,16 +104,17 @@ class PostgresManager:
             error_message (str, optional): Custom message on failure.
             success_message (str, optional): Custom message on success.
         """
-        try:
-            with self.conn.cursor() as cur:
-                cur.execute(query)
-            self.conn.commit()
-            if success_message:
-                logger.info(success_message)
-        except Exception as e:
-            self.conn.rollback()
-            msg = error_message or f"❌ Error executing query: {e}"
-            logger.error(msg)
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                conn.commit()
+                if success_message:
+                    logger.info(success_message)
+            except Exception as e:
+                conn.rollback()
+                msg = error_message or f"❌ Error executing query: {e}"
+                logger.error(msg)
 
     def fetch_one(self, query: str):
         """
@@ -88,13 +126,15 @@ class PostgresManager:
         Returns:
             tuple: One row of results, or None if no results or error.
         """
-        try:
-            with self.conn.cursor() as cur:
-                cur.execute(query)
-                return cur.fetchone()
-        except Exception as e:
-            logger.error(f"❌ Error executing fetch_one: {e}")
-            return None
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    return cur.fetchone()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"❌ Error executing fetch_one: {e}")
+                return None
 
     def fetch_all(self, query: str):
         """
@@ -105,14 +145,154 @@ class PostgresManager:
 
         Returns:
             list of tuple: All result rows, or empty list if no results or error.
+
+        For large results, use `iter_rows` (or `copy_to_csv` to export them) which does not hold all rows in memory.
+        """
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    return cur.fetchall()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"❌ Error executing fetch_all: {e}")
+                return []
+
+    def iter_rows(self, query: str, batch_size: int = 10000):
+        """
+        Executes a SELECT query with a server-side (named) cursor and yields result rows one by one,
+        only `batch_size` rows being held in memory at the same time.
+
+        Args:
+            query (str): SQL SELECT query.
+            batch_size (int): Number of rows fetched from the server at once.
+
+        Yields:
+            tuple: Result rows.
+
+        Raises:
+            Exception: The error of the query or of the fetch of rows (after being logged), even if rows were already yielded.
+
+        The cursor lives in a transaction of the connection. Without a pool, the single connection of the manager is kept
+        (and its lock held) until rows are all read or the generator is closed: queries of other threads wait until then,
+        and other queries of the same thread should not be committed while rows are read.
+        """
+        with self.connection() as conn:
+            try:
+                with conn.cursor(name=f"iter_rows_{uuid.uuid4().hex}") as cur:
+                    cur.itersize = batch_size
+                    cur.execute(query)
+                    for row in cur:
+                        yield row
+                conn.commit()
+            except GeneratorExit:
+                # Rows have not been all read
+                conn.rollback()
+                raise
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"❌ Error executing iter_rows: {e}")
+                raise
+
+    def copy_to_csv(self, query: str, csv_path: str, header: bool = True, append: bool = False):
+        """
+        Exports the result of a SELECT query in a CSV file with `COPY (...) TO STDOUT`: rows are written
+        by PostgreSQL while they are produced, without being converted to Python objects.
+
+        Args:
+            query (str): SQL SELECT query (without final semicolon).
+            csv_path (str): Path to the CSV file.
+            header (bool): Whether the names of columns are written on the first line.
+            append (bool): Whether rows are added at the end of the file instead of replacing it.
+
+        Returns:
+            int: Number of exported rows (None if an error occurred).
+        """
+        copy_query = f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv{', HEADER' if header else ''})"
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur, open(csv_path, "a" if append else "w", encoding="utf-8", newline="") as f:
+                    cur.copy_expert(copy_query, f)
+                    row_number = cur.rowcount
+                conn.commit()
+                return row_number
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"❌ Error exporting rows to '{csv_path}': {e}")
+                return None
+
+    def copy_rows_with_geometry(self, table: str, columns: list, geom_col: str, rows, from_epsg: int = 4326, to_epsg: int = 4326, batch_size: int = 100000,
+                                rejected_rows: list = None):
+        """
+        Bulk loads rows in a table: rows are streamed with `COPY ... FROM STDIN` (by batches of `batch_size`) into a temporary
+        staging table, then geometries are reprojected at once with a single `INSERT ... SELECT ST_Transform(...)`.
+        Values do not have to be escaped, and empty or None values are loaded as NULL.
+
+        As all rows are loaded in a single transaction, geometries are read (with shapely) before being sent: rows whose geometry
+        is missing or is not a readable WKT are rejected (and logged) instead of making the whole load fail.
+
+        Args:
+            table (str): Target table (e.g. "schema.table").
+            columns (list of str): Columns of the target table filled by the values of rows (except the geometry), loaded as text.
+            geom_col (str): Geometry column of the target table.
+            rows (iterable of tuple): Values of `columns` followed by the WKT (or EWKT) of the geometry.
+            from_epsg (int): EPSG code of the geometries of rows.
+            to_epsg (int): EPSG code of the geometry column.
+            batch_size (int): Number of rows sent to PostgreSQL at once.
+            rejected_rows (list, optional): List to which rejected rows are appended.
+
+        Returns:
+            int: Number of inserted rows (None if an error occurred).
         """
-        try:
-            with self.conn.cursor() as cur:
-                cur.execute(query)
-                return cur.fetchall()
-        except Exception as e:
-            logger.error(f"❌ Error executing fetch_all: {e}")
-            return []
+        staging_table = sql.Identifier(f"staging_{table.split('.')[-1]}")
+        value_columns = [sql.Identifier(f"col_{i}") for i in range(len(columns))]
+        staging_columns = sql.SQL(", ").join(value_columns + [sql.Identifier("geom_wkt")])
+        staging_column_definitions = sql.SQL(", ").join([sql.SQL("{} TEXT").format(col) for col in value_columns + [sql.Identifier("geom_wkt")]])
+        target_columns = sql.SQL(", ").join([sql.SQL(col) for col in columns + [geom_col]])
+        selected_columns = sql.SQL(", ").join(value_columns)
+
+        copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(staging_table, staging_columns)
+        insert_query = sql.SQL("INSERT INTO {} ({}) SELECT {}, ST_Transform(ST_GeomFromText(geom_wkt, %s), %s) FROM {}").format(
+            sql.SQL(table), target_columns, selected_columns, staging_table)
+
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql.SQL("CREATE TEMP TABLE {} ({}) ON COMMIT DROP").format(staging_table, staging_column_definitions))
+
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    row_number, rejected_row_number = 0, 0
+                    for row in rows:
+                        if not is_readable_wkt(row[-1]):
+                            rejected_row_number += 1
+                            if rejected_rows is not None:
+                                rejected_rows.append(row)
+                            continue
+                        writer.writerow(row)
+                        row_number += 1
+                        if row_number % batch_size == 0:
+                            self._copy_buffer(cur, copy_query, buffer)
+                            buffer = io.StringIO()
+                            writer = csv.writer(buffer)
+                    self._copy_buffer(cur, copy_query, buffer)
+
+                    cur.execute(insert_query, (from_epsg, to_epsg))
+                conn.commit()
+                logger.info(f"✅ {row_number} rows loaded in '{table}'.")
+                if rejected_row_number > 0:
+                    logger.warning(f"❌ {rejected_row_number} rows rejected from '{table}' (missing or unreadable geometry).")
+                return row_number
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"❌ Error loading rows in '{table}': {e}")
+                return None
+
+    def _copy_buffer(self, cur, copy_query, buffer: io.StringIO):
+        if buffer.tell() == 0:
+            return
+        buffer.seek(0)
+        cur.copy_expert(copy_query.as_string(cur.connection), buffer)
 
     def create_schema(self, schema_name: str):
         query = sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(schema_name))
@@ -169,7 +349,21 @@ class PostgresManager:
         )
 
     def close(self):
-        """Closes the PostgreSQL connection."""
+        """Closes the PostgreSQL connection (and the connections of the pool)."""
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
         if self.conn:
             self.conn.close()
             logger.info("🔌 Connection closed.")
+
+
+def is_readable_wkt(wkt) -> bool:
+    """
+    Checks that `wkt` is a WKT (or EWKT, `SRID=...;WKT`) which can be read.
+    """
+    if not isinstance(wkt, str):
+        return False
+    if wkt.upper().startswith("SRID="):
+        wkt = wkt.split(";", 1)[-1]
+    return shapely.from_wkt(wkt, on_invalid="ignore") is not None
@@ -1,6 +1,8 @@
 import os
 import json
 import csv
+import zlib
+import gzip
 from uuid import uuid4
 
 def read_file(filename:str, split_lines=False):
@@ -22,6 +24,54 @@ def write_file(content:str,filename:str):
     file.write(content)
     file.close()
 
+def read_binary_file_by_chunks(filename:str, chunk_size:int=1024*1024):
+    """
+    Yield the content of a file as successive chunks of bytes (the file is never fully loaded in memory).
+    """
+    with open(filename, "rb") as file:
+        chunk = file.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = file.read(chunk_size)
+
+def read_file_by_line_batches(filename:str, batch_size:int, skip_blank_lines:bool=True, encoding:str='utf-8'):
+    """
+    Yield the lines of a text file by batches of `batch_size` lines (each batch is a list of lines).
+    """
+    batch = []
+    with open(filename, "r", encoding=encoding) as file:
+        for line in file:
+            if skip_blank_lines and line.strip() == "":
+                continue
+            batch.append(line)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if len(batch) != 0:
+        yield batch
+
+def get_gzip_compressed_chunks(chunks):
+    """
+    Compress chunks of bytes with gzip on the fly and yield the compressed chunks.
+    """
+    compressor = zlib.compressobj(wbits=31) # 31 = gzip header and trailer
+    for chunk in chunks:
+        compressed_chunk = compressor.compress(chunk)
+        if compressed_chunk:
+            yield compressed_chunk
+    yield compressor.flush()
+
+def write_file_from_chunks(chunks, filename:str, compress:bool=False):
+    """
+    Write chunks of bytes in a file as they are received (the content is never fully held in memory).
+    If `compress` is True, the file is written with gzip.
+    """
+    file = gzip.open(filename, "wb") if compress else open(filename, "wb")
+    with file:
+        for chunk in chunks:
+            if chunk:
+                file.write(chunk)
+
 def create_folder_if_not_exists(folder:str):
     if not os.path.exists(folder):
         os.makedirs(folder)
@@ -88,3 +138,16 @@ def read_csv_file_as_dict(csv_file:str, id_col:str=None, selected_columns:list[s
             out_content[row_id] = row
 
     return out_content
+
+def iter_csv_file_rows_as_dict(csv_file:str, selected_columns:list[str]=None, delimiter:str=",", quotechar:str='"', encoding:str='utf-8'):
+    """
+    Yield rows of a CSV file as dictionaries, one at a time (the file is never fully loaded in memory).
+    """
+    has_selected_columns = (isinstance(selected_columns, list) and len(selected_columns) != 0)
+    with open(csv_file, 'r', encoding=encoding) as file:
+        csvreader = csv.DictReader(file, delimiter=delimiter, quotechar=quotechar)
+        for row in csvreader:
+            if has_selected_columns:
+                yield {col: row[col] for col in selected_columns}
+            else:
+                yield row
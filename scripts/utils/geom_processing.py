@@ -3,11 +3,13 @@ import math
 import re
 import json
 import geojson
+import threading
+import functools
 import pyproj
+import numpy as np
 import shapely
 from shapely import wkt
 from shapely.geometry import shape, Point
-from shapely.ops import transform
 from uuid import uuid4
 from rdflib import URIRef, Literal, Namespace
 
@@ -160,7 +162,7 @@ def transform_geometry(geom, transformer):
     Obtain geometry defined in the `from_crs` coordinate system to the `to_crs` coordinate system.
     """
 
-    return transform(transformer.transform, geom)
+    return transform_geometry_array(geom, transformer)
 
 def transform_geometry_crs(geom, crs_from, crs_to):
     """
@@ -168,11 +170,45 @@ def transform_geometry_crs(geom, crs_from, crs_to):
     """
 
     transformer = get_crs_transformer(crs_from, crs_to)
-    return transform(transformer.transform, geom)
+    return transform_geometry_array(geom, transformer)
+
+def transform_geometry_array(geoms, transformer:pyproj.Transformer):
+    """
+    Reproject a geometry (or an array of geometries) with `transformer`.
+    All the coordinates are given at once to `transformer.transform` as NumPy arrays (no Python callback for each vertex).
+    The dimension of geometries (2D or 3D) is kept.
+    """
+
+    def transform_coords(coords):
+        return np.column_stack(transformer.transform(*coords.T))
+
+    has_z = shapely.has_z(geoms)
+    if np.ndim(has_z) == 0:
+        return shapely.transform(geoms, transform_coords, include_z=bool(has_z))
+
+    geoms = np.array(geoms, dtype=object)
+    for include_z in [False, True]:
+        mask = has_z == include_z
+        if mask.any():
+            geoms[mask] = shapely.transform(geoms[mask], transform_coords, include_z=include_z)
+
+    return geoms
+
+# Process-wide registry of transformers (creating a transformer is expensive)
+_crs_transformers_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=64)
+def _get_registered_crs_transformer(crs_from:str, crs_to:str):
+    return pyproj.Transformer.from_crs(crs_from, crs_to, always_xy=True)
 
 def get_crs_transformer(crs_from:str, crs_to:str):
-    transformer = pyproj.Transformer.from_crs(crs_from, crs_to, always_xy=True)
-    return transformer
+    """
+    Get the transformer from `crs_from` to `crs_to`. Transformers are created once and kept in a thread-safe LRU registry
+    keyed by (`crs_from`, `crs_to`), so every reprojection path shares them.
+    """
+
+    with _crs_transformers_lock:
+        return _get_registered_crs_transformer(str(crs_from), str(crs_to))
 
 def get_pyproj_crs_from_opengis_epsg_uri(opengis_epsg_uri:URIRef):
     """
@@ -248,23 +284,18 @@ def are_similar_polygons(geom_1, geom_2, coef_min:float):
 def get_projected_geometry(geom, crs_from_uri:URIRef, crs_to_uri:URIRef, transformers:dict[str, pyproj.Transformer]={}):
     """
     Obtain geometry defined in the `geom_srid_uri` coordinate system to the `crs_uri` coordinate system.
-    The `transformers` dictionary is used to store transformers for each coordinate system.
+    Transformers come from the registry of `get_crs_transformer` (`transformers` is kept for compatibility and is not used anymore:
+    it was only keyed by source coordinate system).
     """
 
     # Getting the EPSG code from the OpenGIS URI
     crs_from = get_epsg_code_from_opengis_epsg_uri(crs_from_uri, True)
     crs_to = get_epsg_code_from_opengis_epsg_uri(crs_to_uri, True)
 
-    # transformers dictionary is used to store transformers for each coordinate system
-    transformer = transformers.get(crs_from)
-
-    if transformer is None and crs_from != crs_to:
-        # If the transformer is not already in the dictionary, create it
-        transformer = get_crs_transformer(crs_from, crs_to)
-
     # Converting geometry to the target coordinate system
     if crs_from != crs_to:
-        geom = transform(transformer.transform, geom)
+        transformer = get_crs_transformer(crs_from, crs_to)
+        geom = transform_geometry_array(geom, transformer)
 
     return geom
 
@@ -284,9 +315,92 @@ def get_processed_geometry(geom_wkt:str, geom_type:str, geom_srid_uri:URIRef, cr
 
     return geom
 
+def get_processed_geometries(geom_wkts:list[str], geom_types:list[str], geom_srid_uris:list[URIRef], crs_uri:URIRef, buffer_radius:float, transformers:dict[str, pyproj.Transformer]={}):
+    """
+    Vectorized version of `get_processed_geometry`: all geometries are processed at once with shapely array functions.
+    * WKT strings are parsed together ;
+    * geometries are reprojected by groups of same coordinate system (one call to `transformer.transform` for all the coordinates of a group) ;
+    * geometries whose area is 0.0 and whose type is `polygon` get a buffer zone whose buffer is given by `buffer_radius`.
+
+    Returns a numpy array of geometries (in the same order as `geom_wkts`).
+    """
+
+    geoms = shapely.from_wkt(np.asarray(geom_wkts, dtype=object))
+    geom_types = np.asarray(geom_types, dtype=object)
+    # SRID URIs are compared as strings (rdflib terms are not equal to numpy strings)
+    geom_srid_uris = np.asarray([str(geom_srid_uri) for geom_srid_uri in geom_srid_uris], dtype=object)
+
+    crs_to = get_epsg_code_from_opengis_epsg_uri(crs_uri, True)
+    for geom_srid_uri in set(geom_srid_uris):
+        crs_from = get_epsg_code_from_opengis_epsg_uri(geom_srid_uri, True)
+        if crs_from == crs_to:
+            continue
+
+        transformer = get_crs_transformer(crs_from, crs_to)
+        mask = geom_srid_uris == geom_srid_uri
+        geoms[mask] = transform_geometry_array(geoms[mask], transformer)
+
+    # Add a buffer for geometries which are not polygons whereas polygons are expected
+    mask = (shapely.area(geoms) == 0.0) & (geom_types == "polygon")
+    geoms[mask] = shapely.buffer(geoms[mask], buffer_radius)
+
+    return geoms
+
+def get_envelopes(geoms):
+    """
+    Get the envelopes (bounding boxes) of an array of geometries.
+    """
+
+    return shapely.envelope(np.asarray(geoms, dtype=object))
+
+def are_similar_geometry_arrays(geoms_1, geoms_2, geom_type:str, coef_min:float=0.8, max_dist=10):
+    """
+    Vectorized version of `are_similar_geometries`: `geoms_1[i]` is compared to `geoms_2[i]` for each `i`.
+    Returns a list of booleans (or a list of None if `geom_type` is not `point` or `polygon`).
+    For polygons, only envelopes matter so `geoms_1` and `geoms_2` can already be envelopes (see `get_envelopes`).
+    """
+
+    geoms_1 = np.asarray(geoms_1, dtype=object)
+    geoms_2 = np.asarray(geoms_2, dtype=object)
+
+    if geom_type == "polygon":
+        envelopes_1, envelopes_2 = shapely.envelope(geoms_1), shapely.envelope(geoms_2)
+        intersection_areas = shapely.area(shapely.intersection(envelopes_1, envelopes_2))
+        union_areas = shapely.area(shapely.union(envelopes_1, envelopes_2))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coefs = intersection_areas / union_areas
+        return (coefs >= coef_min).tolist()
+    elif geom_type == "point":
+        return (shapely.distance(geoms_1, geoms_2) <= max_dist).tolist()
+    return [None] * len(geoms_1)
+
+def get_possibly_similar_geometry_pairs(geoms, index_pairs:list[tuple[int, int]], geom_type:str, coef_min:float=0.8, max_dist=10):
+    """
+    Cheap prefilter for `are_similar_geometry_arrays`, evaluated with vectorized functions on the pairs only (no spatial index,
+    whose candidate pairs could be far more numerous than `index_pairs`).
+    Returns a list of booleans: for each `(i, j)` of `index_pairs`, False if `geoms[i]` and `geoms[j]` can't be similar, True if they have to be compared.
+    * polygons whose envelopes do not intersect have a similarity of 0.0, they can't reach `coef_min` (if it is positive) ;
+    * points which are farther apart than `max_dist` are not similar.
+    """
+
+    if len(index_pairs) == 0:
+        return []
+
+    geoms = np.asarray(geoms, dtype=object)
+    indexes_1, indexes_2 = np.asarray(index_pairs, dtype=int).T
+
+    if geom_type == "polygon" and coef_min > 0:
+        envelopes = shapely.envelope(geoms)
+        return shapely.intersects(envelopes[indexes_1], envelopes[indexes_2]).tolist()
+    elif geom_type == "point":
+        return shapely.dwithin(geoms[indexes_1], geoms[indexes_2], max_dist).tolist()
+
+    return [True] * len(index_pairs)
+
 def get_useful_transformers_for_to_crs(to_crs:str, from_crs_list:list[str]):
     """
     Get a list of transformers to be used for converting geometries from each of the `from_crs_list` coordinate systems to `to_crs`.
+    Transformers are taken from the registry of `get_crs_transformer`.
     """
 
     transformers = {}
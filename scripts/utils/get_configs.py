@@ -116,6 +116,7 @@ def get_graph_settings(config_file):
         'geom_similarity_coef': geom_params.get('geom_similarity_coef', '0.8'),
         'geom_buffer_radius': geom_params.get('geom_buffer_radius', '5'),
         'geom_crs_uri': geom_params.get('geom_crs_uri', 'http://www.opengis.net/def/crs/EPSG/0/2154'),
+        'comparison_workers': geom_params.get('comparison_workers', '1'),
         'ontology_named_graph_name': named_graphs_params.get('ontology_named_graph_name', 'ontology'),
         'facts_named_graph_name': named_graphs_params.get('facts_named_graph_name', 'facts'),
         'inter_sources_name_graph_name': named_graphs_params.get('inter_sources_name_graph_name', 'inter_sources'),
@@ -0,0 +1,134 @@
+"""
+label_dictionary.py
+
+A persistent (SQLite) dictionary of normalised labels: (raw label, lang, name type) -> (normalised label, simplified label),
+so that the same names are not normalised again by each step, each run and each tool (GraphDB pipeline, Postgres tables...).
+
+Features:
+- Bulk lookups and insertions
+- Hit-rate statistics (labels found in the dictionary / labels searched)
+- Export as a RDF graph (to be loaded as a named graph): each entry is described with
+  `rdfs:label` (raw label), `skos:prefLabel` (normalised label), `skos:hiddenLabel` (simplified label) and `skos:scopeNote` (name type)
+- Invalidation: the whole dictionary is cleared if `DICTIONARY_VERSION` changes
+  (to be incremented when the way names are normalised changes)
+
+Dependencies:
+- sqlite3 (`sqlite_store`)
+- rdflib
+"""
+
+import hashlib
+import logging
+from contextlib import contextmanager
+from rdflib import Graph, Literal, RDFS, SKOS
+from scripts.graph_construction.namespaces import NameSpaces
+from scripts.utils.sqlite_store import SQLiteKeyValueStore
+from scripts.utils import str_processing as sp
+
+# Configure logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+np = NameSpaces()
+
+DICTIONARY_VERSION = "1"
+
+class LabelDictionary(SQLiteKeyValueStore):
+    def __init__(self, dictionary_file: str, batch_size: int = 500, commit_size: int = 10000):
+        """
+        Opens (or creates) the label dictionary stored in `dictionary_file`.
+
+        Args:
+            dictionary_file (str): Path to the SQLite file.
+            batch_size (int): Number of labels searched in a single query.
+            commit_size (int): Number of new labels kept in memory before being written and committed
+                (labels are often stored one at a time, and a commit for each of them would be slow).
+        """
+        self.hits = 0
+        self.lookups = 0
+        column_definitions = ["label_key TEXT PRIMARY KEY", "raw_label TEXT", "lang TEXT", "name_type TEXT", "normalized_label TEXT", "simplified_label TEXT"]
+        super().__init__(dictionary_file, "labels", column_definitions, DICTIONARY_VERSION, "Label dictionary",
+                         batch_size=batch_size, commit_size=commit_size)
+
+    def get_label_key(self, raw_label: str, name_type: str, lang: str):
+        key_str = "|".join([raw_label, str(name_type), str(lang)])
+        return hashlib.sha1(key_str.encode("utf-8")).hexdigest()
+
+    def get_names(self, name_versions: list):
+        """
+        Returns a dictionary {(raw label, name type, lang): (normalised label, simplified label)} of the labels of `name_versions`
+        (a list of (raw label, name type, lang)) found in the dictionary.
+        """
+        keys = {self.get_label_key(*name_version): name_version for name_version in name_versions}
+
+        found_names = {}
+        for label_key, normalized_label, simplified_label in self.get_rows(list(keys.keys()), ["normalized_label", "simplified_label"]):
+            found_names[keys[label_key]] = (normalized_label, simplified_label)
+
+        self.lookups += len(keys)
+        self.hits += len(found_names)
+        return found_names
+
+    def set_names(self, name_versions: list, names: list):
+        """
+        Stores (normalised label, simplified label) of labels of `name_versions` in the dictionary.
+        """
+        rows = []
+        for (raw_label, name_type, lang), (normalized_label, simplified_label) in zip(name_versions, names):
+            rows.append((self.get_label_key(raw_label, name_type, lang), str(raw_label), lang, name_type, normalized_label, simplified_label))
+
+        self.set_rows(rows)
+
+    def get_hit_rate(self):
+        return self.hits / self.lookups if self.lookups > 0 else 0.0
+
+    def print_statistics(self):
+        logger.info(f"📖 {self.hits} labels out of {self.lookups} found in label dictionary ({self.get_hit_rate() * 100:.1f} %)")
+
+    def reset_statistics(self):
+        self.hits = 0
+        self.lookups = 0
+
+    def get_graph(self):
+        """
+        Returns a RDF graph which describes all entries of the dictionary.
+        """
+        g = Graph()
+        np.bind_namespaces(g)
+        for label_key, raw_label, lang, name_type, normalized_label, simplified_label in self.iter_all_rows():
+            entry = np.FACTS[f"LABEL_{label_key}"]
+            g.add((entry, RDFS.label, Literal(raw_label, lang=lang)))
+            if name_type is not None:
+                g.add((entry, SKOS.scopeNote, Literal(name_type)))
+            if normalized_label is not None:
+                g.add((entry, SKOS.prefLabel, Literal(normalized_label, lang=lang)))
+            if simplified_label is not None:
+                g.add((entry, SKOS.hiddenLabel, Literal(simplified_label, lang=lang)))
+
+        return g
+
+@contextmanager
+def using_label_dictionary(dictionary_file: str, normaliser=None):
+    """
+    Opens the label dictionary stored in `dictionary_file` and sets it on `normaliser` (the shared normaliser of `str_processing`
+    if None) inside the `with` block. It yields the dictionary, which is closed at the end (its statistics being printed).
+    If `dictionary_file` is None, nothing is done and None is yielded.
+
+    Example usage:
+    ```python
+    with using_label_dictionary("labels.sqlite"):
+        am.add_name_columns_for_multiple_tables(conn, tables_settings, schema_name, simp_label_col, norm_label_col, exceptions)
+    ```
+    """
+    if dictionary_file is None:
+        yield None
+        return
+
+    normaliser = normaliser or sp.get_name_normaliser()
+    with LabelDictionary(dictionary_file) as label_dictionary:
+        normaliser.set_label_dictionary(label_dictionary)
+        try:
+            yield label_dictionary
+        finally:
+            normaliser.set_label_dictionary(None)
+        label_dictionary.print_statistics()
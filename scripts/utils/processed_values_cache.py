@@ -0,0 +1,82 @@
+"""
+processed_values_cache.py
+
+An on-disk (SQLite) cache of processed attribute version values, so that values
+(normalized names, reprojected and buffered geometries) are not processed again
+at each run of the fact graph construction.
+
+Features:
+- Values are identified by a hash of (version value, attribute type, name or geometry type, CRS, buffer radius)
+- Geometries are stored as WKB, names and codes as text
+- Invalidation: entries of geometries processed with other comparison settings (CRS, buffer radius) are removed
+  when the cache is opened, and the whole cache is cleared if `CACHE_VERSION` changes
+  (to be incremented when the way values are processed changes)
+
+Dependencies:
+- sqlite3 (`sqlite_store`)
+- shapely
+"""
+
+import hashlib
+import shapely
+from scripts.utils.sqlite_store import SQLiteKeyValueStore
+
+CACHE_VERSION = "1"
+
+class ProcessedValuesCache(SQLiteKeyValueStore):
+    def __init__(self, cache_file: str, crs_uri: str, buffer_radius: float, batch_size: int = 500):
+        """
+        Opens (or creates) the cache stored in `cache_file` for given comparison settings.
+
+        Args:
+            cache_file (str): Path to the SQLite file.
+            crs_uri (str): URI of the CRS in which geometries are processed.
+            buffer_radius (float): Buffer radius used to process geometries.
+            batch_size (int): Number of keys searched in a single query.
+        """
+        self.crs_uri = str(crs_uri)
+        self.buffer_radius = str(buffer_radius)
+        column_definitions = ["value_key TEXT PRIMARY KEY", "crs_uri TEXT", "buffer_radius TEXT", "value_type TEXT", "processed_value BLOB"]
+        super().__init__(cache_file, "processed_values", column_definitions, CACHE_VERSION, "Processed values cache", batch_size=batch_size)
+
+        # Geometries processed with other settings will never be used again
+        self.conn.execute(
+            "DELETE FROM processed_values WHERE value_type = 'wkb' AND (crs_uri != ? OR buffer_radius != ?)",
+            (self.crs_uri, self.buffer_radius)
+        )
+        self.conn.commit()
+
+    def get_value_key(self, vers_val, attr_type, value_kind, is_geometry: bool):
+        """
+        Returns the key of a value. Names do not depend on the geometry settings.
+        """
+        crs_uri, buffer_radius = (self.crs_uri, self.buffer_radius) if is_geometry else ("", "")
+        key_str = "|".join([vers_val.n3(), str(attr_type), str(value_kind), crs_uri, buffer_radius])
+        return hashlib.sha1(key_str.encode("utf-8")).hexdigest()
+
+    def get_processed_values(self, value_keys: list):
+        """
+        Returns a dictionary {value key: processed value} of values of `value_keys` found in the cache.
+        """
+        found_values = {}
+        for value_key, value_type, processed_value in self.get_rows(value_keys, ["value_type", "processed_value"]):
+            if value_type == "wkb":
+                processed_value = shapely.from_wkb(processed_value)
+            found_values[value_key] = processed_value
+
+        return found_values
+
+    def set_processed_values(self, value_keys: list, processed_values: list):
+        """
+        Stores processed values (geometries or strings) in the cache.
+        """
+        rows = []
+        for value_key, processed_value in zip(value_keys, processed_values):
+            if processed_value is None:
+                continue
+            if isinstance(processed_value, shapely.Geometry):
+                rows.append((value_key, self.crs_uri, self.buffer_radius, "wkb", shapely.to_wkb(processed_value)))
+            else:
+                rows.append((value_key, "", "", "text", processed_value))
+
+        self.set_rows(rows)
@@ -0,0 +1,253 @@
+"""
+query_profiler.py
+
+Instrumentation of the SPARQL queries sent to GraphDB, to know which steps of the
+fact graph construction dominate its runtime.
+
+Features:
+- For each query: calling pipeline step (enclosing stage or calling function), query hash, wall time, payload sizes
+  and (optionally) the delta of the number of statements of the repository
+- Wall time of each stage of the pipeline (and number of queries it sent), with the settings
+  it ran with (such as suspended inference), and comparison of stage times between reports
+- JSON and CSV reports
+- Flame-style summary: time aggregated by call stack, written in the "folded stacks"
+  format (`step;function;function time`) which flame graph tools can read, and printed as a tree
+
+Usage:
+    with qp.profiling(count_statements=False) as profiler:
+        ...
+    qp.write_reports(profiler, "reports/query_profile")
+
+Dependencies:
+- None (standard library)
+"""
+
+import sys
+import csv
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+
+_IGNORED_MODULES = ["scripts.graph_construction.graphdb", __name__]
+
+class QueryProfiler:
+    def __init__(self, count_statements: bool = False):
+        """
+        Args:
+            count_statements (bool): Whether the number of statements of the repository is requested before and after
+                each update (it costs two more requests for each update).
+        """
+        self.count_statements = count_statements
+        self.records = []
+        self.stages = []
+        self.current_stages = []
+
+    def record(self, kind: str, query: str, elapsed: float, response_size: int = None, statements_delta: int = None):
+        stack = get_caller_stack() or ["<top level>"]
+        query_bytes = query.encode("utf-8")
+        self.records.append({
+            "kind": kind,
+            "step": self.get_step(stack),
+            "caller": stack[-1],
+            "stack": ";".join(stack),
+            "query_hash": hashlib.sha1(query_bytes).hexdigest()[:12],
+            "wall_time": elapsed,
+            "request_size": len(query_bytes),
+            "response_size": response_size,
+            "statements_delta": statements_delta,
+        })
+
+    def get_step(self, stack: list):
+        """
+        Returns the step of a query: the name of the enclosing stage if any, else the first function called by the entry point
+        (wrappers which call the entry point again, such as `build_fact_graph_from_sources`, are skipped).
+        """
+        if len(self.current_stages) > 0:
+            return self.current_stages[-1]
+        callees = [function for function in stack if function != stack[0]]
+        return callees[0] if len(callees) > 0 else stack[0]
+
+    def record_stage(self, name: str, elapsed: float, query_count: int, settings: dict = None):
+        self.stages.append({"stage": name, "wall_time": elapsed, "query_count": query_count, **(settings or {})})
+
+    def get_folded_stacks(self):
+        """
+        Returns a dictionary {folded stack: total time (in seconds)}.
+        """
+        folded_stacks = {}
+        for record in self.records:
+            folded_stacks[record["stack"]] = folded_stacks.get(record["stack"], 0.0) + record["wall_time"]
+        return folded_stacks
+
+    def get_step_summary(self):
+        """
+        Returns a list of (step, number of queries, total time) sorted by decreasing time.
+        """
+        steps = {}
+        for record in self.records:
+            count, total = steps.get(record["step"], (0, 0.0))
+            steps[record["step"]] = (count + 1, total + record["wall_time"])
+        return sorted([(step, count, total) for step, (count, total) in steps.items()], key=lambda x: -x[2])
+
+    def print_summary(self, top: int = 20):
+        if len(self.stages) > 0:
+            print("Stages:")
+            for stage in self.stages:
+                settings = ", ".join([f"{key}={value}" for key, value in stage.items() if key not in ["stage", "wall_time", "query_count"]])
+                print(f"{stage['wall_time']:10.2f} s {stage['query_count']:6d} queries  {stage['stage']}" + (f" ({settings})" if settings else ""))
+
+        total_time = sum(record["wall_time"] for record in self.records)
+        print(f"{len(self.records)} queries, {total_time:.2f} s")
+        for step, count, step_time in self.get_step_summary():
+            share = step_time / total_time * 100 if total_time > 0 else 0.0
+            print(f"{step_time:10.2f} s {share:5.1f} % {count:6d} queries  {step}")
+
+        print(f"Top {top} call stacks:")
+        folded_stacks = sorted(self.get_folded_stacks().items(), key=lambda x: -x[1])[:top]
+        for folded_stack, stack_time in folded_stacks:
+            functions = folded_stack.split(";")
+            print(f"{stack_time:10.2f} s  " + "\n               ".join(["  " * i + function for i, function in enumerate(functions)]))
+
+    def write_json_report(self, json_file: str):
+        with open(json_file, "w") as f:
+            json.dump({"stages": self.stages, "steps": self.get_step_summary(), "queries": self.records}, f, indent=2)
+
+    def write_csv_report(self, csv_file: str):
+        fieldnames = ["kind", "step", "caller", "stack", "query_hash", "wall_time", "request_size", "response_size", "statements_delta"]
+        with open(csv_file, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def write_folded_stacks(self, folded_file: str):
+        """
+        Write times (in milliseconds) by call stack in the folded format used by flame graph tools.
+        """
+        with open(folded_file, "w") as f:
+            for folded_stack, stack_time in self.get_folded_stacks().items():
+                f.write(f"{folded_stack} {round(stack_time * 1000)}\n")
+
+
+_query_profiler = None
+
+def get_query_profiler() -> QueryProfiler:
+    """
+    Get the current profiler (None if queries are not profiled).
+    """
+    return _query_profiler
+
+def set_query_profiler(profiler: QueryProfiler):
+    global _query_profiler
+    _query_profiler = profiler
+
+@contextmanager
+def profiling(count_statements: bool = False):
+    """
+    Profile all queries sent to GraphDB inside the `with` block.
+    """
+    previous_profiler = get_query_profiler()
+    profiler = QueryProfiler(count_statements=count_statements)
+    set_query_profiler(profiler)
+    try:
+        yield profiler
+    finally:
+        set_query_profiler(previous_profiler)
+
+@contextmanager
+def profile_query(kind: str, query: str, get_statement_count=None):
+    """
+    Measure a query if a profiler is set. The yielded dictionary can receive the size of the response (`response_size`)
+    and the time spent outside of the query inside the `with` block (`suspended_time`, such as the time a generator
+    of results is suspended while its consumer works), which is not counted. `get_statement_count` is a function returning the number of statements of the repository, called before and after the
+    query if the profiler counts statements.
+    """
+    profiler = get_query_profiler()
+    measure = {}
+    if profiler is None:
+        yield measure
+        return
+
+    count_statements = profiler.count_statements and get_statement_count is not None
+    statements_before = get_statement_count() if count_statements else None
+    start = time.perf_counter()
+    try:
+        yield measure
+    finally:
+        elapsed = time.perf_counter() - start - measure.get("suspended_time", 0.0)
+        statements_delta = None
+        if count_statements:
+            statements_after = get_statement_count()
+            if statements_before is not None and statements_after is not None:
+                statements_delta = statements_after - statements_before
+        profiler.record(kind, query, elapsed, measure.get("response_size"), statements_delta)
+
+@contextmanager
+def profile_stage(name: str, **settings):
+    """
+    Measure a stage of the pipeline if a profiler is set. `settings` (such as `inference_suspended=True`)
+    are written with the stage in the reports, to compare runs made with different settings.
+    """
+    profiler = get_query_profiler()
+    if profiler is None:
+        yield
+        return
+
+    query_count = len(profiler.records)
+    profiler.current_stages.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.current_stages.pop()
+        profiler.record_stage(name, time.perf_counter() - start, len(profiler.records) - query_count, settings)
+
+def get_caller_stack():
+    """
+    Returns the functions of the `scripts` package which lead to the query (outermost first), as `module.function`.
+    """
+    stack = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        module_name = frame.f_globals.get("__name__", "")
+        if module_name.startswith("scripts.") and module_name not in _IGNORED_MODULES:
+            stack.append(f"{module_name.split('.')[-1]}.{frame.f_code.co_name}")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def write_reports(profiler: QueryProfiler, report_prefix: str, top: int = 20):
+    """
+    Write JSON, CSV and folded stacks reports (`{report_prefix}.json`, `.csv` and `.folded`) and print a summary.
+    """
+    profiler.write_json_report(f"{report_prefix}.json")
+    profiler.write_csv_report(f"{report_prefix}.csv")
+    profiler.write_folded_stacks(f"{report_prefix}.folded")
+    profiler.print_summary(top=top)
+
+def compare_stage_times(json_report_files: list[str]):
+    """
+    Print the time of each stage in several JSON reports (for example a run with suspended inference and one without),
+    with the difference to the first report.
+    """
+    reports_stages = []
+    for json_report_file in json_report_files:
+        with open(json_report_file) as f:
+            reports_stages.append({stage["stage"]: stage["wall_time"] for stage in json.load(f).get("stages", [])})
+
+    stage_names = []
+    for stages in reports_stages:
+        stage_names += [name for name in stages if name not in stage_names]
+
+    for name in stage_names:
+        reference_time = reports_stages[0].get(name)
+        stage_times = []
+        for stages in reports_stages:
+            stage_time = stages.get(name)
+            if stage_time is None:
+                stage_times.append("-")
+            elif reference_time is None or stages is reports_stages[0]:
+                stage_times.append(f"{stage_time:.2f} s")
+            else:
+                stage_times.append(f"{stage_time:.2f} s ({stage_time - reference_time:+.2f} s)")
+        print(f"{name:<30}" + "".join([f"{stage_time:>24}" for stage_time in stage_times]))
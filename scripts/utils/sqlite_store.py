@@ -0,0 +1,127 @@
+"""
+sqlite_store.py
+
+A small on-disk (SQLite) key-value store, base of the caches of processed values (`processed_values_cache`)
+and of normalised labels (`label_dictionary`).
+
+Features:
+- One table whose first column is the key
+- Bulk lookups (keys searched by batches with `IN (...)`) and insertions
+- Insertions buffered and written by batches (and when the store is closed), buffered entries being found by lookups
+- Invalidation: the whole table is cleared if the version of the store changes
+
+Dependencies:
+- sqlite3
+"""
+
+import sqlite3
+import logging
+
+# Configure logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SQLiteKeyValueStore:
+    def __init__(self, db_file: str, table_name: str, column_definitions: list, version: str, store_name: str,
+                 batch_size: int = 500, commit_size: int = 1):
+        """
+        Opens (or creates) the store saved in `db_file`.
+
+        Args:
+            db_file (str): Path to the SQLite file.
+            table_name (str): Name of the table of entries.
+            column_definitions (list of str): Definitions of the columns of the table (e.g. ["key TEXT PRIMARY KEY", "value TEXT"]), the first one being the key.
+            version (str): Version of the store, the table is cleared when it changes.
+            store_name (str): Name of the store in log messages.
+            batch_size (int): Number of keys searched in a single query.
+            commit_size (int): Number of buffered rows from which they are written and committed.
+        """
+        self.table_name = table_name
+        self.columns = [col_def.split()[0] for col_def in column_definitions]
+        self.key_column = self.columns[0]
+        self.store_name = store_name
+        self.batch_size = batch_size
+        self.commit_size = commit_size
+        self.pending_rows = {}
+        self.conn = sqlite3.connect(db_file)
+        self._init_tables(column_definitions, version)
+
+    def _init_tables(self, column_definitions: list, version: str):
+        cur = self.conn.cursor()
+        cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {self.table_name} ({', '.join(column_definitions)})")
+
+        row = cur.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            cur.execute(f"DELETE FROM {self.table_name}")
+            cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+            if row is not None:
+                logger.info(f"🧹 {self.store_name} cleared (new version).")
+
+        self.conn.commit()
+        cur.close()
+
+    def get_rows(self, keys: list, columns: list):
+        """
+        Returns the rows (key followed by values of `columns`) of the entries of `keys` found in the store.
+        """
+        column_indexes = [self.columns.index(col) for col in columns]
+        rows = [(key, *[self.pending_rows[key][i] for i in column_indexes]) for key in keys if key in self.pending_rows]
+        keys = [key for key in keys if key not in self.pending_rows]
+
+        cur = self.conn.cursor()
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start+self.batch_size]
+            placeholders = ", ".join(["?"] * len(batch))
+            cur.execute(f"SELECT {', '.join([self.key_column] + columns)} FROM {self.table_name} WHERE {self.key_column} IN ({placeholders})", batch)
+            rows += cur.fetchall()
+        cur.close()
+
+        return rows
+
+    def iter_all_rows(self):
+        """
+        Yields all rows of the store (values of all columns).
+        """
+        self.flush()
+        cur = self.conn.cursor()
+        yield from cur.execute(f"SELECT {', '.join(self.columns)} FROM {self.table_name}")
+        cur.close()
+
+    def set_rows(self, rows: list):
+        """
+        Inserts (or replaces) rows (values of all columns). They are buffered, then written and committed
+        once `commit_size` rows are waiting.
+        """
+        for row in rows:
+            self.pending_rows[row[0]] = row
+        if len(self.pending_rows) >= self.commit_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes and commits buffered rows.
+        """
+        if len(self.pending_rows) > 0:
+            placeholders = ", ".join(["?"] * len(self.columns))
+            self.conn.executemany(f"INSERT OR REPLACE INTO {self.table_name} VALUES ({placeholders})", list(self.pending_rows.values()))
+            self.pending_rows = {}
+        self.conn.commit()
+
+    def clear(self):
+        self.pending_rows = {}
+        self.conn.execute(f"DELETE FROM {self.table_name}")
+        self.conn.commit()
+        logger.info(f"🧹 {self.store_name} cleared.")
+
+    def close(self):
+        if self.conn:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
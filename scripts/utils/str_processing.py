@@ -1,5 +1,7 @@
 import re
 import unidecode
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from rdflib import Graph, RDFS, Literal
 from difflib import SequenceMatcher
 
@@ -24,15 +26,33 @@ def remove_abbreviations_from_dict(name:str, abbreviations_dict:dict, entire_mat
 
     return normalized_name
 
+def compile_abbreviations(abbreviations_dict:dict, entire_match:bool=False):
+    """
+    Returns the list of (compiled pattern, replacement) of an abbreviations dictionary, to be used by `remove_compiled_abbreviations`.
+    """
+    return [(re.compile(f"^{abbre}$" if entire_match else abbre), val) for abbre, val in abbreviations_dict.items()]
+
+def remove_compiled_abbreviations(name:str, compiled_abbreviations:list):
+    # Same as `remove_abbreviations_from_dict` with patterns compiled once by `compile_abbreviations`
+    normalized_name = name
+    for pattern, val in compiled_abbreviations:
+        normalized_name = pattern.sub(val, normalized_name)
+
+    return normalized_name
+
 def match_apostrophe(matchobj:re.Match):
     to_replace = re.sub("'{1,}", " ", matchobj.group(0))
     return to_replace
 
+_apostrophes_pattern = re.compile("[’'ʼ]")
+_separators_pattern = re.compile("[- ]{1,}")
+_letter_apostrophe_pattern = re.compile("(^| )[a-z]('{1,})", flags=re.IGNORECASE)
+
 def get_words_list_from_label(label:str, case_option:str=None):
     split_setting = " "
-    separated_words = re.sub("[’'ʼ]", "'", label) # Replace apostrophies by only one version
-    separated_words = re.sub("[- ]{1,}", " ", label) # Replace dash and spaces by `split_setting`
-    separated_words = re.sub("(^| )[a-z]('{1,})", match_apostrophe, separated_words, flags=re.IGNORECASE)
+    separated_words = _apostrophes_pattern.sub("'", label) # Replace apostrophies by only one version
+    separated_words = _separators_pattern.sub(" ", label) # Replace dash and spaces by `split_setting`
+    separated_words = _letter_apostrophe_pattern.sub(match_apostrophe, separated_words)
 
     if case_option == "lower":
         separated_words = separated_words.lower()
@@ -46,13 +66,21 @@ def get_words_list_from_label(label:str, case_option:str=None):
     words_list = separated_words.split(split_setting)
     return words_list
 
-def normalize_french_commune_name(commune_name:str):
+def get_french_commune_abbreviations():
     abbreviations_dict = {"st(\.|)":"saint", "ste(\.|)":"sainte", "sts(\.|)":"saints", "stes(\.|)":"saintes",
                          "chap(\.|)":"chapelle",
                          "gd":"grand", "pt":"petit", "vx":"vieux", 
                         }
-    lower_case_words = ["à","au","aux","chez","d","de","derrière","des","dessous","dessus","deux","devant","du","en","entre","ès","et","l","la","le","les","lès","près","sous","sur"]
-    words_before_apostrophe = ["d","l"]
+    return abbreviations_dict
+
+# Abbreviations and words lists are built once, for all names
+_french_commune_abbreviations = compile_abbreviations(get_french_commune_abbreviations(), entire_match=True)
+_french_commune_lower_case_words = {"à","au","aux","chez","d","de","derrière","des","dessous","dessus","deux","devant","du","en","entre","ès","et","l","la","le","les","lès","près","sous","sur"}
+_french_words_before_apostrophe = {"d","l"}
+
+def normalize_french_commune_name(commune_name:str):
+    lower_case_words = _french_commune_lower_case_words
+    words_before_apostrophe = _french_words_before_apostrophe
 
     commune_name_words = get_words_list_from_label(commune_name, case_option="lower")
     for i, raw_word in enumerate(commune_name_words):
@@ -62,7 +90,7 @@ def normalize_french_commune_name(commune_name:str):
             is_lower_case_word = False
 
         if not is_lower_case_word or i == 0 or next_chr == " ":
-            word = remove_abbreviations_from_dict(raw_word, abbreviations_dict, True)
+            word = remove_compiled_abbreviations(raw_word, _french_commune_abbreviations)
             word = word.capitalize()
         else:
             word = raw_word
@@ -79,10 +107,7 @@ def normalize_french_commune_name(commune_name:str):
    
     return "".join(commune_name_words)
 
-def normalize_nolang_number_name_version(number_name:str):
-    normalized_name = number_name.lower()
-    normalized_name = normalized_name.replace(" ", "")
-
+def get_nolang_number_replacements():
     replace_dict = {
         "bis":"b",
         "ter":"c",
@@ -96,11 +121,19 @@ def normalize_nolang_number_name_version(number_name:str):
         ";":"-",
         "/":"-",
     }
-    normalized_name = remove_abbreviations_from_dict(normalized_name, replace_dict, False)
+    return replace_dict
+
+_nolang_number_replacements = compile_abbreviations(get_nolang_number_replacements(), entire_match=False)
+
+def normalize_nolang_number_name_version(number_name:str):
+    normalized_name = number_name.lower()
+    normalized_name = normalized_name.replace(" ", "")
+
+    normalized_name = remove_compiled_abbreviations(normalized_name, _nolang_number_replacements)
 
     return normalized_name
 
-def normalize_french_thoroughfare_name(thoroughfare_name:str):
+def get_french_thoroughfare_abbreviations():
     abbreviations_dict = {
         "pl(a|)(\.|)":"place",
         "av(\.|)":"avenue",
@@ -135,45 +168,54 @@ def normalize_french_thoroughfare_name(thoroughfare_name:str):
         "20":"vingt", "30":"trente", "40":"quarante", "50":"cinquante", "60":"soixante", "70":"soixante-dix", "80":"quatre-vingts", "90":"quatre-vingt-dix",
         "100":"cent", "1000":"mille",
     }
+    return abbreviations_dict
 
-    lower_case_words = ["&","a","à","au","aux","d","de","des","du","en","ès","es","et","l","la","le","les","lès","ou","sous","sur"]
-    words_before_apostrophe = ["d","l"]
-        
+_french_thoroughfare_abbreviations = compile_abbreviations(get_french_thoroughfare_abbreviations(), entire_match=True)
+_french_thoroughfare_lower_case_words = {"&","a","à","au","aux","d","de","des","du","en","ès","es","et","l","la","le","les","lès","ou","sous","sur"}
+
+@lru_cache(maxsize=100000)
+def normalize_french_thoroughfare_word(word:str):
+    # Words of thoroughfare names are few compared to names, so their transformation is memoized
+    word = remove_compiled_abbreviations(word, _french_thoroughfare_abbreviations)
+    if word not in _french_thoroughfare_lower_case_words:
+        word = word.capitalize()
+    if word in _french_words_before_apostrophe:
+        word += "'"
+    return word
+
+def normalize_french_thoroughfare_name(thoroughfare_name:str):
     thoroughfare_name_words = get_words_list_from_label(thoroughfare_name, case_option="lower")
 
     for i, word in enumerate(thoroughfare_name_words):
-        word = remove_abbreviations_from_dict(word, abbreviations_dict, True)
-        if word not in lower_case_words:
-            word = word.capitalize()
-        if word in words_before_apostrophe:
-            word += "'"
-        thoroughfare_name_words[i] = word
+        thoroughfare_name_words[i] = normalize_french_thoroughfare_word(word)
     
     normalized_name = " ".join(thoroughfare_name_words)
     normalized_name = normalized_name.replace("' ", "'")
     return normalized_name
 
 
+_french_landmark_words_to_remove = {"&","a","à","au","aux","d","de","des","du","en","ès","es","et","l","la","le","les","lès","ou"}
+_french_landmark_words_to_replace = {
+    "boulevart":"boulevard",
+    "quay":"quai",
+    "enfans":"enfants",
+    "fauxbourg":"faubourg",
+}
+
+@lru_cache(maxsize=100000)
+def unidecode_word(word:str):
+    return unidecode.unidecode(word)
+
 def simplify_french_landmark_name(landmark_name:str, keep_spaces:bool=True, keep_diacritics:bool=True, sort_characters:bool=False):
-    words_to_remove = ["&","a","à","au","aux","d","de","des","du","en","ès","es","et","l","la","le","les","lès","ou"]
-    words_to_replace = {
-        "boulevart":"boulevard",
-        "quay":"quai",
-        "enfans":"enfants",
-        "fauxbourg":"faubourg",
-    }
     commune_name_words = get_words_list_from_label(landmark_name, case_option="lower")
     new_commune_name_words = []
 
     for word in commune_name_words:
         word = word.replace("'", "")
-        if word not in words_to_remove:
+        if word not in _french_landmark_words_to_remove:
             if not keep_diacritics:
-                word = unidecode.unidecode(word)
-            new_commune_name_words.append(word)
-
-    for word, replacement in words_to_replace.items():
-        new_commune_name_words = [replacement if x == word else x for x in new_commune_name_words]
+                word = unidecode_word(word)
+            new_commune_name_words.append(_french_landmark_words_to_replace.get(word, word))
 
     word_sep = ""
     if keep_spaces:
@@ -201,9 +243,10 @@ def normalize_street_rdfs_labels_in_graph_file(graph_file:str):
     g.parse(graph_file)
     triples_to_remove = []
     triples_to_add = []
+    normaliser = get_name_normaliser()
     for s, p, o in g:
         if p == RDFS.label and isinstance(o, Literal) and o.language == "fr":
-            new_o_value = normalize_french_thoroughfare_name(o.value)
+            new_o_value, _ = normaliser.normalize_and_simplify(o.value, "thoroughfare", "fr")
             new_o = Literal(new_o_value, lang="fr")
             triples_to_remove.append((s,p,o))
             triples_to_add.append((s, p, new_o))
@@ -282,4 +325,115 @@ def split_french_address(address):
     if match:
         return match.group(1).strip(), match.group(2).strip()  # (numéro, nom de la voie)
     return None, address.strip()  # Si pas de numéro, renvoyer None et l'adresse complète
- 
\ No newline at end of file
+
+class NameNormaliser:
+    def __init__(self, cache_size:int=1000000):
+        """
+        Normalise and simplify names with `normalize_and_simplify_name_version`, but:
+        * results for (label, name type, lang) are memoized (up to `cache_size` results) ;
+        * lists of labels can be processed at once, across processes if they are numerous.
+
+        Example usage:
+        ```python
+        normaliser = NameNormaliser()
+        normalized_name, simplified_name = normaliser.normalize_and_simplify("r. de la Paix", "thoroughfare", "fr")
+        names = normaliser.normalize_and_simplify_list([("r. de la Paix", "thoroughfare", "fr"), ("12 bis", "number", None)])
+        ```
+
+        A persistent label dictionary (`scripts.utils.label_dictionary.LabelDictionary`) can be set with `set_label_dictionary`:
+        labels are then searched in it before being processed, and processed labels are stored in it.
+        """
+        self.cache_size = cache_size
+        self.label_dictionary = None
+        self._results = {}
+
+    def set_label_dictionary(self, label_dictionary):
+        """
+        Set the persistent label dictionary searched before processing labels (None to stop using it).
+        """
+        self.label_dictionary = label_dictionary
+
+    def _compute_and_memoize(self, key:tuple):
+        result = normalize_and_simplify_name_version(*key)
+        self._memoize(key, result)
+        return result
+
+    def _memoize(self, key:tuple, result:tuple):
+        if len(self._results) >= self.cache_size:
+            self._results.clear()
+        self._results[key] = result
+
+    def normalize_and_simplify(self, name_version:str, name_type:str, name_lang:str):
+        """
+        Returns (normalized name, simplified name) as `normalize_and_simplify_name_version`.
+        """
+        key = (name_version, name_type, name_lang)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+
+        if self.label_dictionary is None or name_version is None:
+            return self._compute_and_memoize(key)
+
+        result = self.label_dictionary.get_names([key]).get(key)
+        if result is None:
+            result = self._compute_and_memoize(key)
+            self.label_dictionary.set_names([key], [result])
+        else:
+            self._memoize(key, result)
+        return result
+
+    def normalize_and_simplify_list(self, name_versions:list, workers:int=1, chunk_size:int=50000):
+        """
+        Returns the list of (normalized name, simplified name) of `name_versions`, a list of (label, name type, lang).
+        Distinct labels which are neither in cache nor in the label dictionary are processed across `workers` processes
+        (by chunks of `chunk_size`) if `workers` is greater than 1.
+        Results of the batch are kept for this call only, they are memoized within the limit of `cache_size`.
+        """
+        batch_results = {key: self._results[key] for key in name_versions if key in self._results}
+        to_process = list(dict.fromkeys([key for key in name_versions if key not in batch_results]))
+
+        found_names = {}
+        if self.label_dictionary is not None:
+            found_names = self.label_dictionary.get_names([key for key in to_process if key[0] is not None])
+            to_process = [key for key in to_process if key not in found_names]
+
+        processed_names = {}
+        if workers > 1 and len(to_process) > chunk_size:
+            chunks = [to_process[i:i+chunk_size] for i in range(0, len(to_process), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for chunk, chunk_results in zip(chunks, executor.map(normalize_and_simplify_name_versions, chunks)):
+                    processed_names.update(zip(chunk, chunk_results))
+        else:
+            for key in to_process:
+                processed_names[key] = normalize_and_simplify_name_version(*key)
+
+        for names in [found_names, processed_names]:
+            batch_results.update(names)
+            for key, result in names.items():
+                self._memoize(key, result)
+
+        if self.label_dictionary is not None:
+            keys_to_store = [key for key in processed_names if key[0] is not None]
+            self.label_dictionary.set_names(keys_to_store, [processed_names[key] for key in keys_to_store])
+
+        return [batch_results.get(key) or self.normalize_and_simplify(*key) for key in name_versions]
+
+_name_normaliser = None
+
+def get_name_normaliser() -> NameNormaliser:
+    """
+    Get the normaliser shared by the functions of this module (it is created at first call).
+    """
+    global _name_normaliser
+    if _name_normaliser is None:
+        _name_normaliser = NameNormaliser()
+    return _name_normaliser
+
+def normalize_and_simplify_name_versions(name_versions:list):
+    """
+    Returns the list of (normalized name, simplified name) of `name_versions`, a list of (label, name type, lang), with the shared normaliser.
+    """
+    # The label dictionary of the parent process is not used in worker processes
+    normaliser = get_name_normaliser()
+    return [normaliser._results.get(key) or normaliser._compute_and_memoize(key) for key in name_versions]
@@ -1,9 +1,10 @@
 import re
 import datetime
-from rdflib import Literal, URIRef
+from rdflib import Graph, Literal, URIRef
 from rdflib.namespace import XSD
 from scripts.graph_construction.namespaces import NameSpaces, OntologyMapping
 from scripts.graph_construction import graphdb as gd
+from scripts.graph_construction import graphrdf as gr
 
 
 np = NameSpaces()
@@ -87,6 +88,262 @@ def get_query_to_compare_time_instants(time_named_graph_uri:URIRef, time_instant
 
     return query
 
+def get_time_precision_ranks():
+    """
+    Rank of time precisions as in `get_query_to_compare_time_instants` (the higher, the more precise, 0 for other precisions),
+    with the number of years which defines instants at the same time (None for units finer than the year).
+    """
+    precision_ranks = {
+        np.TIME["unitMillenium"]: (1, 1000),
+        np.TIME["unitCentury"]: (2, 100),
+        np.TIME["unitDecade"]: (3, 10),
+        np.TIME["unitYear"]: (4, 1),
+        np.TIME["unitMonth"]: (5, None),
+        np.TIME["unitDay"]: (6, None),
+    }
+
+    return precision_ranks
+
+def get_time_stamp_elements(time_stamp:str):
+    """
+    Returns the year, month and day of a time stamp (`-0500-01-01T00:00:00Z`, `1850-03-12T00:00:00`...), or None if it is not valid.
+    """
+    time_match = re.match(r"^([+-]?\d+)-(\d{2})-(\d{2})", time_stamp)
+    if time_match is None:
+        return None
+
+    return int(time_match.group(1)), int(time_match.group(2)), int(time_match.group(3))
+
+def get_time_instant_truncated_keys(time_stamp:str):
+    """
+    Returns a dictionary {precision rank: key} such as two instants are at the same time for a precision if they have the same key.
+    """
+    year, month, day = get_time_stamp_elements(time_stamp)
+    truncated_keys = {}
+    for rank, years in get_time_precision_ranks().values():
+        if years is not None:
+            truncated_keys[rank] = year // years
+    truncated_keys[5] = (year, month)
+    truncated_keys[6] = (year, month, day)
+
+    return truncated_keys
+
+def get_time_instant_comparison_elements(time_stamp:Literal, time_calendar:URIRef, time_precision:URIRef):
+    """
+    Returns the elements used to compare an instant with other ones: (sort key, calendar, precision rank, truncated keys),
+    or None if its time stamp is not valid.
+    """
+    elements = get_time_stamp_elements(str(time_stamp))
+    if elements is None:
+        return None
+
+    rank = get_time_precision_ranks().get(time_precision, (0, None))[0]
+    sort_key = (elements[0], str(time_stamp).lstrip("+-").split("-", 1)[-1])
+    return sort_key, time_calendar, rank, get_time_instant_truncated_keys(str(time_stamp))
+
+def are_time_instants_at_same_time(elements_1:tuple, elements_2:tuple):
+    """
+    Two instants are at the same time if they share the truncated key of the coarsest precision of both.
+    """
+    _, _, rank_1, keys_1 = elements_1
+    _, _, rank_2, keys_2 = elements_2
+    known_ranks = [rank for rank in [rank_1, rank_2] if rank > 0]
+    if len(known_ranks) == 0:
+        return False
+
+    coarsest_rank = min(known_ranks)
+    return keys_1[coarsest_rank] == keys_2[coarsest_rank]
+
+def get_time_instant_relations(elements_1:tuple, elements_2:tuple):
+    """
+    Returns the relations (`addr:instantSameTime`, `addr:instantBefore`, `addr:instantAfter`) from instant 1 to instant 2
+    once they have been compared (`instantAfter` being the inverse of `instantBefore`). Instants of different calendars are not compared.
+    """
+    if elements_1 is None or elements_2 is None or elements_1[1] != elements_2[1]:
+        return set()
+
+    if are_time_instants_at_same_time(elements_1, elements_2):
+        return {np.ADDR["instantSameTime"]}
+
+    relations = set()
+    if elements_1[0] <= elements_2[0]:
+        relations.add(np.ADDR["instantBefore"])
+    if elements_2[0] <= elements_1[0]:
+        relations.add(np.ADDR["instantAfter"])
+    return relations
+
+def get_time_instant_relation_triples(time_instants:list, existing_relations:set):
+    """
+    Compute relations between the instants of a group (instants of an event, of an attribute...) as `get_query_to_compare_time_instants` does.
+    `time_instants` is a list of (instant, time stamp, calendar, precision) and `existing_relations` the set of (instant 1, instant 2)
+    already linked by `addr:instantSameTime`, `addr:instantBefore` or `addr:instantAfter`.
+
+    Instants are sorted by time stamp, so a pair is only considered in one direction (both if time stamps are equal).
+    """
+    elements = []
+    for time_instant, time_stamp, time_calendar, time_precision in time_instants:
+        comparison_elements = get_time_instant_comparison_elements(time_stamp, time_calendar, time_precision)
+        if comparison_elements is not None:
+            elements.append((time_instant, comparison_elements))
+    elements.sort(key=lambda x: x[1][0])
+
+    triples = set()
+    for i, (ti1, elements_1) in enumerate(elements):
+        for ti2, elements_2 in elements[i+1:]:
+            if elements_1[1] != elements_2[1]:
+                continue
+            pairs = [(ti1, elements_1, ti2, elements_2)]
+            if elements_1[0] == elements_2[0]:
+                pairs.append((ti2, elements_2, ti1, elements_1))
+            for ti_a, elements_a, ti_b, elements_b in pairs:
+                if ti_a == ti_b or (ti_a, ti_b) in existing_relations:
+                    continue
+                if are_time_instants_at_same_time(elements_a, elements_b):
+                    rank_a, rank_b = elements_a[2], elements_b[2]
+                    triples.add((ti_a, np.ADDR["instantSameTime"], ti_b))
+                    if rank_a > rank_b:
+                        triples.add((ti_a, np.ADDR["instantLessPreciseThan"], ti_b))
+                    elif rank_a < rank_b:
+                        triples.add((ti_a, np.ADDR["instantMorePreciseThan"], ti_b))
+                    else:
+                        triples.add((ti_a, np.ADDR["instantAsPreciseAs"], ti_b))
+                else:
+                    triples.add((ti_a, np.ADDR["instantBefore"], ti_b))
+
+    return triples
+
+def compare_time_instants_in_python(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef, time_instant_group_conditions:str):
+    """
+    Same comparison as `get_query_to_compare_time_instants`, computed in Python: instants are got once with their group
+    (`time_instant_group_conditions` binds ?group and ?ti), relations are computed for each group and imported at once.
+    """
+
+    query = np.query_prefixes + f"""
+    SELECT DISTINCT ?group ?ti ?ts ?tc ?tp WHERE {{
+        {time_instant_group_conditions}
+        ?ti a addr:CrispTimeInstant; addr:timeStamp ?ts; addr:timeCalendar ?tc; addr:timePrecision ?tp.
+    }}
+    """
+
+    # Existing relations are only got for the instants of the selected groups
+    relations_query = np.query_prefixes + f"""
+    SELECT DISTINCT ?ti1 ?ti2 WHERE {{
+        {{
+            SELECT DISTINCT ?ti1 WHERE {{
+                {time_instant_group_conditions}
+                ?ti a addr:CrispTimeInstant .
+                BIND(?ti AS ?ti1)
+            }}
+        }}
+        ?ti1 ?p ?ti2 .
+        FILTER(?p IN (addr:instantSameTime, addr:instantBefore, addr:instantAfter))
+    }}
+    """
+
+    groups = {}
+    for binding in gd.select_query_to_bindings(query, graphdb_url, repository_name):
+        group = gr.convert_result_elem_to_rdflib_elem(binding.get("group"))
+        time_instant = [gr.convert_result_elem_to_rdflib_elem(binding.get(var)) for var in ["ti", "ts", "tc", "tp"]]
+        groups.setdefault(group, []).append(time_instant)
+
+    existing_relations = set()
+    for binding in gd.select_query_to_bindings(relations_query, graphdb_url, repository_name):
+        existing_relations.add((gr.convert_result_elem_to_rdflib_elem(binding.get("ti1")), gr.convert_result_elem_to_rdflib_elem(binding.get("ti2"))))
+
+    g = Graph()
+    for time_instants in groups.values():
+        for triple in get_time_instant_relation_triples(time_instants, existing_relations):
+            g.add(triple)
+
+    if len(g) > 0:
+        np.bind_namespaces(g)
+        gd.import_rdf_data_in_graphdb(graphdb_url, repository_name, g.serialize(format="turtle"), named_graph_uri=time_named_graph_uri)
+
+def get_time_interval_relation_rules():
+    """
+    Allen relations as they are defined in `get_query_to_compare_time_intervals`: an interval i1 is related to i2 if all
+    conditions (endpoint of i1, endpoint of i2, relation between these instants) are true.
+    """
+    before, same_time, after = np.ADDR["instantBefore"], np.ADDR["instantSameTime"], np.ADDR["instantAfter"]
+    rules = {
+        np.TIME["intervalBefore"]: [("end", "beginning", before)],
+        np.TIME["intervalMeets"]: [("end", "beginning", same_time)],
+        np.TIME["intervalOverlaps"]: [("beginning", "beginning", before), ("end", "beginning", after), ("end", "end", before)],
+        np.TIME["intervalStarts"]: [("beginning", "beginning", same_time), ("end", "end", before)],
+        np.TIME["intervalDuring"]: [("beginning", "beginning", after), ("end", "end", before)],
+        np.TIME["intervalFinishes"]: [("beginning", "beginning", after), ("end", "end", same_time)],
+        np.TIME["intervalEquals"]: [("beginning", "beginning", same_time), ("end", "end", same_time)],
+    }
+
+    return rules
+
+def get_time_interval_relation_triples(time_intervals:dict):
+    """
+    Compute Allen relations between the intervals of a group (the versions of an attribute...) as `get_query_to_compare_time_intervals` does.
+    `time_intervals` is a dictionary {interval: {"beginning": [elements], "end": [elements]}} whose elements are given
+    by `get_time_instant_comparison_elements`.
+
+    Relations between endpoints are computed once for each pair of instants. Every ordered pair of intervals is compared,
+    as some relations (during, finishes) go from an interval to one which begins before it.
+    """
+    rules = get_time_interval_relation_rules()
+
+    instant_relations = {}
+    def get_endpoint_relations(elements_1:tuple, elements_2:tuple):
+        key = (id(elements_1), id(elements_2))
+        if key not in instant_relations:
+            instant_relations[key] = get_time_instant_relations(elements_1, elements_2)
+        return instant_relations[key]
+
+    triples = set()
+    for i1, endpoints_1 in time_intervals.items():
+        for i2, endpoints_2 in time_intervals.items():
+            if i1 == i2:
+                continue
+            for interval_relation, conditions in rules.items():
+                if all(
+                    any(relation in get_endpoint_relations(elements_1, elements_2)
+                        for elements_1 in endpoints_1.get(endpoint_1, []) for elements_2 in endpoints_2.get(endpoint_2, []))
+                    for endpoint_1, endpoint_2, relation in conditions
+                    ):
+                    triples.add((i1, interval_relation, i2))
+
+    return triples
+
+def compare_time_intervals_in_python(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef, time_interval_group_conditions:str):
+    """
+    Same comparison as `get_query_to_compare_time_intervals`, computed in Python: intervals are got once with their endpoints and
+    their group (`time_interval_group_conditions` binds ?group and ?i, intervals being only compared inside a group),
+    then relations are computed for each group and imported at once.
+    """
+
+    query = np.query_prefixes + f"""
+    SELECT DISTINCT ?group ?i ?endpoint ?t ?ts ?tc ?tp WHERE {{
+        {time_interval_group_conditions}
+        VALUES (?endpointProp ?endpoint) {{ (addr:hasBeginning "beginning") (addr:hasEnd "end") }}
+        ?i a addr:CrispTimeInterval ; ?endpointProp ?t .
+        ?t a addr:CrispTimeInstant; addr:timeStamp ?ts; addr:timeCalendar ?tc; addr:timePrecision ?tp.
+    }}
+    """
+
+    groups = {}
+    for binding in gd.select_query_to_bindings(query, graphdb_url, repository_name):
+        group, interval = gr.convert_result_elem_to_rdflib_elem(binding.get("group")), gr.convert_result_elem_to_rdflib_elem(binding.get("i"))
+        time_stamp, time_calendar, time_precision = [gr.convert_result_elem_to_rdflib_elem(binding.get(var)) for var in ["ts", "tc", "tp"]]
+        elements = get_time_instant_comparison_elements(time_stamp, time_calendar, time_precision)
+        if elements is not None:
+            endpoints = groups.setdefault(group, {}).setdefault(interval, {})
+            endpoints.setdefault(binding["endpoint"]["value"], []).append(elements)
+
+    g = Graph()
+    for time_intervals in groups.values():
+        for triple in get_time_interval_relation_triples(time_intervals):
+            g.add(triple)
+
+    if len(g) > 0:
+        np.bind_namespaces(g)
+        gd.import_rdf_data_in_graphdb(graphdb_url, repository_name, g.serialize(format="turtle"), named_graph_uri=time_named_graph_uri)
+
 def get_query_to_compare_time_intervals(time_named_graph_uri:URIRef, time_interval_select_conditions:str):
     """
     Compare time intervals according Allen algebra
@@ -215,10 +472,18 @@ def compare_time_instants_of_events_from_traces(graphdb_url:URIRef, repository_n
 
     gd.update_query(query, graphdb_url, repository_name)
 
-def compare_time_instants_of_events(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef):
+def compare_time_instants_of_events(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef, engine:str="sparql"):
     """
     Sort all time instants related to one event.
+    `engine` is the way instants are compared: with an `INSERT` query (`sparql`) or in Python (`python`).
     """
+
+    if engine == "python":
+        time_instant_group_conditions = """
+            ?group a addr:Event ; ?tpred ?ti .
+            FILTER(?tpred IN (addr:hasTime, addr:hasTimeBefore, addr:hasTimeAfter))
+        """
+        return compare_time_instants_in_python(graphdb_url, repository_name, time_named_graph_uri, time_instant_group_conditions)
     
     time_instant_select_conditions = """
         ?ev a addr:Event ; ?tpred1 ?ti1 ; ?tpred2 ?ti2 .
@@ -230,10 +495,19 @@ def compare_time_instants_of_events(graphdb_url:URIRef, repository_name:str, tim
 
     gd.update_query(query, graphdb_url, repository_name)
 
-def compare_time_instants_of_attributes(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef):
+def compare_time_instants_of_attributes(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef, engine:str="sparql"):
     """
     Sort all time instants related to one attribute.
+    `engine` is the way instants are compared: with an `INSERT` query (`sparql`) or in Python (`python`).
     """
+
+    if engine == "python":
+        time_instant_group_conditions = """
+            ?group a addr:Attribute .
+            ?cg a addr:AttributeChange ; addr:dependsOn [?tpred ?ti] ; addr:appliedTo ?group .
+            FILTER(?tpred IN (addr:hasTime, addr:hasTimeBefore, addr:hasTimeAfter))
+        """
+        return compare_time_instants_in_python(graphdb_url, repository_name, time_named_graph_uri, time_instant_group_conditions)
     
     time_instant_select_conditions = """
         ?attr a addr:Attribute .
@@ -247,10 +521,18 @@ def compare_time_instants_of_attributes(graphdb_url:URIRef, repository_name:str,
 
     gd.update_query(query, graphdb_url, repository_name)
 
-def compare_time_intervals_of_attribute_versions(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef):
+def compare_time_intervals_of_attribute_versions(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef, engine:str="sparql"):
     """
     Sort all time intervals of versions related to one attribute.
+    `engine` is the way intervals are compared: with `INSERT` queries (`sparql`) or in Python (`python`).
     """
+
+    if engine == "python":
+        time_interval_group_conditions = """
+            ?group a addr:Attribute ; addr:hasAttributeVersion ?av .
+            ?av addr:hasTime ?i .
+        """
+        return compare_time_intervals_in_python(graphdb_url, repository_name, time_named_graph_uri, time_interval_group_conditions)
     
     time_interval_select_conditions = """
         ?attr a addr:Attribute ; addr:hasAttributeVersion ?av1, ?av2 .
@@ -320,8 +602,7 @@ def get_earliest_and_latest_time_instants_for_events(graphdb_url:URIRef, reposit
         """
 
     queries = [query1, query2]
-    for query in queries:
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 def remove_earliest_and_latest_time_instants(graphdb_url:URIRef, repository_name:str, time_named_graph_uri:URIRef):
     query = np.query_prefixes + f"""
@@ -403,10 +684,9 @@ def get_validity_interval_for_attribute_versions(graphdb_url:URIRef, repository_
     """
 
     queries = [query1, query2]
-    for query in queries :
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
-def add_time_relations(graphdb_url:URIRef, repository_name:str, time_named_graph_name:str):
+def add_time_relations(graphdb_url:URIRef, repository_name:str, time_named_graph_name:str, engine:str="sparql"):
     """
     Add temporal relationships:
     * comparison of instants belonging to the same event (i1 before/after i2)
@@ -416,14 +696,15 @@ def add_time_relations(graphdb_url:URIRef, repository_name:str, time_named_graph
     * comparison of version intervals between versions of the same attribute
 
     The set of triples is stored in the named graph whose name is `time_named_graph_name`.
+    `engine` (`sparql` or `python`) is the way time instants and intervals are compared.
     """
     
     time_named_graph_uri = URIRef(gd.get_named_graph_uri_from_name(graphdb_url, repository_name, time_named_graph_name))
-    compare_time_instants_of_events(graphdb_url, repository_name, time_named_graph_uri)
-    compare_time_instants_of_attributes(graphdb_url, repository_name, time_named_graph_uri)
+    compare_time_instants_of_events(graphdb_url, repository_name, time_named_graph_uri, engine)
+    compare_time_instants_of_attributes(graphdb_url, repository_name, time_named_graph_uri, engine)
     get_earliest_and_latest_time_instants_for_events(graphdb_url, repository_name, time_named_graph_uri)
     get_validity_interval_for_attribute_versions(graphdb_url, repository_name, time_named_graph_uri)
-    compare_time_intervals_of_attribute_versions(graphdb_url, repository_name, time_named_graph_uri)
+    compare_time_intervals_of_attribute_versions(graphdb_url, repository_name, time_named_graph_uri, engine)
 
 
 def compare_events(graphdb_url:URIRef, repository_name:str, time_named_graph_name:str=None):
@@ -539,8 +820,7 @@ def get_events_before(graphdb_url:URIRef, repository_name:str, time_named_graph_
         """
     
     queries = [query1, query2, query3, query4, query5, query6]
-    for query in queries :
-        gd.update_query(query, graphdb_url, repository_name)
+    gd.update_queries(queries, graphdb_url, repository_name)
 
 def get_time_precision_from_integer(precision_int:int):
     """